@@ -0,0 +1,101 @@
+# benchmarks/bench_cold_start.py
+"""
+Cold start: backend import time and first-request latency, against a budget.
+
+Each run is a fresh interpreter that imports ``main``, builds the app
+through ``create_app`` and then answers one ``/api/find-routes``
+request, which loads the base graph and its indexes from the snapshot. The
+first run is a warm-up that makes sure the snapshot exists. ``--importtime``
+lists the slowest imports from ``python -X importtime``.
+
+Run from routeOptimiserBackend/:
+    python -m benchmarks.bench_cold_start --runs 5 --importtime
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+# Medians above these fail the run (exit status 1). Worker spawn time feeds
+# autoscaling, so keep them tight and raise them deliberately.
+IMPORT_BUDGET_MS = 350
+FIRST_REQUEST_BUDGET_MS = 300
+
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+import main
+t1 = time.perf_counter()
+client = main.create_app().test_client()
+response = client.post("/api/find-routes", json={
+    "startLat": 40.7128, "startLon": -74.0060, "initialCountry": "United States",
+    "endLat": 51.5074, "endLon": -0.1278, "finalCountry": "United Kingdom",
+    "maxDays": "", "weight": 500, "volume": 2, "optimizationType": "time"})
+t2 = time.perf_counter()
+assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "first_request_ms": (t2 - t1) * 1000}))
+"""
+
+
+def run_child():
+    out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def slowest_imports(count=10):
+    """(cumulative ms, module) of the slowest top-level imports under ``import main``."""
+    err = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                         capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, name.rstrip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def run(runs):
+    run_child()  # warm-up: builds the snapshot and indexes if they are missing
+    samples = [run_child() for _ in range(runs)]
+    return {
+        name: {"median": round(float(np.median([s[name] for s in samples])), 1),
+               "max": round(max(s[name] for s in samples), 1)}
+        for name in ("import_ms", "first_request_ms")
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="Also list the slowest imports")
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--first-request-budget-ms", type=float, default=FIRST_REQUEST_BUDGET_MS)
+    parser.add_argument("--json", help="Write results to this file as JSON")
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    budgets = {"import_ms": args.import_budget_ms, "first_request_ms": args.first_request_budget_ms}
+    print(f"{'metric':<18} {'median':>9} {'max':>9} {'budget':>9}")
+    over = []
+    for name, r in results.items():
+        print(f"{name:<18} {r['median']:>9.1f} {r['max']:>9.1f} {budgets[name]:>9.0f}")
+        if r["median"] > budgets[name]:
+            over.append(name)
+    if args.importtime:
+        results["slowest_imports"] = slowest_imports()
+        print("\nslowest imports (cumulative ms):")
+        for ms, name in results["slowest_imports"]:
+            print(f"{ms:>9.1f}  {name}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if over:
+        print(f"Over budget: {', '.join(over)}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,95 @@
+# benchmarks/bench_corridor.py
+"""
+Corridor pruning: search time, share of the graph kept, and route quality.
+
+Every query is answered once unrestricted and once per detour factor, with
+weights that bypass the contraction hierarchies, so the weighted search does
+all the work. Quality is the relative gap between the best weighted search
+objective among the corridor's core routes and the unrestricted one (ranking
+scores are normalized per candidate set, so they are not comparable across
+searches).
+
+Run from routeOptimiserBackend/:
+    python -m benchmarks.bench_corridor --factors 1.2 1.5 2.0
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import main
+from src.optimization.corridor import Corridor
+
+QUERIES = [
+    ("United States", (40.7128, -74.0060), "United Kingdom", (51.5074, -0.1278)),
+    ("India", (19.0760, 72.8777), "Germany", (52.52, 13.405)),
+    ("Australia", (-33.8688, 151.2093), "China", (31.2304, 121.4737)),
+    ("France", (48.8566, 2.3522), "Brazil", (-23.5505, -46.6333)),
+    ("Japan", (35.6762, 139.6503), "United States", (34.0522, -118.2437)),
+]
+WEIGHTS = [0.4, 0.3, 0.2, 0.1]
+WEIGHT_KG = 800
+
+
+def best_total(candidates, weights):
+    """Smallest weighted core-route objective, in the search's own units, over all candidates."""
+    return min(float(np.dot(weights, [metrics[key] for key in ("time", "cost", "emissions", "customs")]))
+               for _, metrics in candidates.routes)
+
+
+def run_query(builder, query, corridor_settings):
+    start_country, start, end_country, end = query
+    builder.config["search"]["corridor"] = corridor_settings
+    t0 = time.perf_counter()
+    _, candidates, _, _ = main.compute_routes(builder, start, end, start_country, end_country, WEIGHTS,
+                                              500, WEIGHT_KG / 1000, "customWeights", False, "scalar")
+    return time.perf_counter() - t0, candidates
+
+
+def run(factors, repeat=3):
+    builder = main.get_graph_builder()
+    results = []
+    for query in QUERIES:
+        base_time, base = min((run_query(builder, query, {"enabled": False}) for _ in range(repeat)),
+                              key=lambda r: r[0])
+        base_best = best_total(base, WEIGHTS)
+        graph = builder.compile_request_graph(builder.add_dynamic_road(query[1], query[3], query[0], query[2]))
+        starts, _ = builder.select_hubs(query[1], query[0])
+        ends, _ = builder.select_hubs(query[3], query[2], "from_hub")
+        keep = [graph.index[n] for n in starts + ends]
+        for factor in factors:
+            settings = {"enabled": True, "detour_factor": factor}
+            elapsed, candidates = min((run_query(builder, query, settings) for _ in range(repeat)),
+                                      key=lambda r: r[0])
+            kept = sum(Corridor(graph, query[1], query[3], detour_factor=factor, keep=keep).mask) / len(graph)
+            results.append({
+                "query": f"{query[0]} -> {query[2]}",
+                "detour_factor": factor,
+                "nodes_kept": round(kept, 3),
+                "unrestricted_ms": round(base_time * 1000, 1),
+                "corridor_ms": round(elapsed * 1000, 1),
+                "quality_gap": round(best_total(candidates, WEIGHTS) / base_best - 1, 4),
+            })
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--factors", type=float, nargs="+", default=[1.2, 1.5, 2.0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file as JSON")
+    args = parser.parse_args()
+
+    results = run(args.factors, args.repeat)
+    print(f"{'query':<34} {'factor':>6} {'kept':>6} {'full ms':>8} {'corr ms':>8} {'gap':>8}")
+    for r in results:
+        print(f"{r['query']:<34} {r['detour_factor']:>6.2f} {r['nodes_kept']:>6.2f} "
+              f"{r['unrestricted_ms']:>8.1f} {r['corridor_ms']:>8.1f} {r['quality_gap']:>8.2%}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
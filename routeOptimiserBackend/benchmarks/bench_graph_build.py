@@ -0,0 +1,107 @@
+# benchmarks/bench_graph_build.py
+"""
+Graph build time against input size.
+
+The bundled ships.csv and flights.csv are replicated ``scale`` times with
+seeded price/time jitter (extra carrier quotes for the same lanes), so the
+ingestion, parsing and de-duplication stages see proportionally more rows.
+
+Run from routeOptimiserBackend/:
+    python -m benchmarks.bench_graph_build --scales 1 10 100
+"""
+import argparse
+import copy
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_processing.graph_builder import GraphBuilder
+from src.utils.helpers import load_config
+
+JITTERED_FILES = {
+    "ships.csv": ["Price_Per_kg", "Price_Per_Container"],
+    "flights.csv": ["Cost_Per_Kg", "Flight_Time_Minutes"],
+}
+
+
+def write_scaled_inputs(config, scale, target_dir, seed=42):
+    rng = np.random.default_rng(seed)
+    nodes_dir = os.path.join(target_dir, "nodes")
+    edges_dir = os.path.join(target_dir, "edges")
+    shutil.copytree(config["data"]["raw_nodes_dir"], nodes_dir)
+    shutil.copytree(config["data"]["raw_edges_dir"], edges_dir)
+    rows = 0
+    for name, columns in JITTERED_FILES.items():
+        frame = pd.read_csv(os.path.join(edges_dir, name), encoding="utf-8")
+        copies = [frame]
+        for _ in range(scale - 1):
+            jittered = frame.copy()
+            for column in columns:
+                factor = rng.uniform(0.9, 1.1, len(frame))
+                jittered[column] = (jittered[column] * factor).astype(frame[column].dtype)
+            copies.append(jittered)
+        scaled = pd.concat(copies, ignore_index=True)
+        scaled.to_csv(os.path.join(edges_dir, name), index=False, encoding="utf-8")
+        rows += len(scaled)
+    return nodes_dir, edges_dir, rows
+
+
+def run(scales, repeat=1):
+    base_config = load_config()
+    results = []
+    for scale in scales:
+        with tempfile.TemporaryDirectory(prefix="graph-bench-") as tmp:
+            config = copy.deepcopy(base_config)
+            nodes_dir, edges_dir, rows = write_scaled_inputs(base_config, scale, tmp)
+            config["data"]["raw_nodes_dir"] = nodes_dir
+            config["data"]["raw_edges_dir"] = edges_dir
+            timings = []
+            for _ in range(repeat):
+                builder = GraphBuilder(config)
+                stages = {}
+                t0 = time.perf_counter()
+                nodes_data, edges_data = builder.load_data()
+                stages["load_data"] = time.perf_counter() - t0
+                t1 = time.perf_counter()
+                builder.build_nodes(nodes_data, edges_data["logistics"])
+                stages["build_nodes"] = time.perf_counter() - t1
+                t2 = time.perf_counter()
+                builder.build_edges(edges_data)
+                stages["build_edges"] = time.perf_counter() - t2
+                stages["total"] = time.perf_counter() - t0
+                timings.append(stages)
+            best = min(timings, key=lambda s: s["total"])
+            results.append({
+                "scale": scale,
+                "edge_rows": rows,
+                "nodes": builder.G.number_of_nodes(),
+                "edges": builder.G.number_of_edges(),
+                **{f"{k}_s": round(v, 4) for k, v in best.items()},
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 2, 5, 10])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Write results to this file as JSON")
+    args = parser.parse_args()
+
+    results = run(args.scales, args.repeat)
+    print(f"{'scale':>6} {'rows':>9} {'edges':>7} {'load':>8} {'nodes':>8} {'edges':>8} {'total':>8}")
+    for r in results:
+        print(f"{r['scale']:>6} {r['edge_rows']:>9} {r['edges']:>7} {r['load_data_s']:>8.3f} "
+              f"{r['build_nodes_s']:>8.3f} {r['build_edges_s']:>8.3f} {r['total_s']:>8.3f}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
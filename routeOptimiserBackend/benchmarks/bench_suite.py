@@ -0,0 +1,182 @@
+# benchmarks/bench_suite.py
+"""
+End-to-end benchmark on synthetic networks, with stored baselines.
+
+For every scale a network is generated with ``benchmarks.synthetic``, the
+base graph and its indexes are built from it (``GraphBuilder.build_base``),
+and the fixed query corpus is answered once per optimisation preset through
+``main.compute_routes``. Each scale runs in a fresh process, so peak memory
+(max RSS) is that scale's alone. Contraction hierarchies are off unless
+``--ch`` is given, so every preset exercises MOA* (and the hierarchy build,
+which grows much faster than the graph, does not dominate large scales).
+
+Reported per scale: graph build time, query latency p50/p95/max per preset,
+labels expanded by the searches and peak RSS. ``--save`` writes the results
+as a JSON baseline; ``--compare`` checks a run against one and exits with
+status 1 when a metric regressed beyond ``--tolerance``.
+
+Run from routeOptimiserBackend/:
+    python -m benchmarks.bench_suite --scales 1 10 100 --save benchmarks/baselines/suite.json
+    python -m benchmarks.bench_suite --scales 1 10 --compare benchmarks/baselines/suite.json
+"""
+import argparse
+import copy
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import query_corpus, write_network
+
+PRESETS = {
+    "time": [1, 0, 0, 0],
+    "cost": [0, 1, 0, 0],
+    "emissions": [0, 0, 1, 0],
+    "logisticsScore": [0.5, 0.0, 0.0, 0.5],
+    "customWeights": [0.4, 0.3, 0.2, 0.1],
+}
+WEIGHT_KG = 800
+MAX_DAYS = 60
+# Metrics where larger is worse, compared against the baseline.
+REGRESSION_METRICS = ("build_s", "p50_ms", "p95_ms", "expanded", "peak_rss_mb")
+
+
+def run_scale(scale, seed, queries, contraction_hierarchies):
+    """Generate, build and query one scale; meant to run in its own process."""
+    import main
+    from src.data_processing.graph_builder import GraphBuilder
+    from src.utils.helpers import load_config
+    from src.utils.metrics import RequestTrace
+
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as tmp:
+        t0 = time.perf_counter()
+        nodes_dir, edges_dir, counts = write_network(tmp, scale, seed)
+        generate_s = time.perf_counter() - t0
+
+        config = copy.deepcopy(load_config())
+        config["data"]["raw_nodes_dir"] = nodes_dir
+        config["data"]["raw_edges_dir"] = edges_dir
+        config["data"]["processed_dir"] = os.path.join(tmp, "processed")
+        config["search"]["contraction_hierarchies"] = contraction_hierarchies
+        config["search"]["hierarchy_build"] = "startup"
+        builder = GraphBuilder(config)
+        t0 = time.perf_counter()
+        builder.build_base()
+        build_s = time.perf_counter() - t0
+
+        presets = {}
+        for preset, weights in PRESETS.items():
+            latencies, expanded = [], 0
+            for start_country, start, end_country, end in queries:
+                trace = RequestTrace()
+                t0 = time.perf_counter()
+                main.compute_routes(builder, start, end, start_country, end_country, weights, MAX_DAYS,
+                                    WEIGHT_KG / 1000, preset, False, "scalar", trace=trace)
+                latencies.append(time.perf_counter() - t0)
+                expanded += trace.search.get("expanded", 0)
+            latencies = np.array(latencies) * 1000
+            presets[preset] = {
+                "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+                "max_ms": round(float(latencies.max()), 2),
+                "expanded": int(expanded),
+            }
+
+        return {
+            "scale": scale,
+            "input_rows": counts,
+            "nodes": len(builder.compiled),
+            "edges": builder.compiled.num_edges,
+            "generate_s": round(generate_s, 3),
+            "build_s": round(build_s, 3),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+            "presets": presets,
+        }
+
+
+def run(scales, seed=42, queries=8, contraction_hierarchies=False):
+    corpus = query_corpus(queries, seed)
+    results = []
+    for scale in scales:
+        # A fresh interpreter per scale keeps max RSS and module-level caches separate.
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            results.append(pool.apply(run_scale, (scale, seed, corpus, contraction_hierarchies)))
+    return {
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "settings": {"seed": seed, "queries": queries, "weight_kg": WEIGHT_KG, "max_days": MAX_DAYS,
+                     "contraction_hierarchies": contraction_hierarchies},
+        "results": results,
+    }
+
+
+def _flatten(result):
+    """{(preset or "", metric): value} for the metrics checked against a baseline."""
+    values = {("", name): result[name] for name in REGRESSION_METRICS if name in result}
+    for preset, metrics in result["presets"].items():
+        values.update({(preset, name): metrics[name] for name in REGRESSION_METRICS if name in metrics})
+    return values
+
+
+def compare(current, baseline, tolerance):
+    """
+    Metrics that grew by more than ``tolerance`` (a fraction) over the baseline.
+
+    Returns:
+        list: ``(scale, preset, metric, baseline, current)`` tuples.
+    """
+    if current["settings"] != baseline["settings"]:
+        raise ValueError(f"Settings differ from the baseline: {current['settings']} vs {baseline['settings']}")
+    baseline_by_scale = {r["scale"]: r for r in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        reference = baseline_by_scale.get(result["scale"])
+        if reference is None:
+            continue
+        old = _flatten(reference)
+        for key, value in _flatten(result).items():
+            if key in old and value > old[key] * (1 + tolerance):
+                regressions.append((result["scale"], key[0], key[1], old[key], value))
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--queries", type=int, default=8, help="Country pairs in the query corpus")
+    parser.add_argument("--ch", action="store_true", help="Build contraction hierarchies and answer presets from them")
+    parser.add_argument("--save", help="Write the results to this baseline file")
+    parser.add_argument("--compare", help="Baseline file to check the results against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative growth per metric")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.seed, args.queries, args.ch)
+    print(f"{'scale':>5} {'nodes':>7} {'edges':>9} {'build s':>8} {'rss MB':>7}  "
+          f"{'preset':<15} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'expanded':>9}")
+    for r in report["results"]:
+        for i, (preset, m) in enumerate(r["presets"].items()):
+            head = (f"{r['scale']:>5} {r['nodes']:>7} {r['edges']:>9} {r['build_s']:>8.2f} {r['peak_rss_mb']:>7.0f}"
+                    if i == 0 else " " * 40)
+            print(f"{head}  {preset:<15} {m['p50_ms']:>8.1f} {m['p95_ms']:>8.1f} {m['max_ms']:>8.1f} {m['expanded']:>9}")
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or ".", exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for scale, preset, metric, old, new in regressions:
+            print(f"REGRESSION scale {scale} {preset or 'build'} {metric}: {old} -> {new}")
+        if regressions:
+            raise SystemExit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main_cli()
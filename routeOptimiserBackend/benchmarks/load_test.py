@@ -0,0 +1,112 @@
+# benchmarks/load_test.py
+"""
+Closed-loop load test against a running server.
+
+``concurrency`` clients each send ``/api/find-routes`` requests back to back.
+Start and end points are jittered by a few tenths of a degree (beyond the
+result cache's rounding), so every request runs a full search. Reports
+throughput, latency percentiles and, for a local gunicorn, the proportional
+set size (PSS) of each worker, which counts pages shared copy-on-write with
+the master only fractionally.
+
+Run from routeOptimiserBackend/ (with the server running, e.g. gunicorn -c gunicorn.conf.py):
+    python -m benchmarks.load_test --concurrency 1 4 8 --requests 80
+"""
+import argparse
+import json
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+QUERIES = [
+    ("United States", (40.7128, -74.0060), "United Kingdom", (51.5074, -0.1278), "time"),
+    ("India", (19.0760, 72.8777), "Germany", (52.52, 13.405), "cost"),
+    ("Singapore", (1.3521, 103.8198), "Japan", (35.6762, 139.6503), "emissions"),
+    ("Australia", (-33.8688, 151.2093), "China", (31.2304, 121.4737), "customWeights"),
+    ("France", (48.8566, 2.3522), "Brazil", (-23.5505, -46.6333), "customWeights"),
+]
+CUSTOM_WEIGHTS = {"time": 0.4, "cost": 0.3, "emissions": 0.2, "logisticsScore": 0.1}
+
+
+def make_request(rng):
+    start_country, start, end_country, end, optimization_type = rng.choice(QUERIES)
+    jitter = lambda: rng.uniform(-0.3, 0.3)
+    return {
+        "startLat": start[0] + jitter(), "startLon": start[1] + jitter(), "initialCountry": start_country,
+        "endLat": end[0] + jitter(), "endLon": end[1] + jitter(), "finalCountry": end_country,
+        "maxDays": 60, "weight": 800, "volume": 5,
+        "optimizationType": optimization_type, "customWeights": CUSTOM_WEIGHTS,
+    }
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request, timeout=300) as response:
+        response.read()
+        ok = response.status == 200
+    return time.perf_counter() - start, ok
+
+
+def worker_pss_mb(server_pid):
+    """PSS of the server's child processes in MB (Linux only; empty if unavailable)."""
+    try:
+        with open(f"/proc/{server_pid}/task/{server_pid}/children", encoding="utf-8") as f:
+            children = [int(pid) for pid in f.read().split()]
+        sizes = []
+        for pid in children:
+            with open(f"/proc/{pid}/smaps_rollup", encoding="utf-8") as f:
+                pss_kb = next(int(line.split()[1]) for line in f if line.startswith("Pss:"))
+            sizes.append(round(pss_kb / 1024, 1))
+        return sizes
+    except (OSError, ValueError, StopIteration):
+        return []
+
+
+def run(url, concurrency, requests, seed=0):
+    rng = random.Random(seed)
+    bodies = [make_request(rng) for _ in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda body: post(url, body), bodies))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([latency for latency, _ in results])
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": sum(not ok for _, ok in results),
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:5001/api/find-routes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--requests", type=int, default=80)
+    parser.add_argument("--server-pid", type=int, help="gunicorn master PID, to report worker PSS")
+    parser.add_argument("--json", help="Write results to this file as JSON")
+    args = parser.parse_args()
+
+    post(args.url, make_request(random.Random(-1)))  # warm-up
+    results = [run(args.url, c, args.requests, seed=i) for i, c in enumerate(args.concurrency)]
+    print(f"{'clients':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'errors':>6}")
+    for r in results:
+        print(f"{r['concurrency']:>7} {r['throughput_rps']:>8.2f} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['errors']:>6}")
+    output = {"results": results}
+    if args.server_pid:
+        output["worker_pss_mb"] = worker_pss_mb(args.server_pid)
+        print(f"worker PSS (MB): {output['worker_pss_mb']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(output, f, indent=2)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,284 @@
+# benchmarks/synthetic.py
+"""
+Seeded generator of synthetic multimodal networks in the raw CSV schemas.
+
+``write_network(target_dir, scale)`` writes ``nodes/`` and ``edges/`` folders
+that ``GraphBuilder`` reads in place of ``data/raw``: seaports, airports,
+ships, flights, seaport-airport road links, trade, logistics, carbon factors
+and trade neighbours. ``scale=1`` is about the size of the bundled data (50
+countries, ~70 seaports, ~120 airports, ~15k edge rows); node counts grow
+linearly with ``scale`` and so do edge rows, since every hub keeps the same
+number of lanes (its nearest hubs plus random long-haul ones).
+
+Country ``i`` is generated from its own seed, so the first countries (and
+with them ``query_corpus``) are identical at every scale.
+
+Run from routeOptimiserBackend/:
+    python -m benchmarks.synthetic --scale 10 --out /tmp/network-10x
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+BASE_COUNTRIES = 50
+SEA_LANES_PER_PORT = 28
+FLIGHTS_PER_AIRPORT = 104
+AIRPORT_LINKS_PER_PORT = 3
+MAX_NEIGHBOUR_KM = 1500
+EARTH_RADIUS_KM = 6371.0
+
+TRADE_COLUMNS = [
+    "Country",
+    "Cost to export: Documentary compliance (USD) ",
+    "Cost to import: Documentary compliance (USD))",
+    "Cost to export: Border compliance (USD)",
+    "Cost to import: Border compliance (USD)",
+]
+CARBON_FACTORS = [("Air Freight", 602), ("Road Freight", 169), ("Sea Freight", 15)]
+SEA_ROUTES = ["DIRECT", "SUEZ CANAL", "PANAMA CANAL", "CAPE OF GOOD HOPE"]
+
+
+def country_name(i):
+    return f"Country {i:04d}"
+
+
+def iata_code(i):
+    """Unique upper-case code per airport: three letters, four once those run out."""
+    letters = []
+    width = 3 if i < 26 ** 3 else 4
+    for _ in range(width):
+        i, r = divmod(i, 26)
+        letters.append(chr(ord("A") + r))
+    return "".join(reversed(letters))
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance, broadcasting over NumPy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _countries(count, seed):
+    """Per-country centre, hub counts and trade/logistics figures, each from its own seed."""
+    rows = []
+    for i in range(count):
+        rng = np.random.default_rng([seed, 0, i])
+        rows.append({
+            "country": country_name(i),
+            # Uniform on the sphere between ~55S and ~70N
+            "lat": float(np.degrees(np.arcsin(rng.uniform(-0.82, 0.94)))),
+            "lon": float(rng.uniform(-180, 180)),
+            "seaports": int(rng.poisson(0.4)) + 1,
+            "airports": int(rng.poisson(1.1)) + 1,
+            "doc_export": int(rng.integers(0, 400)),
+            "doc_import": int(rng.integers(0, 400)),
+            "border_export": int(rng.integers(0, 1000)),
+            "border_import": int(rng.integers(0, 1200)),
+            "customs_score": round(float(rng.uniform(1.8, 4.2)), 2),
+            "dwell_days": int(rng.integers(2, 21)),
+            "turnaround_days": round(float(rng.uniform(0.5, 3.5)), 1),
+            "rng": rng,
+        })
+    return rows
+
+
+def _hubs(countries):
+    """Seaport and airport tables; about a third of ports share a city with an airport."""
+    seaports, airports = [], []
+    for c in countries:
+        rng = c["rng"]
+        cities = []
+        for j in range(max(c["seaports"], c["airports"]) + 1):
+            offset = rng.normal(0, 2.5, 2)
+            cities.append((f"{c['country']} City {j}",
+                           float(np.clip(c["lat"] + offset[0], -89, 89)),
+                           float((c["lon"] + offset[1] + 180) % 360 - 180)))
+        shared = rng.random(c["seaports"]) < 0.35
+        for j in range(c["seaports"]):
+            city = cities[j] if shared[j] else cities[-1 - j]
+            seaports.append({"Country": c["country"], "City": city[0], "Latitude": city[1], "Longitude": city[2]})
+        for j in range(c["airports"]):
+            city = cities[j]
+            airports.append({"Country": c["country"], "IATA": None, "Latitude": city[1], "Longitude": city[2],
+                             "City": city[0]})
+    for i, airport in enumerate(airports):
+        airport["IATA"] = iata_code(i)
+    seaports = pd.DataFrame(seaports).drop_duplicates(["Country", "City"], ignore_index=True)
+    return seaports, pd.DataFrame(airports, columns=["Country", "IATA", "Latitude", "Longitude", "City"])
+
+
+def _lanes(lats, lons, countries, per_node, rng, other_country_only=False):
+    """(from, to, distance) for each node's nearest ``per_node // 2`` peers plus random ones."""
+    n = len(lats)
+    per_node = min(per_node, n - 1)
+    near = per_node // 2
+    sources, targets, distances = [], [], []
+    for i in range(n):
+        dist = haversine_km(lats[i], lons[i], lats, lons)
+        dist[i] = np.inf
+        if other_country_only:
+            dist[countries == countries[i]] = np.inf
+        candidates = np.flatnonzero(np.isfinite(dist))
+        if not len(candidates):
+            continue
+        nearest = candidates[np.argsort(dist[candidates], kind="stable")[:near]]
+        rest = np.setdiff1d(candidates, nearest)
+        extra = rng.choice(rest, size=min(per_node - len(nearest), len(rest)), replace=False)
+        chosen = np.concatenate([nearest, extra]).astype(int)
+        sources.append(np.full(len(chosen), i))
+        targets.append(chosen)
+        distances.append(dist[chosen])
+    return np.concatenate(sources), np.concatenate(targets), np.concatenate(distances)
+
+
+def _format_days_hours(hours):
+    days, rem = divmod(int(round(hours)), 24)
+    return f"{days} days {rem:02d} hours"
+
+
+def _format_hours_minutes(hours):
+    total = int(round(hours * 60))
+    return f"{total // 60}h {total % 60}min"
+
+
+def _ships(seaports, rng):
+    src, dst, dist = _lanes(seaports["Latitude"].to_numpy(), seaports["Longitude"].to_numpy(),
+                            seaports["Country"].to_numpy(), SEA_LANES_PER_PORT, rng, other_country_only=True)
+    sea_km = np.round(dist * rng.uniform(1.15, 1.6, len(dist))).astype(int)
+    hours = sea_km / rng.uniform(22, 32, len(dist))
+    per_container = 400 + sea_km * rng.uniform(0.35, 0.55, len(dist))
+    return pd.DataFrame({
+        "Country_A": seaports["Country"].to_numpy()[src],
+        "Port_A": seaports["City"].to_numpy()[src],
+        "Country_B": seaports["Country"].to_numpy()[dst],
+        "Port_B": seaports["City"].to_numpy()[dst],
+        "Distance": sea_km,
+        "Route": rng.choice(SEA_ROUTES, len(dist)),
+        "Time": [_format_days_hours(h) for h in hours],
+        "Price_Per_Container": per_container,
+        "Price_Per_kg": per_container / 30000,
+    })
+
+
+def _flights(airports, rng):
+    lats, lons = airports["Latitude"].to_numpy(), airports["Longitude"].to_numpy()
+    src, dst, dist = _lanes(lats, lons, airports["Country"].to_numpy(), FLIGHTS_PER_AIRPORT, rng)
+    return pd.DataFrame({
+        "From_IATA": airports["IATA"].to_numpy()[src],
+        "To_IATA": airports["IATA"].to_numpy()[dst],
+        "Flight_Time_Minutes": np.round(30 + dist / 800 * 60 * rng.uniform(0.95, 1.15, len(dist))).astype(int),
+        "Distance_km": dist,
+        "From_Country": airports["Country"].to_numpy()[src],
+        "From_Latitude": lats[src],
+        "From_Longitude": lons[src],
+        "To_Country": airports["Country"].to_numpy()[dst],
+        "To_Latitude": lats[dst],
+        "To_Longitude": lons[dst],
+        "Cost_Per_Kg": (0.2 + dist * 0.0005) * rng.uniform(0.8, 1.25, len(dist)),
+    })
+
+
+def _seaport_airport_connect(seaports, airports):
+    """Road links from each port to the nearest airports of its own country."""
+    by_country = {country: frame for country, frame in airports.groupby("Country", sort=False)}
+    rows = []
+    for port in seaports.itertuples(index=False):
+        local = by_country.get(port.Country)
+        if local is None:
+            continue
+        dist = haversine_km(port.Latitude, port.Longitude, local["Latitude"].to_numpy(), local["Longitude"].to_numpy())
+        for k in np.argsort(dist, kind="stable")[:AIRPORT_LINKS_PER_PORT]:
+            road_km = float(dist[k]) * 1.3
+            rows.append({"Port_City": port.City, "Port_Country": port.Country, "City": local["City"].iloc[k],
+                         "Distance": round(road_km, 2), "Time": _format_hours_minutes(road_km / 60 + 0.25),
+                         "Cost_USD": int(round(road_km * 0.39))})
+    return pd.DataFrame(rows, columns=["Port_City", "Port_Country", "City", "Distance", "Time", "Cost_USD"])
+
+
+def _trade_neighbours(countries):
+    lats = np.array([c["lat"] for c in countries])
+    lons = np.array([c["lon"] for c in countries])
+    rows = []
+    for i, c in enumerate(countries):
+        dist = haversine_km(c["lat"], c["lon"], lats, lons)
+        dist[i] = np.inf
+        near = [countries[j]["country"] for j in np.argsort(dist, kind="stable")[:3] if dist[j] <= MAX_NEIGHBOUR_KM]
+        rows.append({"Country": c["country"], "Trade_Neighbors_Country": "; ".join(near) if near else "None"})
+    return pd.DataFrame(rows)
+
+
+def write_network(target_dir, scale=1, seed=42):
+    """
+    Write a synthetic network ``scale`` times the size of the bundled data.
+
+    Args:
+        target_dir (str): Folder to create ``nodes/`` and ``edges/`` in.
+        scale (int): Size multiplier; the network has ``50 * scale`` countries.
+        seed (int): Seed for every random choice.
+
+    Returns:
+        tuple: ``(nodes_dir, edges_dir, counts)`` where ``counts`` maps each
+        written CSV to its row count.
+    """
+    rng = np.random.default_rng([seed, 1])
+    countries = _countries(BASE_COUNTRIES * scale, seed)
+    seaports, airports = _hubs(countries)
+    tables = {
+        ("nodes", "seaports.csv"): seaports,
+        ("nodes", "airports.csv"): airports,
+        ("edges", "ships.csv"): _ships(seaports, rng),
+        ("edges", "flights.csv"): _flights(airports, rng),
+        ("edges", "seaport_airport_connect.csv"): _seaport_airport_connect(seaports, airports),
+        ("edges", "trade.csv"): pd.DataFrame(
+            [(c["country"], c["doc_export"], c["doc_import"], c["border_export"], c["border_import"]) for c in countries],
+            columns=TRADE_COLUMNS),
+        ("edges", "logistics.csv"): pd.DataFrame(
+            [(c["country"], c["customs_score"], c["dwell_days"], c["turnaround_days"]) for c in countries],
+            columns=["Country", "Customs Score", "Mean Port Dwell Time (days)", "Mean Turnaround Time at Port (days)"]),
+        ("edges", "carbon_emission.csv"): pd.DataFrame(CARBON_FACTORS,
+                                                       columns=["Mode of Transport", "Emission Factor (g CO₂/tonne-km)"]),
+        ("edges", "trade_neighbour.csv"): _trade_neighbours(countries),
+    }
+    counts = {}
+    for (folder, name), frame in tables.items():
+        os.makedirs(os.path.join(target_dir, folder), exist_ok=True)
+        frame.to_csv(os.path.join(target_dir, folder, name), index=False, encoding="utf-8")
+        counts[name] = len(frame)
+    return os.path.join(target_dir, "nodes"), os.path.join(target_dir, "edges"), counts
+
+
+def query_corpus(count=8, seed=42):
+    """
+    Fixed (start_country, start, end_country, end) queries between the first
+    ``BASE_COUNTRIES`` countries, which exist unchanged at every scale.
+    """
+    countries = _countries(BASE_COUNTRIES, seed)
+    rng = np.random.default_rng([seed, 2])
+    queries = []
+    while len(queries) < count:
+        a, b = rng.choice(BASE_COUNTRIES, size=2, replace=False)
+        start, end = countries[a], countries[b]
+        if haversine_km(start["lat"], start["lon"], end["lat"], end["lon"]) < 2000:
+            continue  # keep the corpus to cross-border, long-haul trips
+        queries.append((start["country"], (round(start["lat"], 4), round(start["lon"], 4)),
+                        end["country"], (round(end["lat"], 4), round(end["lon"], 4))))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", required=True, help="Folder to write nodes/ and edges/ into")
+    args = parser.parse_args()
+
+    _, _, counts = write_network(args.out, args.scale, args.seed)
+    for name, rows in counts.items():
+        print(f"{name:<30} {rows:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,285 @@
-from flask import Flask, request, jsonify
+from flask import Blueprint, Flask, Response, request, jsonify
 from flask_cors import CORS
 from src.data_processing.graph_builder import GraphBuilder
 from src.optimization.moa_star import MOAStar
+from src.optimization.corridor import Corridor
 from src.optimization.route_constructor import RouteConstructor
-from src.utils.validators import validate_inputs
-from src.utils.helpers import load_config
+from src.utils.validators import validate_inputs, validate_weights
+from src.utils.cache import TTLCache
+from src.utils.budget import Budget
+from src.utils.helpers import configure_logging, load_config, quantize
+from src.utils.metrics import MetricsRegistry, RequestTrace, RoutingMetrics
+from src.utils.profiling import RequestProfiler
+import gc
 import logging
-import pandas as pd
-from pathlib import Path
+import threading
+import time
+import uuid
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
-app = Flask(__name__)
-CORS(app)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
-)
+api = Blueprint("api", __name__)
+
 logger = logging.getLogger(__name__)
 
-@app.route('/api/find-routes', methods=['POST'])
+_graph_builder = None
+_graph_builder_lock = threading.Lock()
+app_config = load_config()
+cache_config = app_config.get("cache", {})
+# Candidate sets of recent /api/find-routes results, for /api/reweight-routes.
+result_handles = TTLCache(**cache_config.get("result_handles", {}))
+# Full responses keyed on normalized query inputs (see result_cache_key).
+result_cache = TTLCache(**{k: v for k, v in cache_config.get("results", {}).items()
+                           if k in ("max_entries", "ttl_seconds")})
+# Budgets of in-flight requests by X-Request-Id, so /api/cancel-request can stop them.
+active_budgets = {}
+active_budgets_lock = threading.Lock()
+# Per-stage timings and search work counters, served on /metrics. Under a multi-worker
+# server ROUTE_METRICS_DIR (set by gunicorn.conf.py) lets /metrics sum all workers.
+metrics_config = app_config.get("metrics", {})
+metrics_registry = MetricsRegistry(multiprocess_dir=os.getenv("ROUTE_METRICS_DIR"),
+                                   flush_interval=metrics_config.get("flush_interval_seconds", 1.0))
+routing_metrics = RoutingMetrics(metrics_registry)
+
+
+def get_graph_builder():
+    """Return the process-wide GraphBuilder, building the base graph on first use."""
+    global _graph_builder
+    if _graph_builder is None:
+        with _graph_builder_lock:
+            if _graph_builder is None:
+                builder = GraphBuilder(load_config())
+                logger.info("Starting base graph construction...")
+                start = time.perf_counter()
+                builder.build_base()
+                routing_metrics.graph_build_seconds.set(time.perf_counter() - start)
+                logger.info("Base graph construction completed.")
+                _graph_builder = builder
+    return _graph_builder
+
+def format_routes(ranked_routes):
+    """Response entries for ranked ``(score, path, modes, metrics, cost_breakdown, time_breakdown)`` tuples."""
+    routes_response = []
+    for i, (score, path, modes, metrics, cost_breakdown, time_breakdown) in enumerate(ranked_routes[:10], 1):
+        time_days = metrics["time"] / 24
+        route_data = {
+            "rank": i,
+            "score": round(score, 2),
+            "time_days": round(time_days, 2),
+            "cost": round(metrics["cost"], 2),
+            "emissions": round(metrics["emissions"] / 1000, 2),
+            "path": path,
+            "modes": modes,
+            "cost_breakdown": {k: round(v, 2) for k, v in cost_breakdown.items()},
+            "time_breakdown": {k: round(v / 24, 2) for k, v in time_breakdown.items()}
+        }
+        routes_response.append(route_data)
+    return routes_response
+
+def request_budget_ms(data, default_ms):
+    """
+    Compute budget for a request: ``computeBudgetMs`` in the body or the
+    ``X-Compute-Budget-Ms`` header, never above the configured default.
+    """
+    requested = data.get("computeBudgetMs") or request.headers.get("X-Compute-Budget-Ms")
+    if requested in (None, ""):
+        return default_ms
+    requested = float(requested)
+    if requested <= 0:
+        raise ValueError("Compute budget must be positive")
+    return requested if default_ms is None else min(requested, default_ms)
+
+def request_profiler(data, request_id):
+    """
+    A ``RequestProfiler`` when ``profiling.enabled`` is set and the request asks
+    for one (``"profile": true`` or ``X-Profile: 1``), else None. With
+    ``profiling.token`` configured the request must also send it as ``X-Profile-Token``.
+    """
+    settings = app_config.get("profiling", {})
+    if not settings.get("enabled", False):
+        return None
+    if not (data.get("profile") or request.headers.get("X-Profile", "").lower() in ("1", "true")):
+        return None
+    token = settings.get("token")
+    if token and request.headers.get("X-Profile-Token") != token:
+        logger.warning("Profiling requested without a valid X-Profile-Token; running unprofiled.")
+        return None
+    return RequestProfiler(request_id or uuid.uuid4().hex, settings.get("output_dir", "logs/profiles"),
+                           interval=settings.get("sample_interval_ms", 2) / 1000,
+                           trace_allocations=settings.get("trace_allocations", True),
+                           tracemalloc_frames=settings.get("tracemalloc_frames", 1),
+                           top_allocations=settings.get("top_allocations", 20))
+
+def search_trace_requested(data):
+    """
+    Whether the request asks for its structured search trace (``"traceSearch": true``
+    or ``X-Search-Trace: 1``) and ``metrics.search_trace`` allows it.
+    """
+    if not metrics_config.get("search_trace", True):
+        return False
+    return bool(data.get("traceSearch")) or request.headers.get("X-Search-Trace", "").lower() in ("1", "true")
+
+def result_cache_key(start_coords, end_coords, start_country, end_country, preset, weights, max_days,
+                     weight_kg, volume, strategy):
+    """
+    Normalized cache key for a route query.
+
+    Coordinates, max days, weight and volume are quantized with the steps in
+    ``cache.results`` so near-identical shipments share one entry. Entries
+    hold only the hub-to-hub core routes; ``compute_routes`` rebuilds the
+    first/last-mile legs and the ranking for each request's exact inputs.
+    """
+    steps = cache_config.get("results", {})
+    coord_step = steps.get("coord_precision_deg", 0.01)
+    return (
+        tuple(quantize(c, coord_step) for c in start_coords + end_coords),
+        start_country.lower(), end_country.lower(),
+        preset, tuple(round(float(w), 6) for w in weights),
+        quantize(max_days, steps.get("max_days_step", 1)),
+        quantize(weight_kg, steps.get("weight_step_kg", 1)),
+        quantize(volume, steps.get("volume_step_m3", 0.1)),
+        strategy,
+    )
+
+def compute_routes(builder, start_coords, end_coords, start_country, end_country, weights,
+                   max_days, weight, optimization_type, heavy_load, strategy, budget=None, trace=None,
+                   cache_key=None):
+    """
+    Run the search for one query, timing each stage and collecting search
+    counters (and, when the trace records them, search events) into ``trace``.
+
+    With ``cache_key`` the hub-to-hub core routes are shared through
+    ``result_cache``; the custom start/end nodes, their road legs and the
+    ranking are always built for this request's own points and loads.
+
+    Returns:
+        tuple: ``(routes_response, candidates, partial_reason, cache_status)``;
+        the reason is None unless ``budget`` ran out and the routes are the
+        best found so far. The status is ``"hit"``, ``"miss"``, ``"coalesced"``
+        or ``"bypass"`` without a ``cache_key``.
+    """
+    trace = trace or RequestTrace()
+
+    # Attach the request's start/end points to the shared base graph
+    overlay = builder.add_dynamic_road(start_coords, end_coords, start_country, end_country)
+    G = builder.compile_request_graph(overlay)
+    trace.lap("overlay")
+
+    search = lambda: search_core_routes(builder, G, start_coords, end_coords, start_country, end_country,
+                                        weights, max_days, weight, optimization_type, heavy_load, strategy,
+                                        budget, trace)
+    if cache_key is None:
+        (core_routes, partial), cache_status = search(), "bypass"
+    else:
+        # Core paths through a custom node carry that request's own road legs, so they are not shared.
+        custom_nodes = set(G.node_ids[G.num_base_nodes:])
+        # Waiters only reuse complete results and stop waiting when their own budget runs out.
+        (core_routes, partial), cache_status = result_cache.get_or_compute(
+            cache_key, search, cacheable=lambda result: result[1] is None and not any(
+                node in custom_nodes for path, _ in result[0] for node in path),
+            abandon=budget.spent if budget is not None else None)
+    trace.lap("cache")
+
+    # Construct and rank routes, building only candidates that can reach the top 10
+    logger.info("Constructing and ranking top routes...")
+    constructor = RouteConstructor(G, builder.config, road_legs=builder.road_legs, landmarks=builder.landmarks)
+    candidates = constructor.candidates(core_routes, start_coords, end_coords, weight * 1000, max_days)
+    ranked_routes = candidates.top_k(weights, k=10, budget=budget)
+    trace.lap("construction")
+    trace.event("ranked", core_routes=len(core_routes), candidates=len(candidates.routes), returned=len(ranked_routes))
+    routes = format_routes(ranked_routes)
+    trace.lap("serialization")
+    return routes, candidates, partial, cache_status
+
+def search_core_routes(builder, G, start_coords, end_coords, start_country, end_country, weights,
+                       max_days, weight, optimization_type, heavy_load, strategy, budget=None, trace=None):
+    """
+    Hub-to-hub core routes of one query on its request graph ``G``.
+
+    Returns:
+        tuple: ``(core_routes, partial_reason)``; ``core_routes`` is a list of
+        ``(path, metrics)`` from a start-side hub to an end-side hub.
+    """
+    config = builder.config
+    trace = trace or RequestTrace()
+
+    # Candidate hubs: each country plus its trade neighbours, capped per routing.candidate_hubs
+    # First/last-mile road hours count against max_days, so the searches see them too.
+    initial_nodes, first_mile = builder.select_hubs(start_coords, start_country, "to_hub")
+    final_nodes, last_mile = builder.select_hubs(end_coords, end_country, "from_hub")
+    trace.lap("hub_selection")
+    logger.info("Initial nodes: %d, Final nodes: %d", len(initial_nodes), len(final_nodes))
+    trace.event("hubs", initial=initial_nodes, final=final_nodes)
+
+    # Find core routes: one pass covers every (initial, final) hub pair
+    search_config = config.get("search", {})
+    router = builder.preset_router
+    preset = None if heavy_load else optimization_type
+    if strategy != "pareto" and router is not None and router.supports(preset):
+        # Fixed, weight-invariant preset: answer from the contraction hierarchy and
+        # re-search only the pairs whose optimal route misses the deadline.
+        best_routes, late = router.route(G, preset, initial_nodes, final_nodes, weight * 1000, max_days,
+                                         first_mile, last_mile)
+        trace.event("hierarchy_routes", preset=preset, routes=len(best_routes), late=len(late))
+        if late:
+            late_sources = list(dict.fromkeys(source for source, _ in late))
+            moa = MOAStar(G, landmarks=builder.landmarks, budget=budget, trace=trace)
+            fallback = moa.moa_star_multi(late_sources, final_nodes, weights, weight * 1000, max_days,
+                                          first_mile=first_mile, last_mile=last_mile)
+            trace.add_search(moa.stats)
+            best_routes.update({pair: fallback[pair] for pair in late if pair in fallback})
+        core_routes = [best_routes[(start, goal)] for start in initial_nodes for goal in final_nodes
+                       if (start, goal) in best_routes]
+    else:
+        # Optionally keep the search inside a corridor around the great-circle path,
+        # widening it (and finally dropping it) while too few routes come back.
+        corridor = Corridor.from_config(G, start_coords, end_coords,
+                                        [G.index[n] for n in initial_nodes + final_nodes],
+                                        search_config.get("corridor"))
+        while True:
+            moa = MOAStar(G, landmarks=builder.landmarks, corridor=corridor.mask if corridor else None,
+                          budget=budget, trace=trace)
+            if strategy == "pareto":
+                # Weight-independent frontier; rank_routes applies the preset below.
+                frontier = moa.pareto_search(initial_nodes, final_nodes, weight * 1000, max_days,
+                                             epsilon=search_config.get("pareto_epsilon", 0.0),
+                                             max_labels_per_node=search_config.get("max_labels_per_node"),
+                                             first_mile=first_mile, last_mile=last_mile)
+                core_routes = [route for start in initial_nodes for goal in final_nodes
+                               for route in frontier.get((start, goal), [])]
+            else:
+                best_routes = moa.moa_star_multi(initial_nodes, final_nodes, weights, weight * 1000, max_days,
+                                                 first_mile=first_mile, last_mile=last_mile)
+                core_routes = [best_routes[(start, goal)] for start in initial_nodes for goal in final_nodes
+                               if (start, goal) in best_routes]
+            trace.add_search(moa.stats)
+            if corridor is None or len(core_routes) >= corridor.min_routes or (budget and budget.exhausted):
+                break
+            corridor = corridor.widen()
+            trace.event("corridor_widened", routes=len(core_routes),
+                        detour_factor=corridor.detour_factor if corridor else None)
+    if not core_routes and budget is not None and budget.exhausted and budget.reason == "timeout" and router is not None:
+        # Out of time before any route settled: fall back to the hierarchy of the closest preset.
+        fallback_preset = router.nearest_preset(weights)
+        logger.warning("Budget spent without routes; answering from the '%s' hierarchy.", fallback_preset)
+        trace.event("hierarchy_fallback", preset=fallback_preset)
+        best_routes, _ = router.route(G, fallback_preset, initial_nodes, final_nodes, weight * 1000, max_days,
+                                      first_mile, last_mile)
+        core_routes = [best_routes[(start, goal)] for start in initial_nodes for goal in final_nodes
+                       if (start, goal) in best_routes]
+    logger.info("Found %d core routes.", len(core_routes))
+    trace.lap("search")
+    return core_routes, budget.reason if budget else None
+
+@api.route('/api/find-routes', methods=['POST'])
 def find_routes():
+    trace = RequestTrace()
+    cache_status = ""
+    profiler = None
     try:
         data = request.get_json()
-        logger.info(f"Received request with data: {data}")
+        logger.debug("Received request with data: %s", data)
 
         # Extract and validate data
         start_lat = float(data['startLat'])
@@ -44,15 +297,9 @@ def find_routes():
         start_coords = (start_lat, start_lon)
         end_coords = (end_lat, end_lon)
 
-        # Load configuration and build graph
-        config = load_config()
-        builder = GraphBuilder(config)
-        logger.info("Starting graph construction...")
-        G = builder.build(start_coords, end_coords, start_country, end_country)
-        logger.info("Graph construction completed.")
-
         # Determine optimization weights
-        if weight > 10 or volume > 400:
+        heavy_load = weight > 10 or volume > 400
+        if heavy_load:
             weights = [0.1, 0.9, 0, 0]  # Heavy load
         elif optimization_type == "time":
             weights = [1, 0, 0, 0]
@@ -74,84 +321,153 @@ def find_routes():
         logger.info("Validating inputs...")
         validate_inputs(start_coords, end_coords, max_days, weights, weight, volume)
         logger.info("Inputs validated successfully.")
+        trace.lap("validation")
+        request_id = request.headers.get("X-Request-Id") or data.get("requestId")
+        profiler = request_profiler(data, request_id)
+        if profiler is not None:
+            profiler.start()
+        if search_trace_requested(data):
+            trace.start_events()
+
+        builder = get_graph_builder()
+        trace.lap("graph_load")
+        search_config = builder.config.get("search", {})
+        strategy = data.get("searchStrategy") or search_config.get("strategy", "scalar")
+        # Entries computed against an older graph snapshot are dropped here.
+        result_cache.set_version(builder.source_hash)
+        key = result_cache_key(start_coords, end_coords, start_country, end_country,
+                               None if heavy_load else optimization_type, weights,
+                               max_days, weight * 1000, volume, strategy)
+        budget = Budget.from_ms(request_budget_ms(data, search_config.get("compute_budget_ms")))
+        if request_id:
+            with active_budgets_lock:
+                active_budgets[request_id] = budget
+        try:
+            # Profiled and traced requests bypass the cache so they always cover a full search.
+            routes, candidates, partial, cache_status = compute_routes(
+                builder, start_coords, end_coords, start_country, end_country, weights, max_days, weight,
+                optimization_type, heavy_load, strategy, budget, trace,
+                cache_key=key if profiler is None and trace.events is None else None)
+        finally:
+            if request_id:
+                with active_budgets_lock:
+                    active_budgets.pop(request_id, None)
+        # Re-weighting needs only the scored candidates, not the request graph behind them.
+        result_id = result_handles.add(candidates.table())
+
+        logger.info("Routes computed successfully (cache %s%s).", cache_status, f", partial: {partial}" if partial else "")
+        response = {"status": "success", "resultId": result_id, "cache": cache_status, "routes": routes}
+        if partial:
+            response.update(partial=True, partialReason=partial)
+        if profiler is not None:
+            response["profile"] = profiler.stop(trace)
+        if data.get("includeMetrics") or metrics_config.get("include_summary", False):
+            response["metrics"] = trace.summary()
+        if trace.events is not None:
+            response["trace"] = trace.event_log()
+        body = jsonify(response)
+        trace.lap("serialization")
+        routing_metrics.record(trace, "find-routes", "partial" if partial else "success", cache_status)
+        return body, 200
+
+    except Exception as e:
+        logger.error("Error processing request: %s", e)
+        if profiler is not None and profiler.active:
+            profiler.stop(trace)
+        routing_metrics.record(trace, "find-routes", "error", cache_status)
+        return jsonify({"status": "error", "message": str(e)}), 500
+
+@api.route('/api/cancel-request', methods=['POST'])
+def cancel_request():
+    """Stop the work of an in-flight ``/api/find-routes`` call identified by its ``X-Request-Id``."""
+    data = request.get_json(silent=True) or {}
+    request_id = data.get("requestId") or request.headers.get("X-Request-Id")
+    with active_budgets_lock:
+        budget = active_budgets.get(request_id)
+    if budget is None:
+        return jsonify({"status": "error", "message": "No such request in progress"}), 404
+    budget.cancel()
+    logger.info("Cancelled request %s.", request_id)
+    return jsonify({"status": "success", "requestId": request_id}), 200
 
-        # Initialize components
-        moa = MOAStar(G)
-        constructor = RouteConstructor(G, config)
-        logger.info("Loading trade neighbors CSV...")
-        trade_df = pd.read_csv(Path(__file__).parent / "data" / "raw" / "edges" / "trade_neighbour.csv", encoding="utf-8")
-        logger.info("Trade neighbors CSV loaded successfully.")
-
-        # Get neighboring countries with safety checks
-        neighbors_series_start = trade_df.loc[
-            trade_df["Country"].str.lower() == start_country.lower(), "Trade_Neighbors_Country"
-        ]
-        neighbors_start = (
-            [nbr.strip() for nbr in neighbors_series_start.values[0].split(";")]
-            if not neighbors_series_start.empty and isinstance(neighbors_series_start.values[0], str) and neighbors_series_start.values[0].strip().lower() != "none"
-            else []
-        )
-        countries_to_include_start = [start_country] + neighbors_start
-
-        neighbors_series_end = trade_df.loc[
-            trade_df["Country"].str.lower() == end_country.lower(), "Trade_Neighbors_Country"
-        ]
-        neighbors_end = (
-            [nbr.strip() for nbr in neighbors_series_end.values[0].split(";")]
-            if not neighbors_series_end.empty and isinstance(neighbors_series_end.values[0], str) and neighbors_series_end.values[0].strip().lower() != "none"
-            else []
-        )
-        countries_to_include_end = [end_country] + neighbors_end
-
-        # Identify nodes
-        initial_nodes = [
-            n for n in G.nodes()
-            if any(n.startswith(f"{country}_") for country in countries_to_include_start)
-        ]
-        final_nodes = [
-            n for n in G.nodes()
-            if any(n.startswith(f"{country}_") for country in countries_to_include_end)
-        ]
-        logger.info(f"Initial nodes: {len(initial_nodes)}, Final nodes: {len(final_nodes)}")
-
-        # Find core routes
-        core_routes = []
-        for start in initial_nodes:
-            for goal in final_nodes:
-                path, metrics = moa.moa_star(start, goal, weights, weight * 1000, max_days)
-                if path:
-                    core_routes.append((path, metrics))
-        logger.info(f"Found {len(core_routes)} core routes.")
-
-        # Construct and rank routes
-        logger.info("Constructing full routes...")
-        full_routes = constructor.construct_full_routes(core_routes, start_coords, end_coords, weight * 1000, max_days)
-        logger.info("Ranking routes...")
-        ranked_routes = constructor.rank_routes(full_routes, weights)
-
-        # Format response
-        routes_response = []
-        for i, (score, path, modes, metrics, cost_breakdown, time_breakdown) in enumerate(ranked_routes[:10], 1):
-            time_days = metrics["time"] / 24
-            route_data = {
-                "rank": i,
-                "score": round(score, 2),
-                "time_days": round(time_days, 2),
-                "cost": round(metrics["cost"], 2),
-                "emissions": round(metrics["emissions"] / 1000, 2),
-                "path": path,
-                "modes": modes,
-                "cost_breakdown": {k: round(v, 2) for k, v in cost_breakdown.items()},
-                "time_breakdown": {k: round(v / 24, 2) for k, v in time_breakdown.items()}
-            }
-            routes_response.append(route_data)
-
-        logger.info("Routes computed successfully.")
-        return jsonify({"status": "success", "routes": routes_response}), 200
+@api.route('/api/reweight-routes', methods=['POST'])
+def reweight_routes():
+    """
+    Re-rank the candidates of an earlier ``/api/find-routes`` result under new weights.
 
+    Body: ``{"resultId": ..., "weights": w}`` where ``w`` is one weight vector
+    (``[time, cost, emissions, customs]`` or a ``customWeights``-style dict)
+    or a list of them. No search is rerun; candidates are re-scored in one
+    vectorized pass.
+    """
+    trace = RequestTrace()
+    try:
+        data = request.get_json()
+        table = result_handles.get(data.get("resultId"))
+        if table is None:
+            routing_metrics.record(trace, "reweight-routes", "not_found")
+            return jsonify({"status": "error", "message": "Unknown or expired resultId"}), 404
+
+        weights = data.get("weights")
+        single = isinstance(weights, dict) or (isinstance(weights, list) and len(weights) > 0
+                                                and not isinstance(weights[0], (list, dict)))
+        weight_vectors = [validate_weights(w) for w in ([weights] if single else weights or [])]
+        if not weight_vectors:
+            raise ValueError("At least one weight vector is required")
+
+        results = [{"weights": w, "routes": format_routes(ranked)}
+                   for w, ranked in zip(weight_vectors, table.rank_many(weight_vectors, k=10))]
+        trace.lap("ranking")
+        routing_metrics.record(trace, "reweight-routes", "success")
+        return jsonify({"status": "success", "resultId": data["resultId"], "results": results}), 200
+
+    except ValueError as e:
+        routing_metrics.record(trace, "reweight-routes", "invalid")
+        return jsonify({"status": "error", "message": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error processing request: {str(e)}")
+        logger.error("Error re-weighting routes: %s", e)
+        routing_metrics.record(trace, "reweight-routes", "error")
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@api.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Hit/miss/eviction counters of the result cache, the re-weighting handles and the road leg cache."""
+    road_legs = _graph_builder.road_legs.stats() if _graph_builder is not None else None
+    return jsonify({"results": result_cache.stats(), "result_handles": result_handles.stats(),
+                    "road_legs": road_legs}), 200
+
+@api.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text exposition of request, stage and search metrics (all workers)."""
+    return Response(metrics_registry.render(), mimetype="text/plain; version=0.0.4")
+
+def create_app(preload=False):
+    """
+    Application factory.
+
+    Args:
+        preload (bool): Build the base graph and its indexes before returning.
+            Under a pre-forking server (``gunicorn.conf.py`` sets ``preload_app``)
+            this happens once in the master, and every worker shares the
+            read-only graph pages copy-on-write instead of building its own.
+    """
+    configure_logging()
+    app = Flask(__name__)
+    CORS(app)
+    app.register_blueprint(api)
+    if preload:
+        get_graph_builder()
+        # Take the long-lived graph objects out of the collector's generations so
+        # GC passes in the workers do not write to (and thereby copy) their pages.
+        # Refcount updates still copy some of them: measured over 200 requests, a
+        # worker copies about 10 MB of the master's pages with this and 30 MB without
+        # it (see gunicorn.conf.py).
+        gc.collect()
+        gc.freeze()
+    return app
+
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=5001)
\ No newline at end of file
+    # Development server only; it listens on localhost and enables the debugger
+    # only when FLASK_DEBUG=1. Serve production traffic with gunicorn.conf.py.
+    debug = os.getenv("FLASK_DEBUG", "").lower() in ("1", "true")
+    create_app(preload=True).run(debug=debug, host=os.getenv("HOST", "127.0.0.1"), port=int(os.getenv("PORT", 5001)))
\ No newline at end of file
@@ -1,5 +1,5 @@
 import os
-from googlemaps import Client
+from functools import lru_cache
 
 def load_api_key(filepath="data/external/google_routes_api_key.txt"):
     try:
@@ -8,7 +8,10 @@ def load_api_key(filepath="data/external/google_routes_api_key.txt"):
     except FileNotFoundError:
         raise Exception("API key file not found. Please provide it in data/external/.")
 
+@lru_cache(maxsize=1)
 def initialize_gmaps_client():
+    """One googlemaps Client per process, reused by every call."""
+    from googlemaps import Client
     api_key = load_api_key()
     return Client(key=api_key)
 
@@ -1,68 +1,123 @@
 # src/data_processing/graph_builder.py
+import numpy as np
 import pandas as pd
 import networkx as nx
 import os
-import pickle
 import logging
-import logging.config
-import yaml
 import re
-from googlemaps import Client
-from googlemaps.exceptions import ApiError
+import threading
+import time
 from src.utils.geocoding import GeocodingUtils
+from src.utils.helpers import LogSampler
+from src.utils.spatial_index import CandidateHubIndex, CountryNodeIndex, HubIndex
+from src.data_processing.graph_overlay import GraphOverlay
+from src.data_processing.compiled_graph import CompiledGraph
+from src.data_processing.graph_snapshot import compute_source_hash, load_snapshot, write_snapshot
+from src.data_processing.road_legs import RoadLegService
+from src.optimization.landmarks import LandmarkTables
+from src.optimization.contraction import PresetRouter
 from dotenv import load_dotenv
 
-# Create logs directory if it doesn't exist
-os.makedirs("logs", exist_ok=True)
-
-# Set up logging
-try:
-    with open("config/logging_config.yaml", "r", encoding="utf-8") as f:
-        config = yaml.safe_load(f.read())
-    # Delete existing log file(s) if defined in the configuration
-    for handler in config.get("handlers", {}).values():
-        if "filename" in handler:
-            log_file = handler["filename"]
-            if os.path.exists(log_file):
-                try:
-                    os.remove(log_file)
-                except PermissionError:
-                    # Log file is in use, skip deletion
-                    pass
-    logging.config.dictConfig(config)
-except FileNotFoundError:
-    logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("graph_builder")
 class GraphBuilder:
+    # Optional per-edge attributes carried by add_edges_bulk, and the modes that have them.
+    EXTRA_EDGE_ATTRS = {"route": ("sea",)}
+    # add_edge_if_unique debug lines over the builder's lifetime: the first few, then one in N.
+    EDGE_DEBUG_SAMPLE_BURST = 20
+    EDGE_DEBUG_SAMPLE_EVERY = 1000
+    # How often a process without contraction hierarchies checks whether they have been saved.
+    HIERARCHY_POLL_SECONDS = 5.0
+
     def __init__(self, config):
         self.config = config
         self.raw_nodes_dir = config["data"]["raw_nodes_dir"]
         self.raw_edges_dir = config["data"]["raw_edges_dir"]
         self.processed_dir = config["data"]["processed_dir"]
         self.cache_dir = config["data"]["cache_dir"]
-        
+        self._gmaps = None
+        self._gmaps_ready = False
+        self._road_legs = None
+
+        self._G = nx.MultiDiGraph()
+        self._snapshot = None
+        self.source_hash = None
+        self.carbon_factors = {}
+        self.hub_index = None
+        self.candidate_hubs = None
+        self.compiled = None
+        self.landmarks = None
+        self._preset_router = None
+        self._hierarchy_dir = None
+        self._hierarchy_poll_at = 0.0
+        self.iata_to_city = {}
+        self.node_coords = {}
+        self.geo_utils = GeocodingUtils()
+        self._edge_log = LogSampler(self.EDGE_DEBUG_SAMPLE_EVERY, self.EDGE_DEBUG_SAMPLE_BURST)
+
+    @property
+    def G(self):
+        """
+        The base ``nx.MultiDiGraph``.
+
+        After a snapshot load it is rebuilt (and frozen) from the snapshot on
+        first access; serving requests only needs ``compiled``.
+        """
+        if self._G is None:
+            self._G = nx.freeze(self._snapshot.to_networkx())
+        return self._G
+
+    @property
+    def gmaps(self):
+        """Google Maps client, created (and googlemaps imported) on first use; None without an API key."""
+        if not self._gmaps_ready:
+            self._gmaps_ready = True
+            self._gmaps = self._create_gmaps_client()
+        return self._gmaps
+
+    @property
+    def preset_router(self):
+        """
+        ``PresetRouter`` over the contraction hierarchies, or None until all of them exist.
+
+        Hierarchies built in the background (by this process or, under a
+        pre-forking server, by the master after this worker was forked) are
+        picked up from disk, checking at most every ``HIERARCHY_POLL_SECONDS``.
+        """
+        if self._preset_router is None and self._hierarchy_dir is not None:
+            now = time.monotonic()
+            if now >= self._hierarchy_poll_at:
+                self._hierarchy_poll_at = now + self.HIERARCHY_POLL_SECONDS
+                self._preset_router = PresetRouter.load(self.compiled, self._hierarchy_dir)
+        return self._preset_router
+
+    @property
+    def road_legs(self):
+        """``RoadLegService`` for first/last-mile legs (see ``road_legs`` in config), created on first use."""
+        if self._road_legs is None:
+            self._road_legs = RoadLegService.from_config(self.config, lambda: self.gmaps)
+        return self._road_legs
+
+    def _create_gmaps_client(self):
         # Load API key from environment first, fallback to file if not set
         load_dotenv()
         api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not api_key:
             try:
-                with open(os.path.join(config["data"]["external_dir"], config["api"]["google_routes_key_file"]), "r") as f:
+                with open(os.path.join(self.config["data"]["external_dir"], self.config["api"]["google_routes_key_file"]), "r") as f:
                     api_key = f.read().strip()
             except Exception as e:
-                api_key = None
                 logger.warning(f"Google Maps API key not found in env or file: {e}")
+                return None
         try:
-            self.gmaps = Client(key=api_key) if api_key else None
-            if self.gmaps:
+            from googlemaps import Client
+            timeout = self.config.get("road_legs", {}).get("timeout_seconds", 5)
+            client = Client(key=api_key, timeout=timeout) if api_key else None
+            if client:
                 logger.info("Google Maps API key loaded successfully.")
+            return client
         except Exception as e:
             logger.warning(f"Failed to initialize Google Maps client: {e}. Using fallback methods.")
-            self.gmaps = None
-        
-        self.G = nx.MultiDiGraph()
-        self.iata_to_city = {}
-        self.node_coords = {}
-        self.geo_utils = GeocodingUtils()
+            return None
 
     def parse_time_to_hours(self, time_val):
         if pd.isna(time_val):
@@ -100,6 +155,43 @@ class GraphBuilder:
             logger.warning(f"Error parsing distance '{distance_str}': {e}. Using default.")
             return float(self.config["defaults"]["fallback_distance_km"])
 
+    def parse_time_column(self, values):
+        """
+        Column-wise equivalent of ``parse_time_to_hours``.
+
+        Numeric columns are taken as hours; strings are parsed with the same
+        day/hour/minute patterns, and missing values fall back to
+        ``fallback_time_hours``.
+        """
+        fallback = float(self.config["defaults"]["fallback_time_hours"])
+        missing = values.isna()
+        if missing.any():
+            logger.warning(f"{int(missing.sum())} invalid time value(s) in '{values.name}'. Using default {fallback} hours.")
+        if pd.api.types.is_numeric_dtype(values):
+            return values.astype(float).where(~missing, fallback)
+
+        numeric = values.map(lambda v: isinstance(v, (int, float)) and not isinstance(v, bool))
+        text = values.where(~numeric & ~missing).astype(str)
+        hours = pd.Series(0.0, index=values.index)
+        for pattern, factor in ((r"(\d+\.?\d*)\s*days?", 24.0), (r"(\d+\.?\d*)\s*hours?", 1.0), (r"(\d+\.?\d*)\s*minutes?", 1 / 60)):
+            matched = text.str.extract(pattern, flags=re.IGNORECASE, expand=False)
+            hours += pd.to_numeric(matched, errors="coerce").fillna(0.0) * factor
+        hours = hours.where(~numeric, pd.to_numeric(values.where(numeric), errors="coerce"))
+        return hours.where(~missing, fallback).astype(float)
+
+    def parse_distance_column(self, values):
+        """Column-wise equivalent of ``parse_distance_to_km``."""
+        fallback = float(self.config["defaults"]["fallback_distance_km"])
+        if pd.api.types.is_numeric_dtype(values):
+            parsed = values.astype(float)
+        else:
+            cleaned = values.astype(str).str.strip().str.replace(r"\s*km$", "", regex=True, flags=re.IGNORECASE)
+            parsed = pd.to_numeric(cleaned.where(values.notna()), errors="coerce")
+        invalid = parsed.isna()
+        if invalid.any():
+            logger.warning(f"{int(invalid.sum())} invalid distance value(s) in '{values.name}'. Using default {fallback} km.")
+        return parsed.where(~invalid, fallback)
+
     def load_data(self):
         try:
             nodes = {
@@ -122,273 +214,439 @@ class GraphBuilder:
             logger.error(f"Data file missing: {e}")
             raise
 
-        edges["ships"]["Time"] = edges["ships"]["Time"].apply(self.parse_time_to_hours)
-        edges["seaport_airport_connect"]["Time"] = edges["seaport_airport_connect"]["Time"].apply(self.parse_time_to_hours)
-        edges["flights"]["Flight_Time_Minutes"] = edges["flights"]["Flight_Time_Minutes"].apply(lambda x: self.parse_time_to_hours(x) / 60)
+        edges["ships"]["Time"] = self.parse_time_column(edges["ships"]["Time"])
+        edges["seaport_airport_connect"]["Time"] = self.parse_time_column(edges["seaport_airport_connect"]["Time"])
+        edges["flights"]["Flight_Time_Minutes"] = self.parse_time_column(edges["flights"]["Flight_Time_Minutes"]) / 60
 
-        for _, row in nodes["airports"].iterrows():
-            if pd.notna(row["IATA"]):
-                self.iata_to_city[row["IATA"]] = (row["Country"], row["City"])
-                self.node_coords[f"{row['Country']}_{row['City']}_Airport"] = (float(row["Latitude"]), float(row["Longitude"]))
+        airports = nodes["airports"][nodes["airports"]["IATA"].notna()]
+        self.iata_to_city.update(zip(airports["IATA"], zip(airports["Country"], airports["City"])))
+        self.node_coords.update(zip(airports["Country"] + "_" + airports["City"] + "_Airport",
+                                    zip(airports["Latitude"].astype(float), airports["Longitude"].astype(float))))
 
         logger.info("Data loaded and preprocessed.")
         return nodes, edges
 
+    def _node_records(self, frame, node_type):
+        """Vectorized attribute dicts for one node table, in row order."""
+        ids = (frame["Country"] + "_" + frame["City"] + f"_{node_type.capitalize()}").tolist()
+        columns = {"country": frame["Country"].tolist(), "city": frame["City"].tolist()}
+        if "Latitude" in frame and "Longitude" in frame:
+            has_coords = (frame["Latitude"].notna() & frame["Longitude"].notna()).tolist()
+            lats = frame["Latitude"].astype(float).tolist()
+            lons = frame["Longitude"].astype(float).tolist()
+        else:
+            has_coords = [False] * len(frame)
+            lats = lons = [None] * len(frame)
+        records = []
+        for i in range(len(ids)):
+            attrs = {"country": columns["country"][i], "city": columns["city"][i], "type": node_type}
+            if has_coords[i]:
+                attrs["latitude"] = lats[i]
+                attrs["longitude"] = lons[i]
+            records.append(attrs)
+        return ids, records
+
     def build_nodes(self, nodes_data, logistics_data):
-        logistics_dict = logistics_data.set_index("Country").to_dict(orient="index")
-
-        for _, row in nodes_data["seaports"].iterrows():
-            node_id = f"{row['Country']}_{row['City']}_Seaport"
-            attrs = {
-                "country": row["Country"], 
-                "city": row["City"], 
-                "type": "seaport",
-            }
-            if "Latitude" in row and "Longitude" in row and pd.notna(row["Latitude"]) and pd.notna(row["Longitude"]):
-                attrs["latitude"] = float(row["Latitude"])
-                attrs["longitude"] = float(row["Longitude"])
-            if row["Country"] in logistics_dict:
-                attrs.update({
-                    "customs_score": logistics_dict[row["Country"]].get("Customs Score", 3.0),
-                    "mean_port_dwell_time": logistics_dict[row["Country"]].get("Mean Port Dwell Time (days)", 2.0) * 24,
-                    "mean_turnaround_time": logistics_dict[row["Country"]].get("Mean Turnaround Time at Port (days)", 1.0) * 24
-                })
-            else:
-                attrs.update({"customs_score": 3.0, "mean_port_dwell_time": 48, "mean_turnaround_time": 24})
-            self.G.add_node(node_id, **attrs)
-
-        for _, row in nodes_data["airports"].iterrows():
-            node_id = f"{row['Country']}_{row['City']}_Airport"
-            attrs = {
-                "country": row["Country"], 
-                "city": row["City"], 
-                "type": "airport",
-            }
-            if "Latitude" in row and "Longitude" in row and pd.notna(row["Latitude"]) and pd.notna(row["Longitude"]):
-                attrs["latitude"] = float(row["Latitude"])
-                attrs["longitude"] = float(row["Longitude"])
-            self.G.add_node(node_id, **attrs)
+        logistics = logistics_data.set_index("Country")
+        if not logistics.index.is_unique:
+            raise ValueError("logistics.csv must contain one row per country")
+
+        seaports = nodes_data["seaports"]
+        seaport_ids, seaport_records = self._node_records(seaports, "seaport")
+        known = seaports["Country"].isin(logistics.index).tolist()
+        port_stats = {
+            "customs_score": seaports["Country"].map(logistics["Customs Score"]).tolist()
+            if "Customs Score" in logistics else [3.0] * len(seaports),
+            "mean_port_dwell_time": (seaports["Country"].map(logistics["Mean Port Dwell Time (days)"]) * 24).tolist()
+            if "Mean Port Dwell Time (days)" in logistics else [48.0] * len(seaports),
+            "mean_turnaround_time": (seaports["Country"].map(logistics["Mean Turnaround Time at Port (days)"]) * 24).tolist()
+            if "Mean Turnaround Time at Port (days)" in logistics else [24.0] * len(seaports),
+        }
+        defaults = {"customs_score": 3.0, "mean_port_dwell_time": 48, "mean_turnaround_time": 24}
+        for i, attrs in enumerate(seaport_records):
+            for name, values in port_stats.items():
+                attrs[name] = values[i] if known[i] else defaults[name]
+
+        airport_ids, airport_records = self._node_records(nodes_data["airports"], "airport")
+        # add_nodes_from keeps networkx's update semantics for repeated ids.
+        self.G.add_nodes_from(zip(seaport_ids, seaport_records))
+        self.G.add_nodes_from(zip(airport_ids, airport_records))
 
         logger.info(f"Added {self.G.number_of_nodes()} nodes.")
 
-    def add_edge_if_unique(self, from_node, to_node, mode, distance, time, transportation_cost_per_kg, border_cost, emissions, **extra_attrs):
-        if from_node not in self.G:
-            logger.warning(f"Skipping edge {from_node} -> {to_node}; node missing. {from_node}")
+    def add_edge_if_unique(self, from_node, to_node, mode, distance, time, transportation_cost_per_kg, border_cost, emissions, graph=None, **extra_attrs):
+        G = self.G if graph is None else graph
+        if from_node not in G:
+            logger.warning("Skipping edge %s -> %s; node missing. %s", from_node, to_node, from_node)
             return
-        if to_node not in self.G:
-            logger.warning(f"Skipping edge {from_node} -> {to_node}; node missing. {to_node}")
+        if to_node not in G:
+            logger.warning("Skipping edge %s -> %s; node missing. %s", from_node, to_node, to_node)
             return
+        log = logger.isEnabledFor(logging.DEBUG) and self._edge_log.sample()
         
-        if self.G.has_edge(from_node, to_node):
-            for edge_key, edge_data in self.G[from_node][to_node].items():
+        if G.has_edge(from_node, to_node):
+            for edge_key, edge_data in G[from_node][to_node].items():
                 if edge_data["mode"] == mode:
                     existing_score = edge_data["transportation_cost_per_kg"] + edge_data["border_cost"] + edge_data["time"]
                     new_score = transportation_cost_per_kg + border_cost + time
                     if new_score < existing_score:
-                        self.G[from_node][to_node][edge_key].update(
+                        G[from_node][to_node][edge_key].update(
                             distance=distance, time=time, transportation_cost_per_kg=transportation_cost_per_kg,
                             border_cost=border_cost, emissions=emissions, **extra_attrs
                         )
-                        logger.debug(f"Updated edge {from_node} -> {to_node} (mode: {mode}) with better attributes.")
-                    else:
-                        logger.debug(f"Skipped duplicate edge {from_node} -> {to_node} (mode: {mode}); existing is better.")
+                        if log:
+                            logger.debug("Updated edge %s -> %s (mode: %s) with better attributes.", from_node, to_node, mode)
+                    elif log:
+                        logger.debug("Skipped duplicate edge %s -> %s (mode: %s); existing is better.", from_node, to_node, mode)
                     return
         
-        self.G.add_edge(from_node, to_node, mode=mode, distance=distance, time=time,
-                        transportation_cost_per_kg=transportation_cost_per_kg, border_cost=border_cost,
-                        emissions=emissions, **extra_attrs)
-        logger.debug(f"Added edge {from_node} -> {to_node} (mode: {mode})")
-
-    def add_intermodal_edges(self):
-        for node in self.G.nodes(data=True):
-            if node[1]["type"] == "seaport":
-                airport_node = f"{node[1]['country']}_{node[1]['city']}_Airport"
+        G.add_edge(from_node, to_node, mode=mode, distance=distance, time=time,
+                   transportation_cost_per_kg=transportation_cost_per_kg, border_cost=border_cost,
+                   emissions=emissions, **extra_attrs)
+        if log:
+            logger.debug("Added edge %s -> %s (mode: %s, edge event %d)", from_node, to_node, mode, self._edge_log.seen)
+
+    def _intermodal_edges(self):
+        """Seaport <-> airport transfer edges within the same city, costed by port dwell time."""
+        rows = []
+        for node, data in self.G.nodes(data=True):
+            if data["type"] == "seaport":
+                airport_node = f"{data['country']}_{data['city']}_Airport"
                 if airport_node in self.G:
-                    dwell_time = node[1].get("mean_port_dwell_time", self.config["defaults"]["dwell_time"])
-                    self.add_edge_if_unique(node[0], airport_node, mode="intermodal", distance=0, time=dwell_time,
-                                            transportation_cost_per_kg=0, border_cost=0, emissions=0)
-                    self.add_edge_if_unique(airport_node, node[0], mode="intermodal", distance=0, time=dwell_time,
-                                            transportation_cost_per_kg=0, border_cost=0, emissions=0)
+                    dwell_time = data.get("mean_port_dwell_time", self.config["defaults"]["dwell_time"])
+                    rows.append((node, airport_node, dwell_time))
+                    rows.append((airport_node, node, dwell_time))
+        frame = pd.DataFrame(rows, columns=["from_node", "to_node", "time"])
+        frame["mode"] = "intermodal"
+        frame["distance"] = 0.0
+        frame["transportation_cost_per_kg"] = 0.0
+        frame["border_cost"] = 0.0
+        frame["emissions"] = 0.0
+        return frame
+
+    def _trade_neighbour_edges(self, trade_neighbour_dict, border_costs, road_factor):
+        """Road edges between hubs of trade-neighbour countries within ``max_road_distance_km``."""
+        index = CountryNodeIndex(self.G)
+        max_distance = self.config["defaults"]["max_road_distance_km"]
+        from_nodes, to_nodes, countries_a, countries_b, distances = [], [], [], [], []
+        for country, neighbors in trade_neighbour_dict.items():
+            for neighbor in neighbors:
+                neighbor = neighbor.strip()
+                pair_from, pair_to, pair_distances = index.pairs_within(country, neighbor, max_distance)
+                from_nodes.extend(pair_from)
+                to_nodes.extend(pair_to)
+                countries_a.extend([country] * len(pair_from))
+                countries_b.extend([neighbor] * len(pair_from))
+                distances.append(pair_distances)
+        frame = pd.DataFrame({
+            "from_node": from_nodes,
+            "to_node": to_nodes,
+            "country_a": countries_a,
+            "country_b": countries_b,
+            "distance": np.concatenate(distances) if distances else np.empty(0),
+        })
+        frame["mode"] = "road"
+        frame["time"] = frame["distance"] / self.config["defaults"]["fallback_speed_km_h"]
+        frame["transportation_cost_per_kg"] = float(self.config["defaults"]["road_cost_per_km"])
+        frame["border_cost"] = border_costs(frame["country_a"], frame["country_b"])
+        frame["emissions"] = frame["distance"] * road_factor
+        logger.debug(f"Generated {len(frame)} trade-neighbour road edges.")
+        return frame
+
+    def add_edges_bulk(self, edge_frames):
+        """
+        Deduplicate and insert edges from several frames in a single pass.
+
+        Frames are concatenated in order. For every (from_node, to_node, mode)
+        lane only the row with the lowest ``transportation_cost_per_kg +
+        border_cost + time`` is kept (the earliest on ties), inserted at the
+        position where the lane first appeared — the same result as calling
+        ``add_edge_if_unique`` row by row.
+        """
+        edges = pd.concat([f for f in edge_frames if len(f)], ignore_index=True)
+        present = edges["from_node"].isin(self.G) & edges["to_node"].isin(self.G)
+        if not present.all():
+            skipped = edges.loc[~present, ["from_node", "to_node"]]
+            logger.warning(f"Skipping {len(skipped)} edge(s) with missing nodes, e.g. "
+                           f"{skipped.iloc[0]['from_node']} -> {skipped.iloc[0]['to_node']}.")
+            edges = edges[present]
+
+        lane = ["from_node", "to_node", "mode"]
+        edges = edges.assign(_score=edges["transportation_cost_per_kg"] + edges["border_cost"] + edges["time"],
+                             _order=range(len(edges)))
+        grouped = edges.groupby(lane, sort=False)
+        first_seen = grouped["_order"].transform("min")
+        best = edges.loc[grouped["_score"].idxmin()]
+        best = best.assign(_first=first_seen.loc[best.index]).sort_values("_first", kind="stable")
+        logger.debug(f"Deduplicated {len(edges)} edge rows into {len(best)} lanes.")
+
+        attr_columns = ["mode", "distance", "time", "transportation_cost_per_kg", "border_cost", "emissions"]
+        extra_columns = [c for c in best.columns if c not in lane + attr_columns and not c.startswith("_")
+                         and c not in ("country_a", "country_b")]
+        records = best[attr_columns].to_dict(orient="records")
+        for column in extra_columns:
+            for attrs, value, mode in zip(records, best[column].tolist(), best["mode"].tolist()):
+                if mode in self.EXTRA_EDGE_ATTRS.get(column, ()):
+                    attrs[column] = value
+        self.G.add_edges_from(zip(best["from_node"].tolist(), best["to_node"].tolist(), records))
 
     def build_edges(self, edges_data):
-        trade_dict = edges_data["trade"].set_index("Country").to_dict(orient="index")
         carbon_dict = edges_data["carbon_emission"].set_index("Mode of Transport")["Emission Factor (g CO₂/tonne-km)"].to_dict()
+        self.carbon_factors = {mode: float(factor) for mode, factor in carbon_dict.items()}
+        default_border = float(self.config["defaults"]["border_cost"])
+        trade = edges_data["trade"].set_index("Country")
         trade_neighbour_dict = {}
 
-
-        for _, row in edges_data["trade_neighbour"].iterrows():
-            country = row["Country"]
-            neighbors = row["Trade_Neighbors_Country"]
-            if pd.isna(neighbors):
+        for country, neighbors in zip(edges_data["trade_neighbour"]["Country"], edges_data["trade_neighbour"]["Trade_Neighbors_Country"]):
+            if pd.isna(neighbors) or neighbors == "None":
                 trade_neighbour_dict[country] = []
-                logger.debug(f"Country {country} has no trade neighbors (NaN).")
-            elif neighbors == "None":
-                trade_neighbour_dict[country] = []
-                logger.debug(f"Country {country} has no trade neighbors (None).")
             else:
                 trade_neighbour_dict[country] = neighbors.split(";")
-                logger.debug(f"Country {country} trade neighbors: {trade_neighbour_dict[country]}")
-
-        def get_border_costs(country_a, country_b):
-            if country_a == country_b:
-                return 0
-            export_cost = trade_dict.get(country_a, {}).get("Cost to export: Border compliance (USD)", self.config["defaults"]["border_cost"])
-            import_cost = trade_dict.get(country_b, {}).get("Cost to import: Border compliance (USD)", self.config["defaults"]["border_cost"])
-            return float(export_cost) + float(import_cost)
-
-        for _, row in edges_data["ships"].iterrows():
-            node_a = f"{row['Country_A']}_{row['Port_A']}_Seaport"
-            node_b = f"{row['Country_B']}_{row['Port_B']}_Seaport"
-            distance = self.parse_distance_to_km(row["Distance"])
-            time = row["Time"] + self.G.nodes.get(node_b, {}).get("mean_port_dwell_time", 0)
-            
-            # Attempt to read Price_Per_kg from the row
-            try:
-                cost_per_kg = float(row["Price_Per_kg"])
-                # Log the value for verification
-                # logger.info(f"Sea route {node_a} -> {node_b}: cost_per_kg = {cost_per_kg}")
-            except KeyError:
-                # Handle missing 'Price_Per_kg' column
-                logger.warning(f"'Price_Per_kg' column missing in ships.csv for route {node_a} -> {node_b}. Using default sea freight cost.")
-                cost_per_kg = self.config["defaults"].get("sea_cost_per_kg", 0.05)  # Use a sea-specific default, fallback to 0.05
-            except ValueError as e:
-                # Handle invalid (non-numeric) 'Price_Per_kg' values
-                logger.warning(f"Invalid 'Price_Per_kg' value '{row.get('Price_Per_kg')}' for route {node_a} -> {node_b}: {e}. Using default sea freight cost.")
-                cost_per_kg = self.config["defaults"].get("sea_cost_per_kg", 0.05)  # Use a sea-specific default, fallback to 0.05
-            
-            border_cost = get_border_costs(row["Country_A"], row["Country_B"])
-            self.add_edge_if_unique(node_a, node_b, mode="sea", distance=distance, time=time,
-                                    transportation_cost_per_kg=cost_per_kg, border_cost=border_cost,
-                                    emissions=distance * carbon_dict["Sea Freight"], route=row["Route"])
-
-        for _, row in edges_data["flights"].iterrows():
-            from_city = self.iata_to_city.get(row["From_IATA"], (row["From_Country"], row["From_IATA"]))[1]
-            to_city = self.iata_to_city.get(row["To_IATA"], (row["To_Country"], row["To_IATA"]))[1]
-            node_a = f"{row['From_Country']}_{from_city}_Airport"
-            node_b = f"{row['To_Country']}_{to_city}_Airport"
-            distance = self.parse_distance_to_km(row["Distance_km"])
-            time = row["Flight_Time_Minutes"]
-            cost_per_kg = float(row["Cost_Per_Kg"])
-            border_cost = get_border_costs(row["From_Country"], row["To_Country"])
-            self.add_edge_if_unique(node_a, node_b, mode="air", distance=distance, time=time,
-                                    transportation_cost_per_kg=cost_per_kg, border_cost=border_cost,
-                                    emissions=distance * carbon_dict["Air Freight"])
-
-
-        for _, row in edges_data["seaport_airport_connect"].iterrows():
-            node_a = f"{row['Port_Country']}_{row['Port_City']}_Seaport"
-            node_b = f"{row['Port_Country']}_{row['City']}_Airport"
-            distance = self.parse_distance_to_km(row["Distance"])
-            time = row["Time"]
-            cost_per_kg = float(row["Cost_USD"]) / 1000
-            border_cost = get_border_costs(row["Port_Country"], row["Port_Country"])
-            self.add_edge_if_unique(node_a, node_b, mode="road", distance=distance, time=time,
-                                    transportation_cost_per_kg=cost_per_kg, border_cost=border_cost,
-                                    emissions=distance * carbon_dict["Road Freight"])
-
-        for country, neighbors in trade_neighbour_dict.items():
-            for neighbor in neighbors:
-                neighbor = neighbor.strip()
-                country_nodes = [n for n in self.G.nodes() if n.startswith(f"{country}_")]
-                neighbor_nodes = [n for n in self.G.nodes() if n.startswith(f"{neighbor}_")]
-                for n1 in country_nodes:
-                    for n2 in neighbor_nodes:
-                        if n1 == n2 or "latitude" not in self.G.nodes[n1] or "latitude" not in self.G.nodes[n2]:
-                            continue
-                        distance = self.geo_utils.haversine_distance(
-                            (self.G.nodes[n1]["latitude"], self.G.nodes[n1]["longitude"]),
-                            (self.G.nodes[n2]["latitude"], self.G.nodes[n2]["longitude"])
-                        )
-                        if distance > self.config["defaults"]["max_road_distance_km"]:
-                            continue
-                        time = distance / self.config["defaults"]["fallback_speed_km_h"]
-                        cost_per_kg = self.config["defaults"]["road_cost_per_km"]
-                        border_cost = get_border_costs(country, neighbor)
-                        self.add_edge_if_unique(n1, n2, mode="road", distance=distance, time=time,
-                                                transportation_cost_per_kg=cost_per_kg, border_cost=border_cost,
-                                                emissions=distance * carbon_dict["Road Freight"])
-
-        self.add_intermodal_edges()
+        logger.debug(f"Trade neighbours loaded for {len(trade_neighbour_dict)} countries.")
+
+        def border_costs(countries_a, countries_b):
+            """Export cost of A plus import cost of B via a join on trade.csv; zero within a country."""
+            countries_a = countries_a.reset_index(drop=True)
+            countries_b = countries_b.reset_index(drop=True)
+            export_cost = countries_a.map(trade["Cost to export: Border compliance (USD)"]).astype(float)
+            import_cost = countries_b.map(trade["Cost to import: Border compliance (USD)"]).astype(float)
+            export_cost = export_cost.where(countries_a.isin(trade.index), default_border)
+            import_cost = import_cost.where(countries_b.isin(trade.index), default_border)
+            return (export_cost + import_cost).where(countries_a != countries_b, 0.0).to_numpy()
+
+        ships = edges_data["ships"]
+        sea = pd.DataFrame({
+            "from_node": ships["Country_A"] + "_" + ships["Port_A"] + "_Seaport",
+            "to_node": ships["Country_B"] + "_" + ships["Port_B"] + "_Seaport",
+            "mode": "sea",
+            "distance": self.parse_distance_column(ships["Distance"]),
+        })
+        dwell = {n: d.get("mean_port_dwell_time", 0) for n, d in self.G.nodes(data=True)}
+        sea["time"] = ships["Time"] + sea["to_node"].map(dwell).fillna(0)
+        sea_default = self.config["defaults"].get("sea_cost_per_kg", 0.05)
+        if "Price_Per_kg" in ships:
+            cost_per_kg = pd.to_numeric(ships["Price_Per_kg"], errors="coerce")
+            invalid = cost_per_kg.isna() & ships["Price_Per_kg"].notna()
+            if invalid.any():
+                logger.warning(f"{int(invalid.sum())} invalid 'Price_Per_kg' value(s) in ships.csv. Using default sea freight cost.")
+            sea["transportation_cost_per_kg"] = cost_per_kg.where(~invalid, sea_default)
+        else:
+            logger.warning("'Price_Per_kg' column missing in ships.csv. Using default sea freight cost.")
+            sea["transportation_cost_per_kg"] = sea_default
+        sea["border_cost"] = border_costs(ships["Country_A"], ships["Country_B"])
+        sea["emissions"] = sea["distance"] * carbon_dict["Sea Freight"]
+        sea["route"] = ships["Route"]
+
+        flights = edges_data["flights"]
+        from_city = flights["From_IATA"].map(lambda code: self.iata_to_city.get(code, (None, None))[1]).fillna(flights["From_IATA"])
+        to_city = flights["To_IATA"].map(lambda code: self.iata_to_city.get(code, (None, None))[1]).fillna(flights["To_IATA"])
+        distance = self.parse_distance_column(flights["Distance_km"])
+        air = pd.DataFrame({
+            "from_node": flights["From_Country"] + "_" + from_city + "_Airport",
+            "to_node": flights["To_Country"] + "_" + to_city + "_Airport",
+            "mode": "air",
+            "distance": distance,
+            "time": flights["Flight_Time_Minutes"].astype(float),
+            "transportation_cost_per_kg": flights["Cost_Per_Kg"].astype(float),
+            "border_cost": border_costs(flights["From_Country"], flights["To_Country"]),
+            "emissions": distance * carbon_dict["Air Freight"],
+        })
+
+        connect = edges_data["seaport_airport_connect"]
+        distance = self.parse_distance_column(connect["Distance"])
+        road = pd.DataFrame({
+            "from_node": connect["Port_Country"] + "_" + connect["Port_City"] + "_Seaport",
+            "to_node": connect["Port_Country"] + "_" + connect["City"] + "_Airport",
+            "mode": "road",
+            "distance": distance,
+            "time": connect["Time"].astype(float),
+            "transportation_cost_per_kg": connect["Cost_USD"].astype(float) / 1000,
+            "border_cost": 0.0,
+            "emissions": distance * carbon_dict["Road Freight"],
+        })
+
+        neighbour_roads = self._trade_neighbour_edges(trade_neighbour_dict, border_costs, carbon_dict["Road Freight"])
+        self.add_edges_bulk([sea, air, road, neighbour_roads, self._intermodal_edges()])
         logger.info(f"Added {self.G.number_of_edges()} edges.")
 
-    def add_dynamic_road(self, start_location, end_location, start_country, end_country):
-        carbon_factor = self.load_data()[1]["carbon_emission"].set_index("Mode of Transport")["Emission Factor (g CO₂/tonne-km)"].to_dict()["Road Freight"]
-
-        def find_nearest_nodes(location, country_hint):
-            min_dist_seaport = min_dist_airport = float("inf")
-            nearest_seaport = nearest_airport = None
-            for node, data in self.G.nodes(data=True):
-                if "latitude" in data and data["country"] == country_hint:
-                    dist = self.geo_utils.haversine_distance(location, (data["latitude"], data["longitude"]))
-                    if data["type"] == "seaport" and dist < min_dist_seaport:
-                        min_dist_seaport = dist
-                        nearest_seaport = node
-                    elif data["type"] == "airport" and dist < min_dist_airport:
-                        min_dist_airport = dist
-                        nearest_airport = node
-            return nearest_seaport, nearest_airport
+    def add_dynamic_road(self, start_location, end_location, start_country, end_country, k=None):
+        """
+        Attach custom start/end points to the base graph through a per-request overlay.
+
+        Each point is linked by road to its ``k`` nearest seaports and ``k``
+        nearest airports in the given country, looked up in the prebuilt
+        ``HubIndex``, with road distances and times from ``road_legs``. The
+        base graph is never modified, so it can be shared between requests.
+
+        Args:
+            start_location (tuple): (latitude, longitude) of the pickup point.
+            end_location (tuple): (latitude, longitude) of the delivery point.
+            start_country (str): Country used to pick the origin access hubs.
+            end_country (str): Country used to pick the destination access hubs.
+            k (int, optional): Access hubs per hub type; defaults to ``routing.access_hubs_per_type``.
+
+        Returns:
+            GraphOverlay: Read-through view of the base graph plus the custom nodes and road edges.
+        """
+        if k is None:
+            k = self.config.get("routing", {}).get("access_hubs_per_type", 1)
+        carbon_factor = self.carbon_factors["Road Freight"]
+        overlay = GraphOverlay(self.compiled)
 
         start_node = f"Custom_{start_location[0]}_{start_location[1]}_Start"
         end_node = f"Custom_{end_location[0]}_{end_location[1]}_End"
-        
-        if start_node not in self.G:
-            self.G.add_node(start_node, country="Unknown", city="Custom", type="start",
-                            latitude=start_location[0], longitude=start_location[1])
-            self.node_coords[start_node] = start_location
-            logger.info(f"Added custom node {start_node}")
-        if end_node not in self.G:
-            self.G.add_node(end_node, country="Unknown", city="Custom", type="end",
-                            latitude=end_location[0], longitude=end_location[1])
-            self.node_coords[end_node] = end_location
-            logger.info(f"Added custom node {end_node}")
-
-        # Use the user-supplied countries instead of hardcoded values:
-        start_seaport, start_airport = find_nearest_nodes(start_location, start_country)
-        end_seaport, end_airport = find_nearest_nodes(end_location, end_country)
-
-        for nearest in [start_seaport, start_airport]:
-            if nearest:
-                distance = self.geo_utils.haversine_distance(start_location, (self.G.nodes[nearest]["latitude"], self.G.nodes[nearest]["longitude"]))
-                time = distance / self.config["defaults"]["fallback_speed_km_h"]
-                cost_per_kg = self.config["defaults"]["road_cost_per_km"]
-                self.add_edge_if_unique(start_node, nearest, mode="road", distance=distance, time=time,
-                                        transportation_cost_per_kg=cost_per_kg, border_cost=0,
-                                        emissions=distance * carbon_factor)
-                self.add_edge_if_unique(nearest, start_node, mode="road", distance=distance, time=time,
-                                        transportation_cost_per_kg=cost_per_kg, border_cost=0,
-                                        emissions=distance * carbon_factor)
-
-        for nearest in [end_seaport, end_airport]:
-            if nearest:
-                distance = self.geo_utils.haversine_distance(end_location, (self.G.nodes[nearest]["latitude"], self.G.nodes[nearest]["longitude"]))
-                time = distance / self.config["defaults"]["fallback_speed_km_h"]
-                cost_per_kg = self.config["defaults"]["road_cost_per_km"]
-                self.add_edge_if_unique(end_node, nearest, mode="road", distance=distance, time=time,
+
+        overlay.add_node(start_node, country="Unknown", city="Custom", type="start",
+                         latitude=start_location[0], longitude=start_location[1])
+        logger.info(f"Added custom node {start_node}")
+        overlay.add_node(end_node, country="Unknown", city="Custom", type="end",
+                         latitude=end_location[0], longitude=end_location[1])
+        logger.info(f"Added custom node {end_node}")
+
+        # Use the user-supplied countries instead of hardcoded values. The road legs to each
+        # endpoint's hubs come from the road leg provider in one batch (cached when it is remote);
+        # routes only use start -> hub and hub -> end, and the reverse edges reuse those legs.
+        cost_per_kg = self.config["defaults"]["road_cost_per_km"]
+        for custom_node, location, country, direction in [(start_node, start_location, start_country, "to_hub"),
+                                                           (end_node, end_location, end_country, "from_hub")]:
+            hubs = [hub for hub, _ in self.hub_index.nearest_hubs(location, country, k)]
+            legs = self.road_legs.legs(location, [(hub, self.compiled.coords(hub)) for hub in hubs], direction)
+            for nearest in hubs:
+                distance, time = legs[nearest]
+                self.add_edge_if_unique(custom_node, nearest, mode="road", distance=distance, time=time,
                                         transportation_cost_per_kg=cost_per_kg, border_cost=0,
-                                        emissions=distance * carbon_factor)
-                self.add_edge_if_unique(nearest, end_node, mode="road", distance=distance, time=time,
+                                        emissions=distance * carbon_factor, graph=overlay)
+                self.add_edge_if_unique(nearest, custom_node, mode="road", distance=distance, time=time,
                                         transportation_cost_per_kg=cost_per_kg, border_cost=0,
-                                        emissions=distance * carbon_factor)
+                                        emissions=distance * carbon_factor, graph=overlay)
+        return overlay
+
+    def snapshot_root(self):
+        return os.path.join(self.processed_dir, self.config["data"].get("graph", {}).get("snapshot_dir", "snapshots"))
 
     def save_graph(self):
-        output_path = os.path.join(self.processed_dir, self.config.get("graph", {}).get("output_file", "transport_graph.pkl"))
-        os.makedirs(self.processed_dir, exist_ok=True)
-        with open(output_path, "wb") as f:
-            pickle.dump(self.G, f)
-        logger.info(f"Graph saved to {output_path} with {self.G.number_of_nodes()} nodes and {self.G.number_of_edges()} edges.")
+        """Write the base graph as a content-addressed snapshot keyed by ``self.source_hash``."""
+        keep = self.config["data"].get("graph", {}).get("keep_snapshots", 3)
+        return write_snapshot(self.G, self.snapshot_root(), self.source_hash,
+                              extra_meta={"carbon_factors": self.carbon_factors}, keep=keep, compiled=self.compiled)
+
+    def load_graph(self):
+        """
+        Load the snapshot matching ``self.source_hash``; returns False when none exists.
+
+        Only the memory-mapped compiled arrays are used; ``G`` is rebuilt from
+        the snapshot if something asks for it.
+        """
+        snapshot = load_snapshot(self.snapshot_root(), self.source_hash)
+        if snapshot is None:
+            return False
+        self.compiled = snapshot.compiled(road_cost_per_km=self.config["defaults"]["road_cost_per_km"])
+        self._snapshot = snapshot
+        self._G = None
+        self.carbon_factors = snapshot.meta["carbon_factors"]
+        logger.info(f"Loaded graph snapshot {snapshot.path} with {len(self.compiled)} nodes and {self.compiled.num_edges} edges.")
+        return True
+
+    def build_base(self):
+        """
+        Build the shared compiled transport graph once; later calls return the cached graph.
+
+        When a snapshot for the current raw CSVs and configuration exists its
+        compiled arrays are memory-mapped instead of re-parsing the inputs, and
+        no networkx graph is built. The base graph is read-only: per-request
+        nodes and edges must go through ``add_dynamic_road``, which returns a
+        ``GraphOverlay``.
+        """
+        if self.compiled is not None:
+            return self.compiled
+        self.source_hash = compute_source_hash(self.config)
+        if not self.load_graph():
+            nodes_data, edges_data = self.load_data()
+            self.build_nodes(nodes_data, edges_data["logistics"])
+            self.build_edges(edges_data)
+            nx.freeze(self.G)
+            self.compiled = CompiledGraph.from_networkx(self.G, road_cost_per_km=self.config["defaults"]["road_cost_per_km"])
+            self.save_graph()
+        self.hub_index = HubIndex(self.compiled)
+        self.candidate_hubs = CandidateHubIndex(self.compiled, self.load_trade_neighbours())
+        self.compiled.reverse_time_adjacency()  # shared by every request graph for deadline bounds
+        search_config = self.config.get("search", {})
+        index_dir = os.path.join(self.snapshot_root(), self.source_hash)
+        num_landmarks = search_config.get("landmarks", 16)
+        self.landmarks = LandmarkTables.load_or_build(self.compiled, index_dir, num_landmarks) if num_landmarks else None
+        if search_config.get("contraction_hierarchies", False):
+            self._hierarchy_dir = index_dir
+            mode = search_config.get("hierarchy_build", "background")
+            if mode == "startup":
+                self.build_hierarchies()
+            elif self.preset_router is None and mode == "background":
+                logger.info("Building contraction hierarchies in the background; presets use MOA* until they are ready.")
+                threading.Thread(target=self._build_hierarchies_in_background, name="hierarchy-build", daemon=True).start()
+        return self.compiled
+
+    def build_hierarchies(self):
+        """Load or build the preset contraction hierarchies for the current snapshot and answer presets from them."""
+        index_dir = os.path.join(self.snapshot_root(), self.source_hash)
+        self._preset_router = PresetRouter.load_or_build(self.compiled, index_dir)
+        return self._preset_router
+
+    def _build_hierarchies_in_background(self):
+        try:
+            self.build_hierarchies()
+            logger.info("Contraction hierarchies ready.")
+        except Exception:
+            logger.exception("Building contraction hierarchies failed; presets keep using MOA*.")
+
+    def load_trade_neighbours(self):
+        """Country -> trade-neighbour country names from ``trade_neighbour.csv`` ("None" means no neighbours)."""
+        frame = pd.read_csv(os.path.join(self.raw_edges_dir, "trade_neighbour.csv"), encoding="utf-8")
+        return {
+            country: [nbr.strip() for nbr in neighbors.split(";")]
+            if isinstance(neighbors, str) and neighbors.strip().lower() != "none" else []
+            for country, neighbors in zip(frame["Country"], frame["Trade_Neighbors_Country"])
+        }
+
+    def select_hubs(self, location, country, direction="to_hub"):
+        """
+        Search sources (or goals) for a shipment endpoint, with their road-leg hours.
+
+        The hubs of ``country`` and its trade neighbours, capped per
+        ``routing.candidate_hubs`` by the first/last-mile road leg from
+        ``road_legs`` (the one ``RouteConstructor`` charges): ``max_per_side``
+        keeps the N hubs with the fastest legs (shorter distance on ties) and
+        ``max_road_hours`` drops hubs whose leg takes longer. Hubs without
+        coordinates get no leg; they are kept only when no cap applies.
+
+        Returns:
+            tuple: ``(hubs, hours)``; hubs in graph order and
+            ``{hub: road hours}``, 0 for hubs without coordinates.
+        """
+        hubs = self.candidate_hubs.hubs(country)
+        coords = [(hub, self.compiled.coords(hub)) for hub in hubs]
+        legs = self.road_legs.legs(location, [(hub, c) for hub, c in coords if c], direction)
+        limits = self.config.get("routing", {}).get("candidate_hubs", {}) or {}
+        max_per_side, max_road_hours = limits.get("max_per_side"), limits.get("max_road_hours")
+        if max_per_side is not None or max_road_hours is not None:
+            ranked = sorted(legs, key=lambda hub: (legs[hub][1], legs[hub][0]))
+            if max_road_hours is not None:
+                ranked = [hub for hub in ranked if legs[hub][1] <= max_road_hours]
+            keep = set(ranked[:max_per_side])
+            hubs = [hub for hub in hubs if hub in keep]
+        return hubs, {hub: legs[hub][1] if hub in legs else 0.0 for hub in hubs}
+
+    def compile_request_graph(self, overlay):
+        """Compiled search graph for one request: the shared base plus the overlay's endpoints."""
+        return self.compiled.with_overlay(overlay)
 
     def build(self, start_location=None, end_location=None, start_country=None, end_country=None):
-        nodes_data, edges_data = self.load_data()
-        self.build_nodes(nodes_data, edges_data["logistics"])
-        self.build_edges(edges_data)
+        self.build_base()
         if start_location and end_location:
-            self.add_dynamic_road(start_location, end_location, start_country, end_country)
-        self.save_graph()
+            return self.add_dynamic_road(start_location, end_location, start_country, end_country)
         return self.G
 
-
 if __name__ == "__main__":
-    from src.utils.helpers import load_config
+    from src.utils.helpers import configure_logging, load_config
+    configure_logging()
     config = load_config()
     builder = GraphBuilder(config)
     start = (40.7128, -74.0060)  # New York
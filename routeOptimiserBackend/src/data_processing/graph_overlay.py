@@ -0,0 +1,132 @@
+# src/data_processing/graph_overlay.py
+import logging
+
+logger = logging.getLogger("graph_builder")
+
+
+class _OverlayNodeView:
+    """Read-only node view mirroring ``nx.MultiDiGraph.nodes`` for an overlay."""
+
+    def __init__(self, overlay):
+        self._overlay = overlay
+
+    def __call__(self, data=False):
+        if data:
+            return ((n, self[n]) for n in self)
+        return iter(self)
+
+    def __iter__(self):
+        yield from self._overlay.base.nodes
+        yield from self._overlay._node_attrs
+
+    def __len__(self):
+        return self._overlay.base.number_of_nodes() + len(self._overlay._node_attrs)
+
+    def __contains__(self, node):
+        return node in self._overlay._node_attrs or node in self._overlay.base
+
+    def __getitem__(self, node):
+        if node in self._overlay._node_attrs:
+            return self._overlay._node_attrs[node]
+        return self._overlay.base.nodes[node]
+
+    def get(self, node, default=None):
+        return self[node] if node in self else default
+
+
+class GraphOverlay:
+    """
+    Per-request view over the shared, frozen base transport graph.
+
+    Request-specific nodes (the ``Custom_..._Start``/``Custom_..._End`` points)
+    and the road edges attaching them to nearby hubs are stored here instead of
+    in the base graph. Reads used by ``MOAStar`` and ``RouteConstructor``
+    (``in``, ``G[u]``, ``G[u][v][key]``, ``G.nodes[n]``, ``get_edge_data``)
+    see the union of both, so many requests can share one base graph.
+
+    ``GraphBuilder`` overlays the ``CompiledGraph`` instead: recording the
+    request's nodes and edges only needs ``in`` and ``has_edge`` from the
+    base, and ``CompiledGraph.with_overlay`` reads just the extra nodes and edges.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self._node_attrs = {}
+        self._succ = {}
+        self._merged_adj = {}
+
+    @property
+    def nodes(self):
+        return _OverlayNodeView(self)
+
+    def __contains__(self, node):
+        return node in self._node_attrs or node in self.base
+
+    def __iter__(self):
+        return iter(self.nodes)
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __getitem__(self, node):
+        if node not in self._succ:
+            if node in self._node_attrs:
+                return {}
+            return self.base[node]
+        if node not in self.base:
+            return self._succ[node]
+        # Base hub with request-specific out-edges: merge once and reuse.
+        merged = self._merged_adj.get(node)
+        if merged is None:
+            merged = {**self.base[node], **self._succ[node]}
+            self._merged_adj[node] = merged
+        return merged
+
+    def add_node(self, node, **attrs):
+        if node in self.base:
+            raise ValueError(f"Node {node} already exists in the base graph; overlays only add new nodes.")
+        self._node_attrs.setdefault(node, {}).update(attrs)
+
+    def add_edge(self, from_node, to_node, **attrs):
+        if from_node not in self or to_node not in self:
+            raise KeyError(f"Cannot add overlay edge {from_node} -> {to_node}; node missing.")
+        if from_node not in self._node_attrs and to_node not in self._node_attrs:
+            raise ValueError(f"Overlay edge {from_node} -> {to_node} must touch a request-specific node.")
+        keydict = self._succ.setdefault(from_node, {}).setdefault(to_node, {})
+        key = len(keydict)
+        keydict[key] = attrs
+        self._merged_adj.pop(from_node, None)
+        return key
+
+    def has_edge(self, from_node, to_node):
+        if to_node in self._succ.get(from_node, {}):
+            return True
+        return self.base.has_edge(from_node, to_node) if from_node in self.base else False
+
+    def get_edge_data(self, from_node, to_node, key=None, default=None):
+        keydict = self._succ.get(from_node, {}).get(to_node)
+        if keydict is None:
+            if from_node in self.base and to_node in self.base:
+                return self.base.get_edge_data(from_node, to_node, key=key, default=default)
+            return default
+        if key is None:
+            return keydict
+        return keydict.get(key, default)
+
+    def extra_nodes(self):
+        """(node, attrs) pairs added by this overlay, in insertion order."""
+        return iter(self._node_attrs.items())
+
+    def extra_edges(self):
+        """(from_node, to_node, key, attrs) for every edge added by this overlay."""
+        for from_node, nbrs in self._succ.items():
+            for to_node, keydict in nbrs.items():
+                for key, attrs in keydict.items():
+                    yield from_node, to_node, key, attrs
+
+    def number_of_nodes(self):
+        return len(self.nodes)
+
+    def number_of_edges(self):
+        extra = sum(len(keydict) for nbrs in self._succ.values() for keydict in nbrs.values())
+        return self.base.number_of_edges() + extra
@@ -0,0 +1,289 @@
+# src/data_processing/graph_snapshot.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import networkx as nx
+import numpy as np
+
+from src.data_processing.compiled_graph import CompiledGraph
+
+logger = logging.getLogger("graph_builder")
+
+# Bump whenever the on-disk layout or the graph-building semantics change so
+# stale snapshots are never reused.
+SNAPSHOT_FORMAT_VERSION = 3
+META_FILE = "meta.json"
+# File prefix of the ``CompiledGraph`` arrays saved next to the networkx columns.
+COMPILED_PREFIX = "compiled_"
+
+
+# Config sections the base graph is built from; other sections (search, cache,
+# metrics, server, ...) only affect requests and must not force a rebuild.
+GRAPH_CONFIG_SECTIONS = ("data", "defaults")
+
+
+def _is_nan(value):
+    return isinstance(value, (float, np.floating)) and value != value
+
+
+def compute_source_hash(config):
+    """
+    Hash every raw node/edge CSV plus the configuration sections the graph is built from.
+
+    Args:
+        config (dict): Loaded ``config.yaml`` contents.
+
+    Returns:
+        str: Hex digest identifying the inputs the graph is built from.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"format={SNAPSHOT_FORMAT_VERSION}".encode())
+    graph_config = {section: config.get(section) for section in GRAPH_CONFIG_SECTIONS}
+    digest.update(json.dumps(graph_config, sort_keys=True, default=str).encode())
+    for raw_dir in (config["data"]["raw_nodes_dir"], config["data"]["raw_edges_dir"]):
+        for name in sorted(os.listdir(raw_dir)):
+            if not name.endswith(".csv"):
+                continue
+            digest.update(name.encode())
+            with open(os.path.join(raw_dir, name), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _encode_columns(records, count):
+    """
+    Encode a list of attribute dicts as typed column arrays.
+
+    Numeric attributes become float64 (or int64 when every value is an int),
+    string attributes become int32 indices into a string table, and a boolean
+    presence mask records which records actually carry the attribute. NaN
+    (e.g. a blank CSV cell) does not decide the column kind: it stays NaN in
+    float columns and is stored as missing in any other column.
+    """
+    names = []
+    for attrs in records:
+        for name in attrs:
+            if name not in names:
+                names.append(name)
+
+    arrays = {}
+    columns = {}
+    for name in names:
+        present = np.zeros(count, dtype=bool)
+        values = [None] * count
+        for i, attrs in enumerate(records):
+            if name in attrs:
+                present[i] = True
+                values[i] = attrs[name]
+        nan_rows = [i for i, v in enumerate(values) if _is_nan(v)]
+        sample = [v for v in values if v is not None and not _is_nan(v)]
+        keep_nan = bool(nan_rows) and all(isinstance(v, (int, float, np.integer, np.floating))
+                                          and not isinstance(v, (bool, np.bool_)) for v in sample)
+        if nan_rows and not keep_nan:
+            for i in nan_rows:
+                present[i] = False
+                values[i] = None
+        if keep_nan:
+            arrays[name] = np.array([float(v) if v is not None else np.nan for v in values], dtype=np.float64)
+            columns[name] = {"kind": "float"}
+        elif all(isinstance(v, str) for v in sample):
+            table = list(dict.fromkeys(sample))
+            lookup = {v: i for i, v in enumerate(table)}
+            arrays[name] = np.array([lookup[v] if v is not None else -1 for v in values], dtype=np.int32)
+            columns[name] = {"kind": "str", "table": table}
+        elif all(isinstance(v, (bool, np.bool_)) for v in sample):
+            arrays[name] = np.array([bool(v) if v is not None else False for v in values], dtype=bool)
+            columns[name] = {"kind": "bool"}
+        elif all(isinstance(v, (int, np.integer)) and not isinstance(v, bool) for v in sample):
+            arrays[name] = np.array([v if v is not None else 0 for v in values], dtype=np.int64)
+            columns[name] = {"kind": "int"}
+        else:
+            arrays[name] = np.array([float(v) if v is not None else np.nan for v in values], dtype=np.float64)
+            columns[name] = {"kind": "float"}
+        if not present.all():
+            arrays[f"{name}__present"] = present
+        columns[name]["sparse"] = not present.all()
+    return arrays, columns
+
+
+def _decode_columns(arrays, columns, prefix, count):
+    """Inverse of ``_encode_columns``: rebuild one attribute dict per record."""
+    records = [{} for _ in range(count)]
+    for name, spec in columns.items():
+        values = arrays[f"{prefix}{name}"]
+        if spec["kind"] == "str":
+            table = spec["table"]
+            values = [table[i] if i >= 0 else None for i in values.tolist()]
+        else:
+            values = values.tolist()
+        if spec["sparse"]:
+            present = arrays[f"{prefix}{name}__present"].tolist()
+            for attrs, value, has in zip(records, values, present):
+                if has:
+                    attrs[name] = value
+        else:
+            for attrs, value in zip(records, values):
+                attrs[name] = value
+    return records
+
+
+class GraphSnapshot:
+    """
+    Columnar, memory-mapped view of a saved transport graph.
+
+    ``compiled`` serves the search straight from the mapped arrays;
+    ``to_networkx`` rebuilds the attribute-level graph for code that still needs it.
+    """
+
+    def __init__(self, path, meta, arrays):
+        self.path = path
+        self.meta = meta
+        self.arrays = arrays
+
+    @property
+    def source_hash(self):
+        return self.meta["source_hash"]
+
+    @property
+    def node_ids(self):
+        return self.meta["node_ids"]
+
+    def compiled(self, road_cost_per_km=None):
+        """
+        The saved ``CompiledGraph`` over the memory-mapped arrays, or None if none was saved.
+
+        Pages are shared through the OS page cache, so every process serving
+        the same snapshot maps one copy of the node and edge columns.
+        """
+        if "compiled_countries" not in self.meta:
+            return None
+        arrays = {name: self.arrays[f"{COMPILED_PREFIX}{name}"] for name in CompiledGraph.ARRAY_NAMES}
+        return CompiledGraph.from_arrays(self.meta["node_ids"], self.meta["compiled_countries"], arrays,
+                                         road_cost_per_km=road_cost_per_km)
+
+    def to_networkx(self):
+        """Rebuild the ``nx.MultiDiGraph`` with the original node/edge order and keys."""
+        node_ids = self.meta["node_ids"]
+        node_attrs = _decode_columns(self.arrays, self.meta["node_columns"], "node_", len(node_ids))
+        num_edges = self.meta["num_edges"]
+        edge_attrs = _decode_columns(self.arrays, self.meta["edge_columns"], "edge_", num_edges)
+        src = self.arrays["edge_src"].tolist()
+        dst = self.arrays["edge_dst"].tolist()
+        keys = self.arrays["edge_key"].tolist()
+
+        G = nx.MultiDiGraph()
+        G.add_nodes_from(zip(node_ids, node_attrs))
+        G.add_edges_from((node_ids[u], node_ids[v], k, attrs) for u, v, k, attrs in zip(src, dst, keys, edge_attrs))
+        return G
+
+
+def write_snapshot(G, snapshot_root, source_hash, extra_meta=None, keep=3, compiled=None):
+    """
+    Atomically write ``G`` as a columnar snapshot under ``snapshot_root/<source_hash>``.
+
+    With ``compiled`` (the ``CompiledGraph`` of ``G``) its arrays are saved
+    too, so ``GraphSnapshot.compiled`` can serve requests without networkx.
+
+    The arrays are written to a temporary sibling directory which is then
+    renamed into place, so readers never observe a half-written snapshot and
+    concurrent writers simply let the first rename win.
+
+    Returns:
+        str: Path of the snapshot directory.
+    """
+    os.makedirs(snapshot_root, exist_ok=True)
+    final_path = os.path.join(snapshot_root, source_hash)
+    if os.path.isdir(final_path):
+        return final_path
+
+    node_ids = list(G.nodes())
+    index = {n: i for i, n in enumerate(node_ids)}
+    node_arrays, node_columns = _encode_columns([G.nodes[n] for n in node_ids], len(node_ids))
+
+    edges = list(G.edges(keys=True, data=True))
+    edge_arrays, edge_columns = _encode_columns([data for _, _, _, data in edges], len(edges))
+    arrays = {f"node_{k}": v for k, v in node_arrays.items()}
+    arrays.update({f"edge_{k}": v for k, v in edge_arrays.items()})
+    arrays["edge_src"] = np.array([index[u] for u, _, _, _ in edges], dtype=np.int32)
+    arrays["edge_dst"] = np.array([index[v] for _, v, _, _ in edges], dtype=np.int32)
+    arrays["edge_key"] = np.array([k for _, _, k, _ in edges], dtype=np.int32)
+    if compiled is not None:
+        arrays.update({f"{COMPILED_PREFIX}{name}": np.asarray(array) for name, array in compiled.arrays().items()})
+
+    meta = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "source_hash": source_hash,
+        "created_at": time.time(),
+        "num_nodes": len(node_ids),
+        "num_edges": len(edges),
+        "node_ids": node_ids,
+        "node_columns": node_columns,
+        "edge_columns": edge_columns,
+        "arrays": sorted(arrays),
+    }
+    if compiled is not None:
+        meta["compiled_countries"] = list(compiled.countries)
+    meta.update(extra_meta or {})
+
+    tmp_path = tempfile.mkdtemp(prefix=f".{source_hash[:12]}-", dir=snapshot_root)
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_path, f"{name}.npy"), array, allow_pickle=False)
+        # meta.json is written last: a directory without it is never loaded.
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, final_path)
+        logger.info(f"Graph snapshot written to {final_path} ({len(node_ids)} nodes, {len(edges)} edges).")
+    except OSError as e:
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        if not os.path.isdir(final_path):
+            raise
+        logger.debug(f"Snapshot {final_path} was written concurrently ({e}); keeping existing copy.")
+
+    prune_snapshots(snapshot_root, keep=keep, protect=source_hash)
+    return final_path
+
+
+def load_snapshot(snapshot_root, source_hash, mmap_mode="r"):
+    """
+    Load the snapshot for ``source_hash`` if it exists, memory-mapping its arrays.
+
+    Returns:
+        GraphSnapshot or None: ``None`` when no valid snapshot matches the hash.
+    """
+    path = os.path.join(snapshot_root, source_hash)
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.isfile(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format_version") != SNAPSHOT_FORMAT_VERSION or meta.get("source_hash") != source_hash:
+            logger.warning(f"Ignoring incompatible graph snapshot at {path}.")
+            return None
+        arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in meta["arrays"]}
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Failed to load graph snapshot at {path}: {e}. Rebuilding.")
+        return None
+    return GraphSnapshot(path, meta, arrays)
+
+
+def prune_snapshots(snapshot_root, keep=3, protect=None):
+    """Delete all but the ``keep`` most recent snapshots (never ``protect``)."""
+    entries = []
+    for name in os.listdir(snapshot_root):
+        path = os.path.join(snapshot_root, name)
+        if name.startswith(".") or not os.path.isdir(path) or name == protect:
+            continue
+        entries.append((os.path.getmtime(path), path))
+    entries.sort(reverse=True)
+    for _, path in entries[max(keep - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed stale graph snapshot {path}.")
@@ -0,0 +1,304 @@
+# src/data_processing/road_legs.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from src.utils.helpers import quantize
+from src.utils.spatial_index import haversine_matrix
+
+logger = logging.getLogger("road_legs")
+
+DIRECTIONS = ("to_hub", "from_hub")
+
+
+class OfflineRoadLegs:
+    """
+    Deterministic stand-in provider: great-circle distance times a circuity
+    factor, driven at a fixed speed.
+
+    Needs no network or API key, so it serves tests and air-gapped
+    deployments, and fills in legs a network provider could not return.
+    With ``circuity=1`` it reproduces the haversine road segments used before
+    road-leg providers existed.
+    """
+
+    name = "offline"
+    cacheable = False  # cheaper to recompute than to look up
+
+    def __init__(self, speed_km_h=60, circuity=1.0):
+        self.speed_km_h = speed_km_h
+        self.circuity = circuity
+        self.requests = 0
+
+    def matrix(self, origins, destinations):
+        """
+        Road legs for every origin x destination.
+
+        Args:
+            origins, destinations (list): (latitude, longitude) tuples.
+
+        Returns:
+            list: One row per origin of ``(distance_km, time_hours)`` tuples.
+        """
+        self.requests += 1
+        distances = haversine_matrix([o[0] for o in origins], [o[1] for o in origins],
+                                     [d[0] for d in destinations], [d[1] for d in destinations]) * self.circuity
+        return [[(km, km / self.speed_km_h) for km in row] for row in distances.tolist()]
+
+
+class GoogleDistanceMatrix:
+    """
+    Google Distance Matrix API (driving), split into requests within the
+    API's per-request limits.
+
+    Args:
+        client: A ``googlemaps.Client``.
+    """
+
+    name = "google"
+    cacheable = True
+    MAX_ORIGINS = 25
+    MAX_DESTINATIONS = 25
+    MAX_ELEMENTS = 100
+
+    def __init__(self, client):
+        self.client = client
+        self.requests = 0
+
+    def matrix(self, origins, destinations):
+        """
+        Road legs for every origin x destination; None where the API has no route.
+
+        Returns:
+            list: One row per origin of ``(distance_km, time_hours)`` tuples or None.
+        """
+        rows = [[None] * len(destinations) for _ in origins]
+        origin_step = min(self.MAX_ORIGINS, len(origins))
+        destination_step = max(1, min(self.MAX_DESTINATIONS, self.MAX_ELEMENTS // origin_step))
+        for oi in range(0, len(origins), origin_step):
+            for di in range(0, len(destinations), destination_step):
+                self.requests += 1
+                response = self.client.distance_matrix(origins[oi:oi + origin_step],
+                                                       destinations[di:di + destination_step], mode="driving")
+                for i, row in enumerate(response["rows"]):
+                    for j, element in enumerate(row["elements"]):
+                        if element.get("status") == "OK":
+                            rows[oi + i][di + j] = (element["distance"]["value"] / 1000,
+                                                    element["duration"]["value"] / 3600)
+        return rows
+
+
+class RoadLegCache:
+    """
+    Persistent road legs in SQLite, keyed by provider, direction, rounded
+    endpoint coordinates and hub id.
+
+    Legs the provider had no route for are stored too (as NULL), so they are
+    not requested again. Entries older than ``max_age_days`` count as missing.
+    The database runs in WAL mode and every process and thread opens its own
+    connection, so gunicorn workers share one file.
+
+    Args:
+        path (str): SQLite file; its folder is created as needed.
+        coord_precision_deg (float): Endpoint rounding; points this close share legs.
+        max_age_days (float, optional): Age after which a leg is fetched again.
+    """
+
+    def __init__(self, path, coord_precision_deg=0.01, max_age_days=30):
+        self.path = path
+        self.coord_precision_deg = coord_precision_deg
+        self.max_age_seconds = max_age_days * 86400 if max_age_days else None
+        self._local = threading.local()
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS road_legs (
+                    provider TEXT NOT NULL,
+                    direction TEXT NOT NULL,
+                    lat REAL NOT NULL,
+                    lon REAL NOT NULL,
+                    hub TEXT NOT NULL,
+                    distance_km REAL,
+                    time_hours REAL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (provider, direction, lat, lon, hub)
+                )""")
+            connection.commit()
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def round_point(self, point):
+        return (quantize(point[0], self.coord_precision_deg), quantize(point[1], self.coord_precision_deg))
+
+    def get_many(self, provider, direction, point, hubs):
+        """
+        Cached legs between ``point`` and ``hubs``.
+
+        Returns:
+            dict: ``{hub: (distance_km, time_hours) or None}`` for the hubs found;
+            None marks a leg the provider has no route for.
+        """
+        lat, lon = self.round_point(point)
+        oldest = time.time() - self.max_age_seconds if self.max_age_seconds else 0
+        found = {}
+        for start in range(0, len(hubs), 500):  # stay below SQLite's bound-parameter limit
+            chunk = hubs[start:start + 500]
+            rows = self._connection().execute(
+                f"SELECT hub, distance_km, time_hours FROM road_legs WHERE provider = ? AND direction = ? "
+                f"AND lat = ? AND lon = ? AND fetched_at >= ? AND hub IN ({','.join('?' * len(chunk))})",
+                (provider, direction, lat, lon, oldest, *chunk))
+            for hub, distance_km, time_hours in rows:
+                found[hub] = None if distance_km is None else (distance_km, time_hours)
+        return found
+
+    def put_many(self, provider, direction, point, legs):
+        """Store ``{hub: (distance_km, time_hours) or None}`` for ``point``."""
+        lat, lon = self.round_point(point)
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO road_legs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(provider, direction, lat, lon, hub, *(leg if leg else (None, None)), now)
+                 for hub, leg in legs.items()])
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM road_legs").fetchone()[0]
+
+
+class RoadLegService:
+    """
+    First/last-mile road legs between a shipment endpoint and hubs.
+
+    Legs come from the persistent cache when the provider's results are
+    cacheable, and every miss of one call goes to the provider as a single
+    batched matrix request. Legs the provider cannot return are filled in by
+    the ``fallback`` provider. A "no route" answer is cached like any other,
+    while legs of a failed request are not, so a later call retries them.
+
+    Args:
+        provider: ``OfflineRoadLegs``, ``GoogleDistanceMatrix`` or any object
+            with ``name``, ``cacheable`` and ``matrix(origins, destinations)``.
+        cache (RoadLegCache, optional): Used only for cacheable providers.
+        fallback (OfflineRoadLegs, optional): Fills legs the provider did not
+            return; defaults to the provider itself when it is not cacheable,
+            else to an ``OfflineRoadLegs()``.
+    """
+
+    def __init__(self, provider, cache=None, fallback=None):
+        self.provider = provider
+        self.cache = cache if provider.cacheable else None
+        self.fallback = fallback or (provider if not provider.cacheable else OfflineRoadLegs())
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.misses = 0
+        self.fetched = 0
+        self.provider_errors = 0
+        self.fallbacks = 0
+
+    @classmethod
+    def from_config(cls, config, client_factory=None):
+        """
+        Build the service described by ``road_legs`` in ``config``.
+
+        Args:
+            config (dict): Loaded ``config.yaml`` contents.
+            client_factory (callable, optional): Returns a ``googlemaps.Client``
+                (or None) for the ``google`` provider.
+        """
+        settings = config.get("road_legs", {})
+        offline = OfflineRoadLegs(config["defaults"]["fallback_speed_km_h"], settings.get("circuity_factor", 1.0))
+        name = settings.get("provider", "offline")
+        provider = offline
+        if name == "google":
+            client = client_factory() if client_factory else None
+            if client is None:
+                logger.warning("Road leg provider 'google' has no Maps client; using the offline provider.")
+            else:
+                provider = GoogleDistanceMatrix(client)
+        elif name != "offline":
+            raise ValueError(f"Unknown road_legs.provider '{name}'")
+        cache = None
+        if settings.get("cache_path"):
+            cache = RoadLegCache(settings["cache_path"], settings.get("coord_precision_deg", 0.01),
+                                 settings.get("max_age_days", 30))
+        return cls(provider, cache, offline)
+
+    def legs(self, point, hubs, direction="to_hub"):
+        """
+        Road legs between ``point`` and every hub.
+
+        Args:
+            point (tuple): (latitude, longitude) of the shipment endpoint.
+            hubs (list): ``(hub_id, (latitude, longitude))`` pairs.
+            direction (str): ``"to_hub"`` (point -> hub) or ``"from_hub"``.
+
+        Returns:
+            dict: ``{hub_id: (distance_km, time_hours)}`` for every hub.
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown road leg direction '{direction}'")
+        coords = dict(hubs)
+        provider = self.provider
+        query_point, result, missing = point, {}, list(coords)
+        if self.cache is not None:
+            # Cached legs belong to the rounded point, so the provider is asked for that one too.
+            query_point = self.cache.round_point(point)
+            cached = self.cache.get_many(provider.name, direction, query_point, missing)
+            result = {hub: leg for hub, leg in cached.items() if leg is not None}
+            missing = [hub for hub in missing if hub not in cached]
+        fetched = {}
+        if missing:
+            try:
+                fetched = self._matrix(provider, query_point, [coords[hub] for hub in missing], direction, missing)
+            except Exception as e:
+                logger.warning("Road leg request for %d hub(s) failed: %s. Using the offline provider.", len(missing), e)
+                with self._lock:
+                    self.provider_errors += 1
+            else:
+                if self.cache is not None:
+                    self.cache.put_many(provider.name, direction, query_point, fetched)
+            result.update((hub, leg) for hub, leg in fetched.items() if leg is not None)
+        unresolved = [hub for hub in coords if hub not in result]
+        if unresolved:
+            result.update(self._matrix(self.fallback, point, [coords[hub] for hub in unresolved], direction, unresolved))
+        with self._lock:
+            self.lookups += len(coords)
+            if self.cache is not None:
+                self.hits += len(coords) - len(missing)
+                self.misses += len(missing)
+            self.fetched += len(fetched)
+            self.fallbacks += len(unresolved)
+        return result
+
+    @staticmethod
+    def _matrix(provider, point, hub_coords, direction, hubs):
+        if direction == "to_hub":
+            row = provider.matrix([point], hub_coords)[0]
+        else:
+            row = [cell[0] for cell in provider.matrix(hub_coords, [point])]
+        return dict(zip(hubs, row))
+
+    def stats(self):
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "provider": self.provider.name,
+                "cached": self.cache is not None,
+                "entries": len(self.cache) if self.cache is not None else 0,
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / requests, 4) if requests else None,
+                "provider_requests": getattr(self.provider, "requests", 0),
+                "fetched": self.fetched,
+                "provider_errors": self.provider_errors,
+                "fallbacks": self.fallbacks,
+            }
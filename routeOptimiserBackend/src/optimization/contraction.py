@@ -0,0 +1,506 @@
+# src/optimization/contraction.py
+import logging
+import os
+import tempfile
+from heapq import heappush, heappop
+
+import numpy as np
+
+from src.optimization.landmarks import component_factors, edge_objective_weights
+
+logger = logging.getLogger("moa_star")
+
+INF = float("inf")
+
+# Presets whose best route does not depend on the shipment weight: each scales
+# every edge by the same factor, so one hierarchy per preset serves all loads.
+# Cost is per kg plus a fixed border/road charge, so "cost" is searched instead.
+PRESET_WEIGHTS = {
+    "time": (1, 0, 0, 0),
+    "emissions": (0, 0, 1, 0),
+    "logisticsScore": (0.5, 0.0, 0.0, 0.5),
+}
+
+
+class ContractionHierarchy:
+    """
+    Contraction hierarchy over the base graph for one scalarized edge weight.
+
+    Nodes are contracted in order of (edge difference + contracted
+    neighbours); a shortcut ``u -> w`` via ``v`` is only added when a bounded
+    witness search finds no path of equal or lower cost that avoids ``v``.
+    Queries search upward from both ends and meet at the highest node of the
+    shortest path. Shortcuts remember their middle node so paths unpack to
+    base-graph nodes.
+    """
+
+    def __init__(self, weights, rank, arc_src, arc_dst, arc_weight, arc_mid):
+        self.weights = tuple(weights)
+        self.rank = rank
+        n = len(rank)
+        self.up_forward = [[] for _ in range(n)]
+        self.up_backward = [[] for _ in range(n)]
+        self.mid = {}
+        rank_list = rank.tolist()
+        for u, v, w, m in zip(arc_src.tolist(), arc_dst.tolist(), arc_weight.tolist(), arc_mid.tolist()):
+            if rank_list[v] > rank_list[u]:
+                self.up_forward[u].append((v, w))
+            else:
+                self.up_backward[v].append((u, w))
+            if m >= 0:
+                self.mid[(u, v)] = m
+        self._arrays = (arc_src, arc_dst, arc_weight, arc_mid)
+
+    @property
+    def num_nodes(self):
+        return len(self.rank)
+
+    @staticmethod
+    def _witness(source, skip, limit, targets, out, contracted, max_settled):
+        """Bounded Dijkstra from ``source`` avoiding ``skip``; distances to settled ``targets``."""
+        dist = {source: 0.0}
+        found = {}
+        heap = [(0.0, source)]
+        settled = 0
+        while heap and len(found) < len(targets) and settled < max_settled:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            if d > limit:
+                break
+            settled += 1
+            if u in targets:
+                found[u] = d
+            for v, w in out[u].items():
+                if v == skip or contracted[v]:
+                    continue
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    heappush(heap, (nd, v))
+        return found
+
+    @classmethod
+    def build(cls, graph, weights, max_settled=64):
+        """
+        Contract the base nodes of ``graph`` under ``weights`` (time, cost, emissions, customs per kg).
+
+        Args:
+            graph (CompiledGraph): Base graph (overlay edges are ignored).
+            weights (tuple): Objective weights defining the scalar edge cost.
+            max_settled (int): Node budget of each witness search; a smaller
+                budget contracts faster but may add redundant shortcuts.
+        """
+        n = graph.num_base_nodes
+        base_edges = np.arange(graph.indptr[-1])
+        costs = (component_factors(weights, 1)[:, None] * edge_objective_weights(graph, base_edges)).sum(axis=0)
+        out = [{} for _ in range(n)]
+        inn = [{} for _ in range(n)]
+        for u, v, w in zip(graph.edge_src[base_edges].tolist(), graph.edge_dst[base_edges].tolist(), costs.tolist()):
+            if u != v and w < out[u].get(v, INF):
+                out[u][v] = w
+                inn[v][u] = w
+        mid = {}
+        contracted = [False] * n
+        depth = [0] * n
+
+        def shortcuts(v):
+            needed = []
+            ins = [(u, w) for u, w in inn[v].items() if not contracted[u]]
+            outs = [(x, w) for x, w in out[v].items() if not contracted[x]]
+            for u, w_in in ins:
+                targets = {}
+                for x, w_out in outs:
+                    if x == u:
+                        continue
+                    via = w_in + w_out
+                    if out[u].get(x, INF) > via:
+                        targets[x] = via
+                if not targets:
+                    continue
+                found = cls._witness(u, v, max(targets.values()), targets, out, contracted, max_settled)
+                needed.extend((u, x, via) for x, via in targets.items() if found.get(x, INF) > via)
+            return needed, len(ins) + len(outs)
+
+        def priority(v):
+            needed, degree = shortcuts(v)
+            return len(needed) - degree + depth[v], needed
+
+        heap = [(priority(v)[0], v) for v in range(n)]
+        heap.sort()
+        rank = np.zeros(n, dtype=np.int32)
+        order = 0
+        while heap:
+            _, v = heappop(heap)
+            if contracted[v]:
+                continue
+            # Lazy update: re-evaluate and contract only if still the cheapest.
+            prio, needed = priority(v)
+            if heap and prio > heap[0][0]:
+                heappush(heap, (prio, v))
+                continue
+            for u, x, via in needed:
+                if via < out[u].get(x, INF):
+                    out[u][x] = via
+                    inn[x][u] = via
+                    mid[(u, x)] = v
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for nb in list(inn[v]) + list(out[v]):
+                if not contracted[nb]:
+                    depth[nb] = max(depth[nb], depth[v] + 1)
+
+        arcs = [(u, v, w, mid.get((u, v), -1)) for u in range(n) for v, w in out[u].items()]
+        src, dst, weight, middle = zip(*arcs) if arcs else ((), (), (), ())
+        logger.info(f"Built contraction hierarchy for weights {tuple(weights)}: "
+                    f"{len(arcs)} arcs ({len(mid)} shortcuts) over {n} nodes.")
+        return cls(weights, rank, np.array(src, dtype=np.int32), np.array(dst, dtype=np.int32),
+                   np.array(weight, dtype=np.float64), np.array(middle, dtype=np.int32))
+
+    def save(self, path):
+        """Atomically write the hierarchy to ``path`` (``.npz``)."""
+        arc_src, arc_dst, arc_weight, arc_mid = self._arrays
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, weights=np.array(self.weights, dtype=float), rank=self.rank,
+                         arc_src=arc_src, arc_dst=arc_dst, arc_weight=arc_weight, arc_mid=arc_mid)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["weights"].tolist(), data["rank"], data["arc_src"], data["arc_dst"],
+                       data["arc_weight"], data["arc_mid"])
+
+    @classmethod
+    def load_existing(cls, graph, directory, name, weights):
+        """``ch-<name>.npz`` from ``directory`` if it exists and matches ``graph`` and ``weights``, else None."""
+        path = os.path.join(directory, f"ch-{name}.npz")
+        if not os.path.isfile(path):
+            return None
+        try:
+            hierarchy = cls.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Failed to load contraction hierarchy at {path}: {e}.")
+            return None
+        if hierarchy.num_nodes != graph.num_base_nodes or hierarchy.weights != tuple(weights):
+            return None
+        logger.info(f"Loaded contraction hierarchy from {path}.")
+        return hierarchy
+
+    @classmethod
+    def load_or_build(cls, graph, directory, name, weights):
+        """Reuse ``ch-<name>.npz`` in ``directory`` when present, else build and save it."""
+        hierarchy = cls.load_existing(graph, directory, name, weights)
+        if hierarchy is not None:
+            return hierarchy
+        path = os.path.join(directory, f"ch-{name}.npz")
+        hierarchy = cls.build(graph, weights)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            hierarchy.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save contraction hierarchy to {path}: {e}")
+        return hierarchy
+
+    @staticmethod
+    def _upward(start, up):
+        """Complete upward search from ``start``: distances and parent pointers."""
+        dist = {start: 0.0}
+        parent = {start: None}
+        heap = [(0.0, start)]
+        while heap:
+            d, u = heappop(heap)
+            if d > dist[u]:
+                continue
+            for v, w in up[u]:
+                nd = d + w
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    parent[v] = u
+                    heappush(heap, (nd, v))
+        return dist, parent
+
+    def _unpack(self, u, v, out):
+        stack = [(u, v)]
+        while stack:
+            a, b = stack.pop()
+            m = self.mid.get((a, b))
+            if m is None:
+                out.append(b)
+            else:
+                stack.append((m, b))
+                stack.append((a, m))
+
+    def _path(self, source, meet, forward_parent, backward_parent):
+        """Unpack the base-node path ``source -> meet -> target`` from both search trees."""
+        up = []
+        node = meet
+        while node != source:
+            up.append(node)
+            node = forward_parent[node]
+        up.reverse()
+        path = [source]
+        prev = source
+        for node in up:
+            self._unpack(prev, node, path)
+            prev = node
+        node = meet
+        while backward_parent[node] is not None:
+            nxt = backward_parent[node]
+            self._unpack(node, nxt, path)
+            node = nxt
+        return path
+
+    def query(self, source, target):
+        """
+        Shortest path between two base node ids.
+
+        Returns:
+            tuple: ``(distance, path)`` with ``path`` as base node ids, or
+            ``(inf, None)`` when ``target`` is unreachable.
+        """
+        dist = ({source: 0.0}, {target: 0.0})
+        parent = ({source: None}, {target: None})
+        heaps = ([(0.0, source)], [(0.0, target)])
+        graphs = (self.up_forward, self.up_backward)
+        best, meet = (0.0, source) if source == target else (INF, None)
+        side = 0
+        while heaps[0] or heaps[1]:
+            # Alternate directions; stop once neither queue can improve the best meeting point.
+            if not heaps[side] or (heaps[1 - side] and heaps[1 - side][0][0] < heaps[side][0][0]):
+                side = 1 - side
+            d, u = heappop(heaps[side])
+            if d >= best:
+                if not heaps[1 - side] or heaps[1 - side][0][0] >= best:
+                    break
+                continue
+            if d > dist[side][u]:
+                continue
+            other = dist[1 - side].get(u)
+            if other is not None and d + other < best:
+                best, meet = d + other, u
+            for v, w in graphs[side][u]:
+                nd = d + w
+                if nd < dist[side].get(v, INF):
+                    dist[side][v] = nd
+                    parent[side][v] = u
+                    heappush(heaps[side], (nd, v))
+        if meet is None:
+            return INF, None
+        return best, self._path(source, meet, parent[0], parent[1])
+
+    def many_to_many(self, sources, targets):
+        """
+        Shortest paths for every (source, target) pair with one upward search per endpoint.
+
+        Backward searches from the targets fill per-node buckets which each
+        forward search scans, so the cost grows with ``len(sources) + len(targets)``
+        rather than with their product.
+
+        Returns:
+            dict: ``{(source, target): (distance, path)}`` for reachable pairs.
+        """
+        buckets = {}
+        backward_parents = {}
+        for t in dict.fromkeys(targets):
+            dist, parent = self._upward(t, self.up_backward)
+            backward_parents[t] = parent
+            for v, d in dist.items():
+                buckets.setdefault(v, []).append((t, d))
+
+        results = {}
+        for s in dict.fromkeys(sources):
+            dist, parent = self._upward(s, self.up_forward)
+            best = {}
+            for v, d in dist.items():
+                for t, d_back in buckets.get(v, ()):
+                    total = d + d_back
+                    if total < best.get(t, (INF,))[0]:
+                        best[t] = (total, v)
+            for t, (total, meet) in best.items():
+                results[(s, t)] = (total, self._path(s, meet, parent, backward_parents[t]))
+        return results
+
+
+class PresetRouter:
+    """
+    Answers fixed-preset core-route queries from contraction hierarchies.
+
+    Request graphs add custom start/end nodes (with road links to a few hubs)
+    on top of the base graph. Paths may route through them, so each request
+    solves a small graph over the sources, goals, those custom nodes and the
+    hubs they touch, whose base-graph legs come from one many-to-many query.
+    """
+
+    def __init__(self, hierarchies):
+        self.hierarchies = hierarchies
+
+    @classmethod
+    def load(cls, graph, directory):
+        """Router over the saved hierarchies of every preset, or None while any of them is missing."""
+        hierarchies = {}
+        for preset, weights in PRESET_WEIGHTS.items():
+            hierarchy = ContractionHierarchy.load_existing(graph, directory, preset, weights)
+            if hierarchy is None:
+                return None
+            hierarchies[preset] = hierarchy
+        return cls(hierarchies)
+
+    @classmethod
+    def load_or_build(cls, graph, directory):
+        """Router over every preset's hierarchy, building and saving the missing ones."""
+        return cls({preset: ContractionHierarchy.load_or_build(graph, directory, preset, weights)
+                    for preset, weights in PRESET_WEIGHTS.items()})
+
+    def supports(self, preset):
+        return preset in self.hierarchies
+
+    def nearest_preset(self, weights):
+        """The available preset whose weight vector is closest (L1) to ``weights``."""
+        weights = np.asarray(weights, dtype=float)
+        return min(self.hierarchies,
+                   key=lambda preset: np.abs(np.asarray(self.hierarchies[preset].weights, dtype=float) - weights).sum())
+
+    def route(self, graph, preset, sources, goals, weight_kg, max_days, first_mile=None, last_mile=None):
+        """
+        Best route per (source, goal) pair under a preset's weights.
+
+        Args:
+            graph (CompiledGraph): Request graph (base nodes first, then overlay nodes).
+            preset (str): Key of ``PRESET_WEIGHTS``.
+            sources (list): Start node IDs.
+            goals (list): Goal node IDs.
+            weight_kg (float): Shipment weight in kg.
+            max_days (float): Maximum allowed transit time in days.
+            first_mile, last_mile (dict, optional): Road hours before each source
+                and after each goal, counted against ``max_days``.
+
+        Returns:
+            tuple: ``(routes, late)``. ``routes`` maps ``(source, goal)`` to
+            ``(path, metrics)`` like ``MOAStar.moa_star_multi``; ``late`` lists
+            the pairs whose optimal route misses ``max_days`` and must be
+            re-searched with the deadline-aware search.
+        """
+        hierarchy = self.hierarchies[preset]
+        n = hierarchy.num_nodes
+        names = graph.node_ids
+        index = graph.index
+        factors = component_factors(hierarchy.weights, 1)
+        source_ids = list(dict.fromkeys(index[s] for s in sources if s in graph))
+        goal_ids = list(dict.fromkeys(index[g] for g in goals if g in graph))
+
+        # Overlay edges, keeping the cheapest of any parallel edges.
+        overlay = np.arange(graph.indptr[-1], graph.num_edges)
+        overlay_cost = (factors[:, None] * edge_objective_weights(graph, overlay)).sum(axis=0)
+        into, out_of = {}, {}
+        for u, v, w in zip(graph.edge_src[overlay].tolist(), graph.edge_dst[overlay].tolist(), overlay_cost.tolist()):
+            if u < n <= v and w < into.get((u, v), INF):
+                into[(u, v)] = w
+            elif v < n <= u and w < out_of.get((u, v), INF):
+                out_of[(u, v)] = w
+        entries = sorted({u for u, _ in into})
+        exits = sorted({v for _, v in out_of})
+        legs = hierarchy.many_to_many(source_ids + exits, goal_ids + entries) if source_ids and goal_ids else {}
+
+        small = {}
+        for (x, y), (d, _) in legs.items():
+            small.setdefault(x, []).append((y, d))
+        for (u, c), w in into.items():
+            small.setdefault(u, []).append((c, w))
+        for (c, v), w in out_of.items():
+            small.setdefault(c, []).append((v, w))
+
+        routes, late = {}, []
+        first_mile, last_mile = first_mile or {}, last_mile or {}
+        for s in source_ids:
+            dist = {s: 0.0}
+            parent = {s: None}
+            heap = [(0.0, s)]
+            while heap:
+                d, x = heappop(heap)
+                if d > dist[x]:
+                    continue
+                for y, w in small.get(x, ()):
+                    nd = d + w
+                    if nd < dist.get(y, INF):
+                        dist[y] = nd
+                        parent[y] = x
+                        heappush(heap, (nd, y))
+            for g in goal_ids:
+                if g not in dist:
+                    continue
+                hops = [g]
+                while parent[hops[-1]] is not None:
+                    hops.append(parent[hops[-1]])
+                hops.reverse()
+                path = [s]
+                for x, y in zip(hops, hops[1:]):
+                    if x < n and y < n and (x, y) in legs:
+                        path.extend(legs[(x, y)][1][1:])
+                    elif x != y:
+                        path.append(y)
+                if len(set(path)) < len(path):
+                    path = self._drop_cycles(path)
+                metrics = self._metrics(graph, path, factors, weight_kg)
+                pair = (names[s], names[g])
+                if (metrics["time"] + first_mile.get(pair[0], 0.0) + last_mile.get(pair[1], 0.0)) / 24 > max_days:
+                    late.append(pair)
+                    continue
+                routes[pair] = ([names[i] for i in path], metrics)
+        return routes, late
+
+    @staticmethod
+    def _drop_cycles(path):
+        """Remove zero-cost loops that can appear where two legs share a node."""
+        seen = {}
+        result = []
+        for node in path:
+            if node in seen:
+                del result[seen[node] + 1:]
+                seen = {n: i for i, n in enumerate(result)}
+                continue
+            seen[node] = len(result)
+            result.append(node)
+        return result
+
+    @staticmethod
+    def _metrics(graph, path, factors, weight_kg):
+        """Accumulate (time, cost, emissions, customs) along ``path`` exactly as ``MOAStar`` does."""
+        adjacency = graph.adjacency
+        time = cost = emissions = customs = 0
+        for u, v in zip(path, path[1:]):
+            best = None
+            for head, _, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, head_customs in adjacency[u]:
+                if head != v:
+                    continue
+                scalar = (factors[0] * edge_time + factors[1] * edge_cost_per_kg + factors[2] * edge_cost_fixed
+                          + factors[3] * edge_emissions / 1000 + factors[4] * head_customs)
+                if best is None or scalar < best[0]:
+                    best = (scalar, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, head_customs)
+            _, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, head_customs = best
+            time = time + edge_time
+            cost = cost + edge_cost_per_kg * weight_kg + edge_cost_fixed
+            emissions = emissions + edge_emissions * weight_kg / 1000
+            customs = customs + head_customs
+        return {"time": time, "cost": cost, "emissions": emissions, "customs": customs}
+
+
+if __name__ == "__main__":
+    # Offline build for the current snapshot, so servers only load the hierarchies:
+    #     python -m src.optimization.contraction
+    from src.data_processing.graph_builder import GraphBuilder
+    from src.utils.helpers import configure_logging, load_config
+
+    configure_logging()
+    config = load_config()
+    config.setdefault("search", {})["contraction_hierarchies"] = False
+    builder = GraphBuilder(config)
+    builder.build_base()
+    builder.build_hierarchies()
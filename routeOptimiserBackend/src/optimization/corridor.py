@@ -0,0 +1,77 @@
+# src/optimization/corridor.py
+import copy
+import logging
+
+import numpy as np
+
+from src.utils.spatial_index import haversine_matrix
+
+logger = logging.getLogger("moa_star")
+
+
+class Corridor:
+    """
+    Elliptical detour envelope around the great-circle path between two points.
+
+    A node ``v`` lies inside when ``d(o, v) + d(v, t) <= detour_factor * d(o, t)
+    + min_slack_km``, i.e. a route through it is at most that much longer than
+    flying straight. The slack keeps short (e.g. domestic) corridors from
+    collapsing onto the line itself. Searches given ``mask`` never expand nodes
+    outside it.
+    """
+
+    def __init__(self, graph, origin, destination, detour_factor=1.5, min_slack_km=1000,
+                 keep=(), widen_factor=1.5, max_widenings=2, min_routes=10):
+        """
+        Args:
+            graph (CompiledGraph): Request graph.
+            origin, destination (tuple): (latitude, longitude) of the shipment endpoints.
+            detour_factor (float): Allowed path length relative to the great-circle distance.
+            min_slack_km (float): Extra allowance added to every envelope.
+            keep (iterable): Node ids always inside (search sources and goals).
+            widen_factor (float): Multiplier applied to the detour factor and slack by ``widen``.
+            max_widenings (int): Number of ``widen`` steps before the corridor is dropped.
+            min_routes (int): Core routes a search should find before the corridor is accepted.
+        """
+        self.graph = graph
+        self.keep = list(keep)
+        self.widen_factor = widen_factor
+        self.max_widenings = max_widenings
+        self.min_routes = min_routes
+        via = haversine_matrix([origin[0], destination[0]], [origin[1], destination[1]], graph.lat, graph.lon)
+        self._detour_km = via.sum(axis=0)
+        self._direct_km = float(haversine_matrix([origin[0]], [origin[1]], [destination[0]], [destination[1]])[0, 0])
+        self._apply(detour_factor, min_slack_km)
+
+    def _apply(self, detour_factor, min_slack_km):
+        self.detour_factor = detour_factor
+        self.min_slack_km = min_slack_km
+        with np.errstate(invalid="ignore"):
+            inside = self._detour_km <= detour_factor * self._direct_km + min_slack_km
+        inside[np.isnan(self._detour_km)] = True  # nodes without coordinates cannot be judged
+        inside[self.graph.num_base_nodes:] = True  # the request's own start/end nodes
+        inside[self.keep] = True
+        self.mask = inside.tolist()
+        logger.info(f"Corridor x{detour_factor:.2f} (+{min_slack_km:.0f} km) keeps {int(inside.sum())} of {len(inside)} nodes.")
+
+    @classmethod
+    def from_config(cls, graph, origin, destination, keep, config):
+        """A corridor per the ``search.corridor`` settings, or None when disabled."""
+        config = config or {}
+        if not config.get("enabled", False):
+            return None
+        settings = {k: config[k] for k in ("detour_factor", "min_slack_km", "widen_factor",
+                                           "max_widenings", "min_routes") if k in config}
+        return cls(graph, origin, destination, keep=keep, **settings)
+
+    def widen(self):
+        """
+        The next, wider corridor; None once ``max_widenings`` is used up, meaning
+        the search should run unrestricted.
+        """
+        if self.max_widenings <= 0:
+            return None
+        wider = copy.copy(self)
+        wider.max_widenings -= 1
+        wider._apply(self.detour_factor * self.widen_factor, self.min_slack_km * self.widen_factor)
+        return wider
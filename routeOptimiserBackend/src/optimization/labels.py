@@ -0,0 +1,37 @@
+# src/optimization/labels.py
+
+
+class Label:
+    """
+    Compact search label: a node, its accumulated cost vector and a parent pointer.
+
+    Labels never copy the path they extend; the route is rebuilt by walking
+    ``parent`` links, and only for labels that actually reach a goal.
+    """
+
+    __slots__ = ("node", "costs", "parent", "tag", "alive")
+
+    def __init__(self, node, costs, parent=None, tag=0):
+        self.node = node
+        self.costs = costs
+        self.parent = parent
+        self.tag = tag
+        self.alive = True
+
+    @property
+    def origin(self):
+        """Node id of the source this label was grown from."""
+        label = self
+        while label.parent is not None:
+            label = label.parent
+        return label.node
+
+    def path(self, names):
+        """Node names from the source to this label's node."""
+        nodes = []
+        label = self
+        while label is not None:
+            nodes.append(names[label.node])
+            label = label.parent
+        nodes.reverse()
+        return nodes
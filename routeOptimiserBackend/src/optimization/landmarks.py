@@ -0,0 +1,257 @@
+# src/optimization/landmarks.py
+import logging
+import os
+import tempfile
+from heapq import heappush, heappop
+
+import numpy as np
+
+logger = logging.getLogger("moa_star")
+
+# Search objectives bounded per component: cost is ``cost_per_kg * kg + cost_fixed``, so it gets
+# one table per term and the two scale differently with the shipment weight.
+COMPONENTS = ("time", "cost_per_kg", "cost_fixed", "emissions", "customs")
+
+
+def edge_objective_weights(graph, edge_ids):
+    """
+    Per-component weights of ``edge_ids``, one row per entry of ``COMPONENTS``.
+
+    The per-kg cost and emissions grow linearly with weight in the search
+    (``cost_per_kg * kg`` and ``emissions * kg / 1000``), so tables built from
+    these weights are scaled by ``component_factors`` at query time.
+    """
+    per_kg, fixed = graph.cost_terms(edge_ids)
+    return np.stack([
+        graph.time[edge_ids],
+        per_kg,
+        fixed,
+        graph.emissions[edge_ids] / 1000,
+        graph.customs[graph.edge_dst[edge_ids]],
+    ])
+
+
+def component_factors(weights, weight_kg):
+    """Factors turning per-component bounds into the search's scalar for (time, cost, emissions, customs) ``weights``."""
+    w_time, w_cost, w_emissions, w_customs = (float(w) for w in weights)
+    return np.array([w_time, w_cost * weight_kg, w_cost, w_emissions * weight_kg, w_customs])
+
+
+def _dijkstra(num_nodes, heads, weights, source):
+    """Single-source shortest distances over adjacency lists ``heads[u]``/``weights[u]``."""
+    dist = [float("inf")] * num_nodes
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    while heap:
+        d, u = heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, w in zip(heads[u], weights[u]):
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                heappush(heap, (nd, v))
+    return dist
+
+
+class LandmarkTables:
+    """
+    ALT (A*, landmarks, triangle inequality) lower bounds for every search objective.
+
+    For each landmark ``L`` and component of ``COMPONENTS`` the tables hold ``d(L, v)`` and
+    ``d(v, L)`` over the base graph. By the triangle inequality
+    ``d(v, t) >= max(d(L, t) - d(L, v), d(v, L) - d(t, L))``, which gives an
+    admissible and consistent estimate per component; a non-negative weighted
+    sum of them is too. Bounds are stored per kg where the search scales with
+    the shipment weight, so one table serves every request.
+    """
+
+    def __init__(self, landmarks, forward, backward):
+        self.landmarks = landmarks  # node ids, shape (L,)
+        self.forward = forward      # d(L, v), shape (components, L, nodes)
+        self.backward = backward    # d(v, L), shape (components, L, nodes)
+
+    @property
+    def num_nodes(self):
+        return self.forward.shape[2]
+
+    @classmethod
+    def build(cls, graph, num_landmarks=16):
+        """
+        Pick landmarks by farthest-point selection on transit time and run one
+        forward and one reverse Dijkstra per landmark and component.
+
+        Args:
+            graph (CompiledGraph): Base graph (overlay edges are ignored).
+            num_landmarks (int): Number of landmarks to select.
+        """
+        n = graph.num_base_nodes
+        base_edges = np.arange(graph.indptr[-1])
+        src = graph.edge_src[base_edges]
+        dst = graph.edge_dst[base_edges]
+        weights = edge_objective_weights(graph, base_edges)
+
+        def adjacency(tails, heads):
+            order = np.argsort(tails, kind="stable")
+            bounds = np.searchsorted(tails[order], np.arange(n + 1))
+            head_lists = [heads[order[bounds[u]:bounds[u + 1]]].tolist() for u in range(n)]
+            weight_lists = [[w[order[bounds[u]:bounds[u + 1]]].tolist() for u in range(n)] for w in weights]
+            return head_lists, weight_lists
+
+        fwd_heads, fwd_weights = adjacency(src, dst)
+        bwd_heads, bwd_weights = adjacency(dst, src)
+
+        num_landmarks = min(num_landmarks, n)
+        landmarks = []
+        forward = np.full((len(COMPONENTS), num_landmarks, n), np.inf)
+        backward = np.full((len(COMPONENTS), num_landmarks, n), np.inf)
+        separation = np.full(n, np.inf)
+        candidate = 0
+        for i in range(num_landmarks):
+            landmarks.append(candidate)
+            for o in range(len(COMPONENTS)):
+                forward[o, i] = _dijkstra(n, fwd_heads, fwd_weights[o], candidate)
+                backward[o, i] = _dijkstra(n, bwd_heads, bwd_weights[o], candidate)
+            # Next landmark: the node farthest (round-trip time) from all chosen ones.
+            round_trip = forward[0, i] + backward[0, i]
+            separation = np.minimum(separation, np.where(np.isfinite(round_trip), round_trip, -1))
+            separation[landmarks] = -1
+            candidate = int(np.argmax(separation))
+            if separation[candidate] < 0:
+                forward, backward = forward[:, :i + 1], backward[:, :i + 1]
+                break
+        logger.info(f"Built landmark tables: {len(landmarks)} landmarks over {n} nodes.")
+        return cls(np.array(landmarks, dtype=np.int32), forward, backward)
+
+    def save(self, path):
+        """Atomically write the tables to ``path`` (``.npz``)."""
+        fd, tmp_path = tempfile.mkstemp(suffix=".npz", dir=os.path.dirname(path) or ".")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, landmarks=self.landmarks, forward=self.forward, backward=self.backward)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["landmarks"], data["forward"], data["backward"])
+
+    @classmethod
+    def load_or_build(cls, graph, directory, num_landmarks=16):
+        """Reuse ``landmarks-<k>.npz`` in ``directory`` when present, else build and save it."""
+        path = os.path.join(directory, f"landmarks-{num_landmarks}.npz")
+        if os.path.isfile(path):
+            try:
+                tables = cls.load(path)
+                if tables.num_nodes == graph.num_base_nodes and len(tables.forward) == len(COMPONENTS):
+                    logger.info(f"Loaded landmark tables from {path}.")
+                    return tables
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Failed to load landmark tables at {path}: {e}. Rebuilding.")
+        tables = cls.build(graph, num_landmarks)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            tables.save(path)
+        except OSError as e:
+            logger.warning(f"Could not save landmark tables to {path}: {e}")
+        return tables
+
+    def _bounds_to(self, targets):
+        """Per-component ALT bounds from every base node to the nearest of ``targets``, shape (components, nodes)."""
+        forward, backward = self.forward, self.backward
+        nearest = forward[:, :, targets].min(axis=2)[:, :, None]    # min_t d(L, t)
+        farthest = backward[:, :, targets].max(axis=2)[:, :, None]  # max_t d(t, L)
+        with np.errstate(invalid="ignore"):
+            # Unknown (infinite) distances contribute no information, except that a
+            # node which cannot reach a landmark every target reaches is a dead end.
+            ahead = np.where(np.isfinite(forward), nearest - forward, 0)
+            behind = np.where(np.isfinite(farthest), backward - farthest, 0)
+        return np.maximum(np.maximum(ahead, behind).max(axis=1), 0)
+
+    def pair_bounds(self, sources, targets):
+        """
+        Per-component ALT bounds on ``d(sources[i], targets[i])`` over the base graph.
+
+        Returns:
+            np.ndarray: Bounds of shape (components, len(sources)).
+        """
+        sources = np.asarray(sources, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.int64)
+        forward_s, forward_t = self.forward[:, :, sources], self.forward[:, :, targets]
+        backward_s, backward_t = self.backward[:, :, sources], self.backward[:, :, targets]
+        with np.errstate(invalid="ignore"):
+            ahead = np.where(np.isfinite(forward_s), forward_t - forward_s, 0)
+            behind = np.where(np.isfinite(backward_t), backward_s - backward_t, 0)
+        return np.maximum(np.maximum(ahead, behind).max(axis=1), 0)
+
+    def goal_bounds(self, graph, goal_ids):
+        """
+        Per-component lower bounds from every node of a request graph to the goal set.
+
+        Request graphs add custom start/end nodes whose road links can act as
+        shortcuts between hubs, which base-graph tables cannot see. A path that
+        uses one enters it from some hub ``a`` and its suffix after the last
+        custom node starts with an edge ``C -> b``, so it costs at least
+        ``lb(v, a) + w(a, C) + min(w(C, b) + h(b))``; taking the minimum with
+        that keeps the bound admissible and consistent.
+
+        Args:
+            graph (CompiledGraph): Request graph whose first nodes are the base nodes.
+            goal_ids (iterable): Goal node ids (base nodes only).
+
+        Returns:
+            np.ndarray: Bounds of shape (components, len(graph)); ``inf`` marks
+            nodes that cannot reach any goal.
+        """
+        n = self.num_nodes
+        bounds = self._bounds_to(np.fromiter(goal_ids, dtype=np.int64))
+        overlay_edges = np.arange(graph.indptr[-1], graph.num_edges)
+        if len(graph) == n or len(overlay_edges) == 0:
+            return np.concatenate([bounds, np.full((len(COMPONENTS), len(graph) - n), np.inf)], axis=1)
+
+        weights = edge_objective_weights(graph, overlay_edges)
+        src = graph.edge_src[overlay_edges]
+        dst = graph.edge_dst[overlay_edges]
+        into = (dst >= n) & (src < n)
+        out_of = (src >= n) & (dst < n)
+        # Cheapest continuation after leaving a custom node.
+        exit_cost = (weights[:, out_of] + bounds[:, dst[out_of]]).min(axis=1, initial=np.inf)
+        # Cheapest way to reach any custom node from each base node.
+        entry_cost = np.full((len(COMPONENTS), n), np.inf)
+        for a, w in zip(src[into].tolist(), weights[:, into].T):
+            entry_cost = np.minimum(entry_cost, self._bounds_to(np.array([a])) + w[:, None])
+        bounds = np.minimum(bounds, entry_cost + exit_cost[:, None])
+        custom = np.repeat(exit_cost[:, None], len(graph) - n, axis=1)
+        return np.concatenate([bounds, custom], axis=1)
+
+    def heuristic(self, graph, goal_ids, weights, weight_kg):
+        """
+        Scalarized lower bound per node for the weighted search objective.
+
+        Returns:
+            list: One float per node of ``graph``; ``inf`` for nodes that cannot
+            reach a goal.
+        """
+        bounds = self.goal_bounds(graph, goal_ids)
+        factors = component_factors(weights, weight_kg)
+        used = factors > 0
+        estimate = (factors[used, None] * bounds[used]).sum(axis=0)
+        # Every component shares the same topology, so reachability follows time.
+        estimate[~np.isfinite(bounds[0])] = np.inf
+        return estimate.tolist()
+
+
+if __name__ == "__main__":
+    from src.data_processing.graph_builder import GraphBuilder
+    from src.utils.helpers import load_config
+    builder = GraphBuilder(load_config())
+    builder.build_base()
+    tables = LandmarkTables.build(builder.compiled, 16)
+    graph = builder.compiled
+    goal = graph.index[graph.node_ids[-1]]
+    h = tables.goal_bounds(graph, [goal])
+    print(f"{len(tables.landmarks)} landmarks; time bound from node 0 to {graph.node_ids[goal]}: {h[0, 0]:.1f} h")
@@ -1,116 +1,505 @@
 # src/optimization/moa_star.py
 import logging
-import logging.config
-import yaml
-from heapq import heappush, heappop
-from src.utils.geocoding import GeocodingUtils
-import os
-
-os.makedirs("logs", exist_ok=True)
-try:
-    with open("config/logging_config.yaml", "r") as f:
-        config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-except FileNotFoundError:
-    logging.basicConfig(level=logging.INFO)
+from heapq import heapify, heappush, heappop
+from src.data_processing.compiled_graph import CompiledGraph
+from src.optimization.labels import Label
+from src.optimization.pareto import DeadlineFrontier, ParetoSet
+from src.utils.helpers import LogSampler
+
 logger = logging.getLogger("moa_star")
 
 class MOAStar:
-    def __init__(self, G):
-        self.G = G
-        self.geo_utils = GeocodingUtils()
+    # Labels popped between checks of the request budget.
+    BUDGET_CHECK_INTERVAL = 64
+    # Per-edge debug lines (pruned labels) logged per search: the first few, then one in N.
+    DEBUG_SAMPLE_BURST = 5
+    DEBUG_SAMPLE_EVERY = 1000
+
+    def __init__(self, G, landmarks=None, corridor=None, budget=None, trace=None):
+        # Accept a networkx graph/overlay for convenience, but always search the compiled form.
+        self.graph = G if isinstance(G, CompiledGraph) else CompiledGraph.from_networkx(G)
+        self.G = self.graph
+        self.landmarks = landmarks
+        # Optional per-node booleans (see Corridor.mask); nodes outside are never expanded.
+        self.corridor = corridor
+        # Optional Budget; searches stop early and return what they have once it is spent.
+        self.budget = budget
+        # Optional RequestTrace; with events on, searches record start/settle/stop/end events in it.
+        self.trace = trace
+        self._heuristic_cache = {}
+        self._remaining_time_cache = {}
+        # Work done by this searcher's searches, summed (heap_peak is the maximum).
+        self.stats = {"searches": 0, "pairs": 0, "expanded": 0, "pushed": 0, "pruned": 0,
+                      "dominance_checks": 0, "heap_peak": 0}
+
+    def _record_stats(self, pairs, expanded, pushed, pruned, dominance_checks, heap_peak):
+        stats = self.stats
+        stats["searches"] += 1
+        stats["pairs"] += pairs
+        stats["expanded"] += expanded
+        stats["pushed"] += pushed
+        stats["pruned"] += pruned
+        stats["dominance_checks"] += dominance_checks
+        stats["heap_peak"] = max(stats["heap_peak"], heap_peak)
+
+    @property
+    def tracing(self):
+        return self.trace is not None and self.trace.events is not None
 
     def dominates(self, cost1, cost2):
         return all(c1 <= c2 for c1, c2 in zip(cost1, cost2)) and any(c1 < c2 for c1, c2 in zip(cost1, cost2))
 
-    def heuristic(self, node, goal, weights):
+    def goal_heuristic(self, goal_ids, weights, weight_kg):
+        """
+        Admissible estimate of the remaining weighted cost from every node to the goal set.
+
+        Uses the precomputed landmark tables, scaled by ``weight_kg``; results
+        are cached per (goals, weights, weight) for the lifetime of this
+        searcher. Without tables (or for goals outside the base graph) the
+        estimate is zero, which turns the search into Dijkstra.
+
+        Returns:
+            list: One value per node id; ``inf`` for nodes that cannot reach a goal.
+        """
+        goal_ids = tuple(sorted(goal_ids))
+        key = (goal_ids, tuple(weights), weight_kg)
+        estimate = self._heuristic_cache.get(key)
+        if estimate is None:
+            tables = self.landmarks
+            if tables is None or tables.num_nodes != self.graph.num_base_nodes or goal_ids[-1] >= tables.num_nodes:
+                estimate = [0.0] * len(self.graph)
+            else:
+                estimate = tables.heuristic(self.graph, goal_ids, weights, weight_kg)
+            self._heuristic_cache[key] = estimate
+        return estimate
+
+    def remaining_time(self, goal_ids, last_mile=None):
+        """
+        Minimum transit time (hours) from every node to the nearest goal.
+
+        One reverse Dijkstra over edge times from the whole goal set, cached per
+        goal set. A label whose elapsed time plus this bound exceeds the deadline
+        can never reach a goal in time. With a corridor, nodes outside it (and
+        nodes that can only reach a goal through them) get ``inf``, which is how
+        every search below keeps to the corridor.
+
+        Args:
+            goal_ids (iterable): Goal node ids.
+            last_mile (dict, optional): Goal id -> hours still needed after the
+                goal (its road leg to the delivery point); the search starts
+                from these instead of zero.
+
+        Returns:
+            list: One value per node id; ``inf`` where no goal is reachable.
+        """
+        last_mile = last_mile or {}
+        goal_ids = tuple(sorted(goal_ids))
+        key = (goal_ids, tuple(last_mile.get(g, 0.0) for g in goal_ids))
+        remaining = self._remaining_time_cache.get(key)
+        if remaining is None:
+            reverse = self.graph.reverse_time_adjacency()
+            corridor = self.corridor
+            remaining = [float("inf")] * len(self.graph)
+            heap = [(last_mile.get(g, 0.0), g) for g in goal_ids]
+            heapify(heap)
+            for t, g in heap:
+                remaining[g] = t
+            while heap:
+                t, v = heappop(heap)
+                if t > remaining[v]:
+                    continue
+                for u, edge_time in reverse[v]:
+                    nt = t + edge_time
+                    if nt < remaining[u] and (corridor is None or corridor[u]):
+                        remaining[u] = nt
+                        heappush(heap, (nt, u))
+            self._remaining_time_cache[key] = remaining
+        return remaining
+
+    def heuristic(self, node, goal, weights, weight_kg):
         """
         Heuristic function estimating the cost from node to goal.
         
         Args:
-            node (str): Current node ID.
-            goal (str): Goal node ID.
+            node (str or int): Current node ID.
+            goal (str or int): Goal node ID.
             weights (list): Weights for [time, cost, emissions, customs].
+            weight_kg (float): Shipment weight in kg.
         
         Returns:
-            float: Weighted heuristic score.
+            float: Weighted lower bound on the remaining cost.
         """
-        node_coords = self.geo_utils.get_node_coords(self.G.nodes[node])
-        goal_coords = self.geo_utils.get_node_coords(self.G.nodes[goal])
-        
-        if not node_coords or not goal_coords:
-            logger.debug(f"Using zero heuristic for {node} -> {goal} due to missing coordinates.")
-            return 0
-        
-        distance_km = self.geo_utils.haversine_distance(node_coords, goal_coords)
-        # Estimate time (hours) using a fast speed (e.g., plane at 800 km/h)
-        time_h = distance_km / 800
-        # Estimate cost (USD) using a low cost per kg (e.g., 0.01 USD/kg) * 1000 kg
-        cost = distance_km * 0.01 * 1000
-        # Estimate emissions (g CO₂) using a low emission factor (e.g., 10 g/tonne-km) * 1000 kg
-        emissions = distance_km * 10 * 1000 / 1000  # Convert to kg
-        # Estimate customs as minimal (e.g., 1)
-        customs = 1
-        
-        heuristic_costs = (time_h, cost, emissions, customs)
-        return sum(w * c for w, c in zip(weights, heuristic_costs))
+        index = self.graph.index
+        node_id = index[node] if isinstance(node, str) else node
+        goal_id = index[goal] if isinstance(goal, str) else goal
+        return self.goal_heuristic([goal_id], weights, weight_kg)[node_id]
+
+    def moa_star(self, start, goal, weights, weight_kg, max_days, first_mile=0.0, last_mile=0.0):
+        """
+        Best route from ``start`` to ``goal`` under ``weights`` that meets ``max_days``.
 
-    def moa_star(self, start, goal, weights, weight_kg, max_days):
-        if start not in self.G or goal not in self.G:
-            logger.warning(f"Start {start} or goal {goal} not in graph.")
+        The deadline covers the whole shipment: ``first_mile`` hours before
+        ``start`` and ``last_mile`` hours after ``goal`` (the road legs to the
+        pickup and delivery points) count against it. Each node keeps the
+        labels that are non-dominated on (time, score), and is expanded again
+        only by a faster label than the ones already expanded there: a slower
+        one cannot lead anywhere the earlier, cheaper label could not.
+
+        Returns:
+            tuple: ``(path, metrics)`` of the core route, or ``(None, None)``.
+        """
+        graph = self.graph
+        if start not in graph or goal not in graph:
+            logger.warning("Start %s or goal %s not in graph.", start, goal)
             return None, None
-        
-        open_set = [(0, start, [start], (0, 0, 0, 0))]  # (f_score, node, path, costs: time, cost, emissions, customs)
-        closed_set = set()
-        pareto_frontier = {}
+
+        names = graph.node_ids
+        adjacency = graph.adjacency
+        start_id = graph.index[start]
+        goal_id = graph.index[goal]
+        w_time, w_cost, w_emissions, w_customs = weights
+        estimate = self.goal_heuristic([goal_id], weights, weight_kg)
+        deadline = max_days * 24 - first_mile
+        remaining = self.remaining_time([goal_id], {goal_id: last_mile})
+
+        open_set = [(0, start, 0, Label(start_id, (0, 0, 0, 0)))]  # (f_score, node, push order, label)
+        counter = 1
+        closed_set = {}  # node -> time of the fastest label expanded there
+        frontiers = {}
+        budget = self.budget
+        pops = pruned = peak = 0
+        debug = logger.isEnabledFor(logging.DEBUG)
+        skipped = LogSampler(self.DEBUG_SAMPLE_EVERY, self.DEBUG_SAMPLE_BURST)
 
         while open_set:
-            f_score, current, path, costs = heappop(open_set)
-            if current in closed_set:
+            pops += 1
+            if len(open_set) > peak:
+                peak = len(open_set)
+            if budget is not None and pops % self.BUDGET_CHECK_INTERVAL == 0 and budget.spent():
+                logger.warning("Search from %s to %s stopped early (%s).", start, goal, budget.reason)
+                self._record_stats(1, len(closed_set), counter - 1, pruned, sum(f.checks for f in frontiers.values()), peak)
+                self._end_search("moa_star", budget.reason, start, goal, len(closed_set), pruned, skipped)
+                return None, None
+            f_score, current, _, label = heappop(open_set)
+            current_id = label.node
+            costs = label.costs
+            if not label.alive or closed_set.get(current_id, float("inf")) <= costs[0]:
                 continue
 
-            if current == goal:
-                total_time_days = costs[0] / 24
+            if current_id == goal_id:
+                total_time_days = (costs[0] + first_mile + last_mile) / 24
                 if total_time_days <= max_days:
-                    logger.debug(f"Valid path found: {path}, Costs: {costs}")
+                    path = label.path(names)
+                    logger.debug("Valid path found: %s, Costs: %s", path, costs)
+                    self._record_stats(1, len(closed_set), counter - 1, pruned, sum(f.checks for f in frontiers.values()), peak)
+                    self._end_search("moa_star", "found", start, goal, len(closed_set), pruned, skipped)
                     return path, {"time": costs[0], "cost": costs[1], "emissions": costs[2], "customs": costs[3]}
                 else:
-                    logger.debug(f"Path to {goal} exceeds max_days: {total_time_days} > {max_days}")
+                    logger.debug("Path to %s exceeds max_days: %s > %s", goal, total_time_days, max_days)
+                    continue
+
+            closed_set[current_id] = costs[0]
+            time_so_far, cost_so_far, emissions_so_far, customs_so_far = costs
+            for neighbor_id, _, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, neighbor_customs in adjacency[current_id]:
+                new_time = time_so_far + edge_time
+                if closed_set.get(neighbor_id, float("inf")) <= new_time:
                     continue
+                if new_time + remaining[neighbor_id] > deadline:
+                    if debug and skipped.sample():
+                        logger.debug("Skipping %s -> %s: cannot reach %s within %s days.",
+                                     names[current_id], names[neighbor_id], goal, max_days)
+                    pruned += 1
+                    continue
+                h_score = estimate[neighbor_id]
+                if h_score == float("inf"):
+                    pruned += 1
+                    continue  # no goal is reachable from this neighbour
+
+                new_costs = (new_time,
+                             cost_so_far + edge_cost_per_kg * weight_kg + edge_cost_fixed,
+                             emissions_so_far + edge_emissions * weight_kg / 1000,
+                             customs_so_far + neighbor_customs)
+                g_score = w_time * new_costs[0] + w_cost * new_costs[1] + w_emissions * new_costs[2] + w_customs * new_costs[3]
 
-            closed_set.add(current)
-            for neighbor, edge_data_dict in self.G[current].items():
-                for edge_key, edge_data in edge_data_dict.items():
-                    if neighbor in closed_set:
-                        continue
-                    
-                    new_time = costs[0] + edge_data["time"]
-                    if new_time / 24 > max_days:
-                        logger.debug(f"Skipping {current} -> {neighbor}: Time {new_time/24:.2f} days exceeds {max_days}.")
-                        continue
-                    
-                    new_cost = costs[1] + (edge_data["transportation_cost_per_kg"] + edge_data["border_cost"]) * weight_kg
-                    new_emissions = costs[2] + edge_data["emissions"] * weight_kg / 1000
-                    new_customs = costs[3] + self.G.nodes[neighbor].get("customs_score", 0)
-                    new_costs = (new_time, new_cost, new_emissions, new_customs)
-
-                    if neighbor in pareto_frontier:
-                        if any(self.dominates(existing_costs, new_costs) for existing_costs in pareto_frontier[neighbor]):
-                            continue
-                        pareto_frontier[neighbor] = [c for c in pareto_frontier[neighbor] if not self.dominates(new_costs, c)]
-                        pareto_frontier[neighbor].append(new_costs)
-                    else:
-                        pareto_frontier[neighbor] = [new_costs]
-
-                    new_path = path + [neighbor]
-                    g_score = sum(w * c for w, c in zip(weights, new_costs))
-                    h_score = self.heuristic(neighbor, goal, weights)
-                    f_score = g_score + h_score
-                    heappush(open_set, (f_score, neighbor, new_path, new_costs))
-
-        logger.info(f"No valid path found from {start} to {goal} within {max_days} days.")
+                new_label = Label(neighbor_id, new_costs, label)
+                frontier = frontiers.get(neighbor_id)
+                if frontier is None:
+                    frontier = frontiers[neighbor_id] = DeadlineFrontier()
+                if not frontier.insert(new_time, g_score, new_label):
+                    pruned += 1
+                    continue
+                heappush(open_set, (g_score + h_score, names[neighbor_id], counter, new_label))
+                counter += 1
+
+        logger.info("No valid path found from %s to %s within %s days.", start, goal, max_days)
+        self._record_stats(1, len(closed_set), counter - 1, pruned, sum(f.checks for f in frontiers.values()), peak)
+        self._end_search("moa_star", "exhausted", start, goal, len(closed_set), pruned, skipped)
         return None, None
 
+    def _end_search(self, search, outcome, start, goal, expanded, pruned, skipped):
+        """Summary debug line for the sampled per-edge events, and the trace event of a single-pair search."""
+        if skipped.seen > skipped.burst:
+            logger.debug("%s -> %s: %d deadline prunes, the first %d and one in %d logged.",
+                         start, goal, skipped.seen, skipped.burst, skipped.every)
+        if self.tracing:
+            self.trace.event("search_end", search=search, outcome=outcome, start=start, goal=goal,
+                             expanded=expanded, pruned=pruned)
+
+    def moa_star_multi(self, sources, goals, weights, weight_kg, max_days, per_source=True,
+                       first_mile=None, last_mile=None):
+        """
+        One best-first pass from every source to every goal.
+
+        Labels are ordered by their scalarized cost plus a landmark lower bound
+        to the nearest goal, and a goal is recorded the first time it is settled
+        within the deadline; the search keeps expanding through it so
+        goals behind it are found in the same pass. It stops once every
+        requested result is settled, or early with the results settled so far
+        when the searcher's budget is spent. As in ``moa_star``, the deadline
+        includes the first- and last-mile legs and a node is expanded again
+        only by a faster label.
+
+        Args:
+            sources (list): Start node IDs.
+            goals (list): Goal node IDs.
+            weights (list): Weights for [time, cost, emissions, customs].
+            weight_kg (float): Shipment weight in kg.
+            max_days (float): Maximum allowed transit time in days.
+            per_source (bool): If True, labels are tagged with their source and the
+                best route is returned for every reachable (source, goal) pair, as
+                separate ``moa_star`` calls would. If False, sources share one
+                frontier and only the best route per goal (from any source) is kept.
+            first_mile (dict, optional): Source ID -> road hours from the pickup
+                point to it, spent before the search starts there.
+            last_mile (dict, optional): Goal ID -> road hours from it to the
+                delivery point, still needed after the goal.
+
+        Returns:
+            dict: ``{(source, goal): (path, metrics)}``; with ``per_source=False``
+            the source is the start of the winning path. Metrics cover the core
+            route only.
+        """
+        graph = self.graph
+        names = graph.node_ids
+        adjacency = graph.adjacency
+        source_ids = list(dict.fromkeys(graph.index[s] for s in sources if s in graph))
+        goal_ids = {graph.index[g] for g in goals if g in graph}
+        if not source_ids or not goal_ids:
+            logger.warning("No valid sources or goals in graph for multi-target search.")
+            return {}
+        tracing = self.tracing
+        if tracing:
+            self.trace.event("search_start", search="multi", sources=len(source_ids), goals=len(goal_ids),
+                             weights=list(weights), max_days=max_days, corridor=self.corridor is not None)
+
+        w_time, w_cost, w_emissions, w_customs = weights
+        estimate = self.goal_heuristic(goal_ids, weights, weight_kg)
+        lead = {s: (first_mile or {}).get(names[s], 0.0) for s in source_ids}
+        tail = {g: (last_mile or {}).get(names[g], 0.0) for g in goal_ids}
+        # Core hours each frontier may spend; a shared frontier gets the loosest source's.
+        limits = ({s: max_days * 24 - lead[s] for s in source_ids} if per_source
+                  else {0: max_days * 24 - min(lead.values())})
+        remaining = self.remaining_time(goal_ids, tail)
+        # A label's tag identifies the frontier it belongs to: its source, or a shared 0.
+        open_set = [(estimate[s], names[s], i, Label(s, (0, 0, 0, 0), tag=s if per_source else 0))
+                    for i, s in enumerate(source_ids)]
+        heapify(open_set)
+        counter = len(open_set)
+        closed_set = {}  # (tag, node) -> time of the fastest label expanded there
+        frontiers = {}
+        results = {}
+        pending = len(source_ids) * len(goal_ids) if per_source else len(goal_ids)
+        budget = self.budget
+        pops = pruned = peak = 0
+
+        while open_set and pending:
+            pops += 1
+            if len(open_set) > peak:
+                peak = len(open_set)
+            if budget is not None and pops % self.BUDGET_CHECK_INTERVAL == 0 and budget.spent():
+                logger.warning("Multi-target search stopped early (%s); returning the routes settled so far.",
+                               budget.reason)
+                if tracing:
+                    self.trace.event("search_stopped", search="multi", reason=budget.reason, settled=len(results))
+                break
+            f_score, current, _, label = heappop(open_set)
+            current_id, costs, tag = label.node, label.costs, label.tag
+            state = (tag, current_id)
+            if not label.alive or closed_set.get(state, float("inf")) <= costs[0]:
+                continue
+
+            if current_id in goal_ids:
+                key = (names[tag], current) if per_source else current
+                if key not in results and (costs[0] + lead[tag if per_source else label.origin]
+                                           + tail[current_id]) / 24 <= max_days:
+                    path = label.path(names)
+                    results[key] = (path, {"time": costs[0], "cost": costs[1], "emissions": costs[2], "customs": costs[3]})
+                    pending -= 1
+                    if tracing:
+                        self.trace.event("goal_settled", source=path[0], goal=current, hops=len(path) - 1,
+                                         costs=[round(c, 3) for c in costs], expanded=len(closed_set))
+
+            closed_set[state] = costs[0]
+            limit = limits[tag]
+            time_so_far, cost_so_far, emissions_so_far, customs_so_far = costs
+            for neighbor_id, _, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, neighbor_customs in adjacency[current_id]:
+                neighbor_state = (tag, neighbor_id)
+                new_time = time_so_far + edge_time
+                if closed_set.get(neighbor_state, float("inf")) <= new_time:
+                    continue
+                if new_time + remaining[neighbor_id] > limit:
+                    pruned += 1
+                    continue
+                h_score = estimate[neighbor_id]
+                if h_score == float("inf"):
+                    pruned += 1
+                    continue
+
+                new_costs = (new_time,
+                             cost_so_far + edge_cost_per_kg * weight_kg + edge_cost_fixed,
+                             emissions_so_far + edge_emissions * weight_kg / 1000,
+                             customs_so_far + neighbor_customs)
+                new_g = w_time * new_costs[0] + w_cost * new_costs[1] + w_emissions * new_costs[2] + w_customs * new_costs[3]
+
+                new_label = Label(neighbor_id, new_costs, label, tag)
+                frontier = frontiers.get(neighbor_state)
+                if frontier is None:
+                    frontier = frontiers[neighbor_state] = DeadlineFrontier()
+                if not frontier.insert(new_time, new_g, new_label):
+                    pruned += 1
+                    continue
+                heappush(open_set, (new_g + h_score, names[neighbor_id], counter, new_label))
+                counter += 1
+
+        checks = sum(f.checks for f in frontiers.values())
+        self._record_stats(len(source_ids) * len(goal_ids), len(closed_set), counter - len(source_ids),
+                           pruned, checks, peak)
+        if tracing:
+            self.trace.event("search_end", search="multi", settled=len(results), expanded=len(closed_set),
+                             pushed=counter - len(source_ids), pruned=pruned, dominance_checks=checks, heap_peak=peak)
+        if per_source:
+            logger.info("Multi-target search settled %d of %d (source, goal) pairs after %d expansions.",
+                        len(results), len(source_ids) * len(goal_ids), len(closed_set))
+            return results
+        logger.info("Multi-target search reached %d of %d goals after %d expansions.",
+                    len(results), len(goal_ids), len(closed_set))
+        return {(path[0], goal): (path, metrics) for goal, (path, metrics) in results.items()}
+
+    def pareto_search(self, sources, goals, weight_kg, max_days, per_source=True, epsilon=0.0, max_labels_per_node=None,
+                      first_mile=None, last_mile=None):
+        """
+        Multi-objective search returning every non-dominated route to each goal.
+
+        Labels are expanded in lexicographic (time, cost, emissions, customs)
+        order, so a label that survives until it is popped can no longer be
+        dominated. Each node keeps a ``ParetoSet`` sorted on time; dominated
+        labels are dropped on insertion and evicted ones are skipped when popped.
+
+        Args:
+            sources (list): Start node IDs.
+            goals (list): Goal node IDs.
+            weight_kg (float): Shipment weight in kg.
+            max_days (float): Maximum allowed transit time in days.
+            per_source (bool): Keep a separate frontier per source, so the result
+                holds the non-dominated routes for every (source, goal) pair.
+            epsilon (float): Relative tolerance for epsilon-dominance; 0 keeps the
+                exact frontier, which can grow very large on dense graphs.
+            max_labels_per_node (int, optional): Cap on labels per node frontier;
+                ``None`` leaves frontiers unbounded.
+            first_mile, last_mile (dict, optional): Road hours before each source
+                and after each goal, counted against ``max_days`` as in ``moa_star_multi``.
+
+        Returns:
+            dict: ``{(source, goal): [(path, metrics), ...]}`` with routes in
+            lexicographic cost order.
+        """
+        graph = self.graph
+        names = graph.node_ids
+        adjacency = graph.adjacency
+        source_ids = list(dict.fromkeys(graph.index[s] for s in sources if s in graph))
+        goal_ids = {graph.index[g] for g in goals if g in graph}
+        if not source_ids or not goal_ids:
+            logger.warning("No valid sources or goals in graph for Pareto search.")
+            return {}
+        tracing = self.tracing
+        if tracing:
+            self.trace.event("search_start", search="pareto", sources=len(source_ids), goals=len(goal_ids),
+                             max_days=max_days, epsilon=epsilon, max_labels_per_node=max_labels_per_node,
+                             corridor=self.corridor is not None)
+
+        lead = {s: (first_mile or {}).get(names[s], 0.0) for s in source_ids}
+        tail = {g: (last_mile or {}).get(names[g], 0.0) for g in goal_ids}
+        limits = ({s: max_days * 24 - lead[s] for s in source_ids} if per_source
+                  else {0: max_days * 24 - min(lead.values())})
+        remaining = self.remaining_time(goal_ids, tail)
+        frontiers = {}
+        open_set = []
+        counter = 0
+        for s in source_ids:
+            label = Label(s, (0, 0, 0, 0), tag=s if per_source else 0)
+            frontiers.setdefault((label.tag, s), ParetoSet(epsilon)).insert(label)
+            open_set.append((label.costs, counter, label))
+            counter += 1
+        heapify(open_set)
+        results = {}
+        expanded = 0
+        budget = self.budget
+        pops = pruned = peak = 0
+
+        while open_set:
+            pops += 1
+            if len(open_set) > peak:
+                peak = len(open_set)
+            if budget is not None and pops % self.BUDGET_CHECK_INTERVAL == 0 and budget.spent():
+                logger.warning("Pareto search stopped early (%s); returning the frontier found so far.", budget.reason)
+                if tracing:
+                    self.trace.event("search_stopped", search="pareto", reason=budget.reason, expanded=expanded)
+                break
+            costs, _, label = heappop(open_set)
+            if not label.alive:
+                continue
+            current_id = label.node
+            expanded += 1
+
+            if current_id in goal_ids:
+                origin = label.tag if per_source else label.origin
+                if (costs[0] + lead[origin] + tail[current_id]) / 24 <= max_days:
+                    path = label.path(names)
+                    results.setdefault((path[0], names[current_id]), []).append(
+                        (path, {"time": costs[0], "cost": costs[1], "emissions": costs[2], "customs": costs[3]}))
+
+            limit = limits[label.tag]
+            time_so_far, cost_so_far, emissions_so_far, customs_so_far = costs
+            for neighbor_id, _, edge_time, edge_cost_per_kg, edge_cost_fixed, edge_emissions, neighbor_customs in adjacency[current_id]:
+                new_time = time_so_far + edge_time
+                if new_time + remaining[neighbor_id] > limit:
+                    pruned += 1
+                    continue
+                new_costs = (new_time,
+                             cost_so_far + edge_cost_per_kg * weight_kg + edge_cost_fixed,
+                             emissions_so_far + edge_emissions * weight_kg / 1000,
+                             customs_so_far + neighbor_customs)
+                key = (label.tag, neighbor_id)
+                frontier = frontiers.get(key)
+                if frontier is None:
+                    frontier = frontiers[key] = ParetoSet(epsilon)
+                new_label = Label(neighbor_id, new_costs, label, label.tag)
+                if frontier.insert(new_label, max_labels_per_node):
+                    heappush(open_set, (new_costs, counter, new_label))
+                    counter += 1
+                else:
+                    pruned += 1
+
+        checks = sum(f.checks for f in frontiers.values())
+        routes = sum(len(r) for r in results.values())
+        self._record_stats(len(source_ids) * len(goal_ids), expanded, counter - len(source_ids), pruned, checks, peak)
+        if tracing:
+            self.trace.event("search_end", search="pareto", routes=routes, pairs=len(results), expanded=expanded,
+                             pushed=counter - len(source_ids), pruned=pruned, dominance_checks=checks, heap_peak=peak)
+        logger.info("Pareto search: %d labels expanded, %d dominance checks, "
+                    "%d non-dominated routes over %d (source, goal) pairs.", expanded, checks, routes, len(results))
+        return results
+
 if __name__ == "__main__":
     # Example usage would go here
     pass
\ No newline at end of file
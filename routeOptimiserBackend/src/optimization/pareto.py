@@ -0,0 +1,125 @@
+# src/optimization/pareto.py
+from bisect import bisect_left, bisect_right
+
+
+class ParetoSet:
+    """
+    Non-dominated ``Label`` objects at one node, kept sorted by the first objective (time).
+
+    A new label can only be dominated by labels whose time is not larger, and
+    can only dominate labels whose time is not smaller, so each insertion
+    scans one side of the sorted list instead of the whole set. Dominance is
+    weak (ties count as dominated) so duplicate cost vectors are not kept.
+
+    With ``epsilon > 0`` a new label is also rejected when an existing one is
+    within a factor ``1 + epsilon`` of it on every objective. The kept set is
+    then an epsilon-approximate frontier: every exact Pareto route has a kept
+    route at most ``1 + epsilon`` times worse on each objective, which keeps
+    frontiers small on densely connected graphs.
+    """
+
+    __slots__ = ("keys", "labels", "checks", "slack")
+
+    def __init__(self, epsilon=0.0):
+        self.keys = []
+        self.labels = []
+        self.checks = 0
+        self.slack = 1.0 + epsilon
+
+    def __len__(self):
+        return len(self.labels)
+
+    def dominated(self, costs):
+        """True if some stored label (epsilon-)dominates ``costs``."""
+        slack = self.slack
+        _, cost, emissions, customs = (c * slack for c in costs)
+        labels = self.labels
+        end = bisect_right(self.keys, costs[0] * slack)
+        for i in range(end):
+            other = labels[i].costs
+            if other[1] <= cost and other[2] <= emissions and other[3] <= customs:
+                self.checks += i + 1
+                return True
+        self.checks += end
+        return False
+
+    def insert(self, label, max_labels=None):
+        """
+        Add ``label`` unless it is dominated; evict the labels it dominates.
+
+        Evicted labels are marked dead so their heap entries are skipped.
+
+        Returns:
+            bool: True if the label was kept.
+        """
+        costs = label.costs
+        if self.dominated(costs):
+            return False
+        time, cost, emissions, customs = costs
+        keys, labels = self.keys, self.labels
+        start = bisect_left(keys, time)
+        evicted = []
+        for i in range(start, len(labels)):
+            oc = labels[i].costs
+            if cost <= oc[1] and emissions <= oc[2] and customs <= oc[3]:
+                evicted.append(i)
+        self.checks += len(labels) - start
+        if evicted:
+            for i in evicted:
+                labels[i].alive = False
+            drop = set(evicted)
+            keys = self.keys = [k for i, k in enumerate(keys) if i not in drop]
+            labels = self.labels = [l for i, l in enumerate(labels) if i not in drop]
+        elif max_labels is not None and len(labels) >= max_labels:
+            # Bounded mode: a full node only accepts labels that displace something.
+            return False
+        pos = bisect_right(keys, time)
+        keys.insert(pos, time)
+        labels.insert(pos, label)
+        return True
+
+
+class DeadlineFrontier:
+    """
+    Labels at one node that are non-dominated on (elapsed time, scalar score).
+
+    For a scalarized search under a deadline only these two numbers decide
+    whether a label can still lead to the best feasible route, so this is all
+    ``MOAStar`` keeps per node. Entries are sorted by time with strictly
+    decreasing scores, so one bisection finds the only entry that could
+    dominate a new label and the run of entries it dominates. Evicted labels
+    are marked dead so their heap entries are skipped.
+    """
+
+    __slots__ = ("times", "scores", "labels", "checks")
+
+    def __init__(self):
+        self.times = []
+        self.scores = []
+        self.labels = []
+        self.checks = 0
+
+    def __len__(self):
+        return len(self.labels)
+
+    def insert(self, time, score, label):
+        """
+        Add ``label`` unless a stored label is at least as fast and as cheap.
+
+        Returns:
+            bool: True if the label was kept.
+        """
+        times, scores = self.times, self.scores
+        i = bisect_right(times, time)
+        self.checks += 1
+        if i and scores[i - 1] <= score:
+            return False
+        lo = hi = bisect_left(times, time)
+        while hi < len(scores) and scores[hi] >= score:
+            self.labels[hi].alive = False
+            hi += 1
+        self.checks += hi - lo
+        times[lo:hi] = [time]
+        scores[lo:hi] = [score]
+        self.labels[lo:hi] = [label]
+        return True
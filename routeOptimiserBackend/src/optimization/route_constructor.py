@@ -1,43 +1,70 @@
 # src/optimization/route_constructor.py
 import logging
-import logging.config
-import yaml
+import numpy as np
+from heapq import heappush, heapreplace
 from src.utils.geocoding import GeocodingUtils
-import os
-
-os.makedirs("logs", exist_ok=True)
-try:
-    with open("config/logging_config.yaml", "r") as f:
-        config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-except FileNotFoundError:
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S"
-    )
+from src.data_processing.compiled_graph import MODES, CompiledGraph
+from src.optimization.landmarks import COMPONENTS
+
 logger = logging.getLogger("route_constructor")
 
+METRIC_KEYS = ("time", "cost", "emissions", "customs")
+ROAD = MODES.index("road")
+
 class RouteConstructor:
-    def __init__(self, G, config):
-        self.G = G
+    def __init__(self, G, config, road_legs=None, landmarks=None):
+        self.graph = (G if isinstance(G, CompiledGraph)
+                      else CompiledGraph.from_networkx(G, road_cost_per_km=config["defaults"]["road_cost_per_km"]))
+        self.G = self.graph
         self.config = config
         self.geo_utils = GeocodingUtils()
+        # Optional RoadLegService for road segments; without it they are haversine at fallback speed.
+        self.road_legs = road_legs
+        # Optional LandmarkTables of the base graph, for lower bounds on core-route cost.
+        self.landmarks = landmarks
+        self._legs = {}  # (coords, hub, direction) -> (distance_km, time_hours)
+        self._cost_terms = {}  # edge id -> (per_kg, fixed) display cost
+
+    def prefetch_road_legs(self, coords, hubs, direction):
+        """Look up the road legs between ``coords`` and ``hubs`` not known yet in one batch."""
+        if self.road_legs is None:
+            return
+        hubs = [hub for hub in dict.fromkeys(hubs)
+                if (coords, hub, direction) not in self._legs and self.graph.coords(hub)]
+        if hubs:
+            legs = self.road_legs.legs(coords, [(hub, self.graph.coords(hub)) for hub in hubs], direction)
+            self._legs.update(((coords, hub, direction), leg) for hub, leg in legs.items())
+
+    def road_leg(self, coords, hub, direction="to_hub"):
+        """(distance_km, time_hours) of the road between ``coords`` and ``hub``."""
+        key = (coords, hub, direction)
+        if key not in self._legs:
+            if self.road_legs is None:
+                distance = self.geo_utils.haversine_distance(coords, self.graph.coords(hub))
+                self._legs[key] = (distance, distance / self.config["defaults"]["fallback_speed_km_h"])
+            else:
+                self.prefetch_road_legs(coords, [hub], direction)
+        return self._legs[key]
+
+    def needs_road_segment(self, from_node, to_node):
+        """True when the request graph has no usable ``from_node -> to_node`` edge."""
+        edge = self.graph.edge_data(from_node, to_node)
+        return not edge or edge["distance"] == 0 or edge["time"] == 0
 
-    def add_road_segment(self, coords, node, weight_kg):
-        node_coords = self.geo_utils.get_node_coords(self.G.nodes[node])
+    def add_road_segment(self, coords, node, weight_kg, direction="to_hub"):
+        node_coords = self.graph.coords(node)
         if not node_coords:
-            logger.warning(f"No coordinates for {node}; assuming zero-distance road segment.")
+            logger.warning("No coordinates for %s; assuming zero-distance road segment.", node)
             return {"distance": 0, "time": 0, "cost_per_km": 0, "border_cost": 0, "emissions": 0, "mode": "road", "total_cost": 0}
         
-        distance = self.geo_utils.haversine_distance(coords, node_coords)
-        time = distance / self.config["defaults"]["fallback_speed_km_h"]
+        distance, time = self.road_leg(coords, node, direction)
         cost_per_km = self.config["defaults"]["road_cost_per_km"]
         emission_factor = self.config["defaults"].get("road_emission_factor", 169)
         emissions = distance * emission_factor * (weight_kg / 1000) / 1000  # g CO₂ to tons
         
         total_cost = cost_per_km * distance  # Distance-based cost for roads
-        logger.debug(f"Added road segment: {coords} -> {node} | Distance: {distance:.2f} km, Time: {time:.2f} h, Total Cost: ${total_cost:.2f}")
+        logger.debug("Added road segment: %s -> %s | Distance: %.2f km, Time: %.2f h, Total Cost: $%.2f",
+                     coords, node, distance, time, total_cost)
         return {
             "distance": distance,
             "time": time,
@@ -48,6 +75,108 @@ class RouteConstructor:
             "total_cost": total_cost
         }
 
+    def segment_cost(self, edge_data, weight_kg):
+        """Display cost of one edge: distance-based for roads, per-kg otherwise, plus border cost."""
+        if edge_data["mode"] == "road":
+            distance = edge_data.get("distance", 0)
+            return (edge_data.get("cost_per_km", self.config["defaults"]["road_cost_per_km"]) * distance +
+                    edge_data.get("border_cost", 0))
+        return (edge_data.get("transportation_cost_per_kg", 0) * weight_kg +
+                edge_data.get("border_cost", 0))
+
+    def access_leg(self, from_node, to_node, coords, hub, weight_kg):
+        """
+        Road leg between a custom endpoint and a hub.
+
+        Uses the request graph's ``from_node -> to_node`` edge when it is valid,
+        otherwise a fresh road segment between ``coords`` and ``hub``.
+        """
+        if self.needs_road_segment(from_node, to_node):
+            edge = self.add_road_segment(coords, hub, weight_kg, "to_hub" if to_node == hub else "from_hub")
+            logger.debug("Added dynamic road (or recalculated due to invalid edge): %s -> %s", from_node, to_node)
+        else:
+            edge = self.graph.edge_data(from_node, to_node)
+            edge["total_cost"] = self.segment_cost(edge, weight_kg)
+            logger.debug("Using pre-existing edge: %s -> %s | %s, %.2f km, %.2f h, Total Cost: $%.2f",
+                         from_node, to_node, edge["mode"], edge["distance"], edge["time"], edge["total_cost"])
+        return edge
+
+    def _edge_cost_terms(self, e):
+        """
+        Display cost of edge ``e`` as ``(per_kg, fixed)``, cached per edge.
+
+        Matches ``segment_cost``: roads cost ``road_cost_per_km * distance``,
+        other modes ``transportation_cost_per_kg * weight_kg``, both plus the
+        border cost. Only edges on candidate routes are ever looked up.
+        """
+        terms = self._cost_terms.get(e)
+        if terms is None:
+            graph = self.graph
+            border = float(graph.border_cost[e])
+            if graph.mode[e] == ROAD:
+                terms = (0.0, self.config["defaults"]["road_cost_per_km"] * float(graph.distance[e]) + border)
+            else:
+                terms = (float(graph.cost_per_kg[e]), border)
+            self._cost_terms[e] = terms
+        return terms
+
+    def core_cost_bounds(self, core_paths, weight_kg):
+        """
+        Lower bounds on the display cost of each core path, from the landmark tables.
+
+        Zero where the tables do not apply: without tables, when the graph's
+        road rate differs from the display rate, or for paths through
+        request-specific nodes, which the base-graph tables do not cover.
+        """
+        bounds = np.zeros(len(core_paths))
+        tables, graph = self.landmarks, self.graph
+        if (tables is None or tables.num_nodes != graph.num_base_nodes
+                or graph.road_cost_per_km != self.config["defaults"]["road_cost_per_km"]):
+            return bounds
+        index, n = graph.index, graph.num_base_nodes
+        rows = [i for i, path in enumerate(core_paths) if all(index[node] < n for node in path)]
+        if rows:
+            pair = tables.pair_bounds([index[core_paths[i][0]] for i in rows], [index[core_paths[i][-1]] for i in rows])
+            bounds[rows] = pair[COMPONENTS.index("cost_per_kg")] * weight_kg + pair[COMPONENTS.index("cost_fixed")]
+        return bounds
+
+    def route_totals(self, core_path, core_metrics, end_node, start_edge, end_edge, weight_kg, max_days):
+        """
+        Phase one: numeric (time, cost, emissions, customs) totals of a full route.
+
+        Walks the core path with edge ids and cost columns only, without
+        building any per-segment strings or dicts.
+
+        Returns:
+            dict or None: Totals, or None when the route exceeds ``max_days``.
+        """
+        total_time = core_metrics["time"] + start_edge["time"] + end_edge["time"]
+        if total_time / 24 > max_days:
+            logger.debug("Route via %s -> %s exceeds %s days: %.2f", core_path[0], core_path[-1], max_days, total_time / 24)
+            return None
+        edge_id = self.graph.edge_id
+        cost_terms = self._edge_cost_terms
+        core_cost = 0
+        for i in range(len(core_path) - 1):
+            per_kg, fixed = cost_terms(edge_id(core_path[i], core_path[i+1]))
+            core_cost += per_kg * weight_kg + fixed
+        total_cost = core_cost + start_edge["total_cost"] + end_edge["total_cost"]
+        total_emissions = core_metrics["emissions"] + start_edge["emissions"] + end_edge["emissions"]
+        total_customs = (core_metrics["customs"] + 
+                         self.graph.customs_score(core_path[0]) + 
+                         self.graph.customs_score(end_node))
+        return {"time": total_time, "cost": total_cost, "emissions": total_emissions, "customs": total_customs}
+
+    def segment(self, from_node, to_node, weight_kg):
+        """``(mode, cost, time)`` of the core edge ``from_node -> to_node`` as displayed."""
+        edge_data = self.graph.edge_data(from_node, to_node)
+        return edge_data["mode"], self.segment_cost(edge_data, weight_kg), edge_data.get("time", 0)
+
+    def materialize(self, core_path, metrics, start_node, end_node, start_edge, end_edge, weight_kg):
+        """Phase two: full route tuple ``(path, modes, metrics, cost_breakdown, time_breakdown)`` for display."""
+        segments = [self.segment(core_path[i], core_path[i+1], weight_kg) for i in range(len(core_path) - 1)]
+        return assemble_route(core_path, segments, metrics, start_node, end_node, start_edge, end_edge)
+
     def construct_full_routes(self, core_routes, initial_coords, final_coords, weight_kg, max_days):
         full_routes = []
         start_node = f"Custom_{initial_coords[0]}_{initial_coords[1]}_Start"
@@ -57,94 +186,258 @@ class RouteConstructor:
             if not core_path:
                 continue
             
-            # Initial road segment
-            start_edge = self.G.get_edge_data(start_node, core_path[0], default=None)
-            if not start_edge or "distance" not in start_edge[0] or start_edge[0]["distance"] == 0 or "time" not in start_edge[0] or start_edge[0]["time"] == 0:
-                start_edge = self.add_road_segment(initial_coords, core_path[0], weight_kg)
-                logger.debug(f"Added dynamic road (or recalculated due to invalid edge): {start_node} -> {core_path[0]}")
-            else:
-                start_edge = start_edge[0]
-                if start_edge["mode"] == "road":
-                    distance = start_edge.get("distance", 0)
-                    start_edge["total_cost"] = (start_edge.get("cost_per_km", self.config["defaults"]["road_cost_per_km"]) * distance + 
-                                                start_edge.get("border_cost", 0))
-                else:
-                    start_edge["total_cost"] = (start_edge.get("transportation_cost_per_kg", 0) * weight_kg + 
-                                                start_edge.get("border_cost", 0))
-                logger.debug(f"Using pre-existing start edge: {start_node} -> {core_path[0]} | {start_edge}")
-
-            # Final road segment
-            end_edge = self.G.get_edge_data(core_path[-1], end_node, default=None)
-            if not end_edge or "distance" not in end_edge[0] or end_edge[0]["distance"] == 0 or "time" not in end_edge[0] or end_edge[0]["time"] == 0:
-                end_edge = self.add_road_segment(final_coords, core_path[-1], weight_kg)
-                logger.debug(f"Added dynamic road (or recalculated due to invalid edge): {core_path[-1]} -> {end_node}")
-            else:
-                end_edge = end_edge[0]
-                if end_edge["mode"] == "road":
-                    distance = end_edge.get("distance", 0)
-                    end_edge["total_cost"] = (end_edge.get("cost_per_km", self.config["defaults"]["road_cost_per_km"]) * distance + 
-                                              end_edge.get("border_cost", 0))
-                else:
-                    end_edge["total_cost"] = (end_edge.get("transportation_cost_per_kg", 0) * weight_kg + 
-                                              end_edge.get("border_cost", 0))
-                logger.debug(f"Using pre-existing end edge: {core_path[-1]} -> {end_node} | {end_edge}")
-
-            # Core route cost and time breakdown
-            cost_breakdown = {}
-            time_breakdown = {}
-            core_cost = 0
-            for i in range(len(core_path) - 1):
-                edge_data = self.G[core_path[i]][core_path[i+1]][0]
-                if edge_data["mode"] == "road":
-                    distance = edge_data.get("distance", 0)
-                    segment_cost = (edge_data.get("cost_per_km", self.config["defaults"]["road_cost_per_km"]) * distance + 
-                                    edge_data.get("border_cost", 0))
-                else:
-                    segment_cost = (edge_data.get("transportation_cost_per_kg", 0) * weight_kg + 
-                                    edge_data.get("border_cost", 0))
-                core_cost += segment_cost
-                cost_breakdown[f"{core_path[i]} -> {core_path[i+1]}"] = segment_cost
-                time_breakdown[f"{core_path[i]} -> {core_path[i+1]}"] = edge_data.get("time", 0)
-
-            # Total metrics
-            total_time = core_metrics["time"] + start_edge["time"] + end_edge["time"]
-            if total_time / 24 > max_days:
-                logger.debug(f"Route {start_node} -> {' -> '.join(core_path)} -> {end_node} exceeds {max_days} days: {total_time/24:.2f}")
-                continue
+            # Initial and final road segments
+            start_edge = self.access_leg(start_node, core_path[0], initial_coords, core_path[0], weight_kg)
+            end_edge = self.access_leg(core_path[-1], end_node, final_coords, core_path[-1], weight_kg)
+            metrics = self.route_totals(core_path, core_metrics, end_node, start_edge, end_edge, weight_kg, max_days)
+            if metrics is not None:
+                full_routes.append(self.materialize(core_path, metrics, start_node, end_node, start_edge, end_edge, weight_kg))
 
-            total_cost = core_cost + start_edge["total_cost"] + end_edge["total_cost"]
-            total_emissions = core_metrics["emissions"] + start_edge["emissions"] + end_edge["emissions"]
-            total_customs = (core_metrics["customs"] + 
-                             self.G.nodes[core_path[0]].get("customs_score", 0) + 
-                             self.G.nodes[end_node].get("customs_score", 0))
-
-            # Add breakdown for start and end segments
-            cost_breakdown[f"{start_node} -> {core_path[0]}"] = start_edge["total_cost"]
-            cost_breakdown[f"{core_path[-1]} -> {end_node}"] = end_edge["total_cost"]
-            time_breakdown[f"{start_node} -> {core_path[0]}"] = start_edge["time"]
-            time_breakdown[f"{core_path[-1]} -> {end_node}"] = end_edge["time"]
-
-            full_path = [start_node] + core_path + [end_node]
-            modes = [start_edge["mode"]] + [self.G[core_path[i]][core_path[i+1]][0]["mode"] for i in range(len(core_path)-1)] + [end_edge["mode"]]
-            full_routes.append((full_path, modes, {"time": total_time, "cost": total_cost, "emissions": total_emissions, "customs": total_customs}, cost_breakdown, time_breakdown))
-            # logger.info(
-            #     f"Constructed route: {' -> '.join(full_path)} | "
-            #     f"Time: {total_time/24:.2f} days, "
-            #     f"Cost: ${total_cost:,.2f}, "
-            #     f"Emissions: {total_emissions/1000:.2f} Kg CO₂"
-            # )
-
-        logger.info(f"Total full routes constructed: {len(full_routes)}")
+        logger.info("Total full routes constructed: %d", len(full_routes))
         return full_routes
 
+    def candidates(self, core_routes, initial_coords, final_coords, weight_kg, max_days):
+        """Wrap core routes in a ``CandidateSet`` that can be ranked under any weights."""
+        return CandidateSet(self, core_routes, initial_coords, final_coords, weight_kg, max_days)
+
+    def top_k_routes(self, core_routes, initial_coords, final_coords, weight_kg, max_days, weights, k=10):
+        """The ``k`` best full routes; see ``CandidateSet.top_k``."""
+        return self.candidates(core_routes, initial_coords, final_coords, weight_kg, max_days).top_k(weights, k)
+
     def rank_routes(self, routes, weights):
-        ranked = []
-        for path, modes, metrics, cost_breakdown, time_breakdown in routes:
-            score = sum(w * metrics[k] for w, k in zip(weights, ["time", "cost", "emissions", "customs"]))
-            ranked.append((score, path, modes, metrics, cost_breakdown, time_breakdown))
-        ranked.sort(key=lambda x: x[0])
-        logger.info(f"Ranked {len(ranked)} routes.")
+        metrics = np.array([[m[key] for key in METRIC_KEYS] for _, _, m, _, _ in routes], dtype=float).reshape(-1, 4)
+        scores = score_matrix(metrics, weights)[0]
+        order = np.argsort(scores, kind="stable")
+        ranked = [(float(scores[i]),) + tuple(routes[i]) for i in order.tolist()]
+        logger.info("Ranked %d routes.", len(ranked))
         return ranked[:10]
 
+
+def assemble_route(core_path, segments, metrics, start_node, end_node, start_edge, end_edge):
+    """
+    Display tuple ``(path, modes, metrics, cost_breakdown, time_breakdown)`` of one full route.
+
+    ``segments`` holds the ``(mode, cost, time)`` of each core edge, in path order.
+    """
+    # Core route cost and time breakdown
+    cost_breakdown = {}
+    time_breakdown = {}
+    core_modes = []
+    for i, (mode, cost, time) in enumerate(segments):
+        core_modes.append(mode)
+        cost_breakdown[f"{core_path[i]} -> {core_path[i+1]}"] = cost
+        time_breakdown[f"{core_path[i]} -> {core_path[i+1]}"] = time
+
+    # Add breakdown for start and end segments
+    cost_breakdown[f"{start_node} -> {core_path[0]}"] = start_edge["total_cost"]
+    cost_breakdown[f"{core_path[-1]} -> {end_node}"] = end_edge["total_cost"]
+    time_breakdown[f"{start_node} -> {core_path[0]}"] = start_edge["time"]
+    time_breakdown[f"{core_path[-1]} -> {end_node}"] = end_edge["time"]
+
+    full_path = [start_node] + core_path + [end_node]
+    modes = [start_edge["mode"]] + core_modes + [end_edge["mode"]]
+    return (full_path, modes, metrics, cost_breakdown, time_breakdown)
+
+
+def score_matrix(metrics, weights):
+    """
+    Weighted scores of an ``(n_routes, 4)`` metrics array.
+
+    ``weights`` is one ``[time, cost, emissions, customs]`` vector or an
+    ``(m, 4)`` array of them; the result has shape ``(m, n_routes)``. Terms
+    are added in objective order, so scores equal the scalar
+    ``sum(w * metrics[k] ...)`` exactly.
+    """
+    weights = np.atleast_2d(np.asarray(weights, dtype=float))
+    scores = metrics[None, :, 0] * weights[:, 0, None]
+    for j in range(1, metrics.shape[1]):
+        scores = scores + metrics[None, :, j] * weights[:, j, None]
+    return scores
+
+
+class CandidateSet:
+    """
+    Candidate full routes of one request, rankable under any weight vector.
+
+    Holds the core routes, their shared access legs and, once computed, an
+    ``(n_routes, 4)`` array of full-route totals. ``top_k`` ranks the
+    request's own weights with lower-bound pruning; ``rank``/``rank_many``
+    score every candidate at once through a ``RouteTable``, the graph-free
+    form kept for re-weighting a stored result. Breakdowns are materialized
+    only for returned routes.
+    """
+
+    def __init__(self, constructor, core_routes, initial_coords, final_coords, weight_kg, max_days):
+        self.constructor = constructor
+        self.weight_kg = weight_kg
+        self.max_days = max_days
+        self.start_node = f"Custom_{initial_coords[0]}_{initial_coords[1]}_Start"
+        self.end_node = f"Custom_{final_coords[0]}_{final_coords[1]}_End"
+        graph = constructor.graph
+        self.start_legs, self.end_legs = {}, {}
+        self.routes = []
+        lower = []
+        # Road legs the overlay does not provide, fetched in one batch per side.
+        firsts = dict.fromkeys(path[0] for path, _ in core_routes if path)
+        lasts = dict.fromkeys(path[-1] for path, _ in core_routes if path)
+        constructor.prefetch_road_legs(initial_coords, [hub for hub in firsts
+                                                        if constructor.needs_road_segment(self.start_node, hub)], "to_hub")
+        constructor.prefetch_road_legs(final_coords, [hub for hub in lasts
+                                                      if constructor.needs_road_segment(hub, self.end_node)], "from_hub")
+        for core_path, core_metrics in core_routes:
+            if not core_path:
+                continue
+            first, last = core_path[0], core_path[-1]
+            if first not in self.start_legs:
+                self.start_legs[first] = constructor.access_leg(self.start_node, first, initial_coords, first, weight_kg)
+            if last not in self.end_legs:
+                self.end_legs[last] = constructor.access_leg(last, self.end_node, final_coords, last, weight_kg)
+            start_edge, end_edge = self.start_legs[first], self.end_legs[last]
+            # Admissible per-objective lower bound: exact except the core cost, added below.
+            lower.append((core_metrics["time"] + start_edge["time"] + end_edge["time"],
+                          start_edge["total_cost"] + end_edge["total_cost"],
+                          core_metrics["emissions"] + start_edge["emissions"] + end_edge["emissions"],
+                          core_metrics["customs"] + graph.customs_score(first) + graph.customs_score(self.end_node)))
+            self.routes.append((core_path, core_metrics))
+        self.lower = np.array(lower, dtype=float).reshape(-1, 4)
+        self.lower[:, 1] += constructor.core_cost_bounds([path for path, _ in self.routes], weight_kg)
+        self._totals = {}
+        self._metrics = None
+        self._table = None
+
+    def __len__(self):
+        return len(self.routes)
+
+    def totals(self, i):
+        """Full-route totals of candidate ``i`` (None when it misses ``max_days``), computed once."""
+        if i not in self._totals:
+            core_path, core_metrics = self.routes[i]
+            self._totals[i] = self.constructor.route_totals(
+                core_path, core_metrics, self.end_node, self.start_legs[core_path[0]],
+                self.end_legs[core_path[-1]], self.weight_kg, self.max_days)
+        return self._totals[i]
+
+    @property
+    def metrics(self):
+        """``(n_routes, 4)`` totals array; rows of routes that miss ``max_days`` are NaN."""
+        if self._metrics is None:
+            rows = [self.totals(i) for i in range(len(self.routes))]
+            self._metrics = np.array([[m[key] for key in METRIC_KEYS] if m is not None else [np.nan] * 4
+                                      for m in rows], dtype=float).reshape(-1, 4)
+        return self._metrics
+
+    def materialize(self, i, score):
+        core_path, _ = self.routes[i]
+        route = self.constructor.materialize(core_path, self.totals(i), self.start_node, self.end_node,
+                                             self.start_legs[core_path[0]], self.end_legs[core_path[-1]],
+                                             self.weight_kg)
+        return (score,) + route
+
+    def top_k(self, weights, k=10, budget=None):
+        """
+        The ``k`` best routes, scoring only candidates that can still make the cut.
+
+        Candidates are visited in order of their lower-bound score; once the
+        next bound exceeds the current k-th score the rest are skipped.
+        Returns the same list as ``rank_routes(construct_full_routes(...))``,
+        unless ``budget`` runs out first: then, once ``k`` routes are scored,
+        the best of those scored so far are returned.
+        """
+        bounds = score_matrix(self.lower, weights)[0].tolist()
+        best = []  # max-heap on (score, position) via negation
+        scored = 0
+        for position in sorted(range(len(self.routes)), key=lambda i: (bounds[i], i)):
+            if len(best) == k and bounds[position] > -best[0][0]:
+                break
+            if len(best) == k and budget is not None and budget.spent():
+                logger.warning("Top-%d ranking stopped early (%s).", k, budget.reason)
+                break
+            metrics = self.totals(position)
+            scored += 1
+            if metrics is None:
+                continue
+            score = sum(w * metrics[key] for w, key in zip(weights, METRIC_KEYS))
+            entry = (-score, -position)
+            if len(best) < k:
+                heappush(best, entry)
+            elif entry > best[0]:
+                heapreplace(best, entry)
+        logger.info("Top-%d: scored %d of %d candidate routes.", k, scored, len(self.routes))
+        return [self.materialize(-position, -neg_score) for neg_score, position in sorted(best, reverse=True)]
+
+    def table(self):
+        """
+        Graph-free ``RouteTable`` of the feasible candidates, built once.
+
+        Scores every candidate and looks up the display data of each core
+        edge they use, so the table can outlive the request graph.
+        """
+        if self._table is None:
+            metrics = self.metrics
+            feasible = np.flatnonzero(~np.isnan(metrics[:, 0])).tolist()
+            paths = [self.routes[i][0] for i in feasible]
+            segments = {}
+            for path in paths:
+                for edge in zip(path, path[1:]):
+                    if edge not in segments:
+                        segments[edge] = self.constructor.segment(*edge, self.weight_kg)
+            self._table = RouteTable(metrics[feasible], paths, segments, self.start_node, self.end_node,
+                                     self.start_legs, self.end_legs)
+        return self._table
+
+    def rank_many(self, weight_vectors, k=10):
+        """``RouteTable.rank_many`` over every candidate."""
+        return self.table().rank_many(weight_vectors, k)
+
+    def rank(self, weights, k=10):
+        return self.rank_many([weights], k)[0]
+
+
+class RouteTable:
+    """
+    Scored candidate routes of one request, kept for re-weighting without the graph.
+
+    Holds the ``(n_routes, 4)`` totals, the core paths, the shared access legs
+    and the ``(mode, cost, time)`` of every core edge the paths use: enough to
+    re-rank under new weights and rebuild the same output as ``CandidateSet``,
+    while the request graph and its constructor are released.
+    """
+
+    def __init__(self, metrics, core_paths, segments, start_node, end_node, start_legs, end_legs):
+        self.metrics = metrics
+        self.core_paths = core_paths
+        self.segments = segments
+        self.start_node = start_node
+        self.end_node = end_node
+        self.start_legs = start_legs
+        self.end_legs = end_legs
+
+    def __len__(self):
+        return len(self.core_paths)
+
+    def materialize(self, i, score):
+        path = self.core_paths[i]
+        metrics = dict(zip(METRIC_KEYS, self.metrics[i].tolist()))
+        route = assemble_route(path, [self.segments[edge] for edge in zip(path, path[1:])], metrics,
+                               self.start_node, self.end_node, self.start_legs[path[0]], self.end_legs[path[-1]])
+        return (score,) + route
+
+    def rank_many(self, weight_vectors, k=10):
+        """
+        Re-rank every route under each of ``weight_vectors`` with one vectorized scoring pass.
+
+        Returns:
+            list: One ranked route list per weight vector.
+        """
+        scores = score_matrix(self.metrics, weight_vectors)
+        results = []
+        for row in scores:
+            order = np.argsort(row, kind="stable")[:k]
+            results.append([self.materialize(j, float(row[j])) for j in order.tolist()])
+        return results
+
+    def rank(self, weights, k=10):
+        return self.rank_many([weights], k)[0]
+
 if __name__ == "__main__":
     pass
\ No newline at end of file
@@ -0,0 +1,47 @@
+# src/utils/budget.py
+import threading
+import time
+
+
+class Budget:
+    """
+    Cooperative compute budget for one request.
+
+    Long loops call ``spent()`` every so often and stop early once it returns
+    True, keeping whatever they have found so far. The budget runs out when its
+    time limit passes or when ``cancel()`` is called (e.g. because the client
+    disconnected); ``reason`` records which.
+    """
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self._clock = clock
+        self.deadline = None if seconds is None else clock() + seconds
+        self._cancelled = threading.Event()
+        self.reason = None
+
+    @classmethod
+    def from_ms(cls, milliseconds):
+        return cls(None if milliseconds is None else milliseconds / 1000)
+
+    @property
+    def exhausted(self):
+        return self.reason is not None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def spent(self):
+        """True once the time limit has passed or the request was cancelled."""
+        if self.reason is not None:
+            return True
+        if self._cancelled.is_set():
+            self.reason = "cancelled"
+        elif self.deadline is not None and self._clock() >= self.deadline:
+            self.reason = "timeout"
+        return self.reason is not None
+
+    def remaining(self):
+        """Seconds left, or None for an unlimited budget."""
+        if self.deadline is None:
+            return None
+        return max(self.deadline - self._clock(), 0.0)
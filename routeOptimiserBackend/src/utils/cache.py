@@ -0,0 +1,177 @@
+# src/utils/cache.py
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class _Pending:
+    """A computation in flight for one key; waiters block on ``done``."""
+
+    __slots__ = ("done", "value", "error", "shareable")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.shareable = False
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire after ``ttl_seconds``.
+
+    Inserting beyond ``max_entries`` evicts the least recently used entry.
+    ``set_version`` drops every entry when the data the values derive from
+    changes (e.g. a new graph snapshot). Hits, misses, evictions, expirations,
+    coalesced waits and invalidations are counted in ``stats()``.
+    """
+
+    # How often a caller waiting on another caller's computation checks its ``abandon`` callback.
+    WAIT_POLL_SECONDS = 0.05
+
+    def __init__(self, max_entries=128, ttl_seconds=900, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> _Pending
+        self._lock = threading.Lock()
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key, now):
+        """Live entry for ``key`` as ``(True, value)`` or ``(False, None)``; caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        self._entries[key] = (self._clock() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key, default=None):
+        now = self._clock()
+        with self._lock:
+            found, value = self._lookup(key, now)
+            if not found:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_compute(self, key, compute, cacheable=None, abandon=None):
+        """
+        Return the cached value for ``key``, calling ``compute()`` on a miss.
+
+        Concurrent callers missing on the same key wait for the first caller's
+        computation instead of repeating it. An exception raised by
+        ``compute`` reaches every waiting caller and nothing is cached; nor is
+        a value for which ``cacheable(value)`` is false (e.g. a partial result).
+        Waiters never receive such a value either: they try again and, if no
+        other computation is in flight, run their own ``compute``. A waiter
+        also stops waiting and runs its own ``compute`` once ``abandon()``
+        returns true (e.g. its own budget ran out or it was cancelled).
+
+        Returns:
+            tuple: ``(value, status)`` with status ``"hit"``, ``"miss"`` or
+            ``"coalesced"``.
+        """
+        while True:
+            now = self._clock()
+            with self._lock:
+                found, value = self._lookup(key, now)
+                if found:
+                    self.hits += 1
+                    return value, "hit"
+                pending = self._inflight.get(key)
+                if pending is None:
+                    pending = self._inflight[key] = _Pending()
+                    version = self.version
+                    self.misses += 1
+                    break
+                self.coalesced += 1
+
+            timeout = self.WAIT_POLL_SECONDS if abandon is not None else None
+            while not pending.done.wait(timeout):
+                if abandon():
+                    with self._lock:
+                        self.misses += 1
+                    return compute(), "miss"
+            if pending.error is not None:
+                raise pending.error
+            if pending.shareable:
+                return pending.value, "coalesced"
+
+        try:
+            pending.value = compute()
+            pending.shareable = cacheable is None or cacheable(pending.value)
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                # A result computed against an invalidated version is served to
+                # its waiters but not stored.
+                if pending.error is None and pending.shareable and self.version == version:
+                    self._store(key, pending.value)
+            pending.done.set()
+        return pending.value, "miss"
+
+    def set_version(self, version):
+        """Clear the cache when ``version`` differs from the one its entries were computed for."""
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                self.invalidations += 1
+            self.version = version
+            self._entries.clear()
+
+    def add(self, value):
+        """Store ``value`` under a fresh opaque handle and return the handle."""
+        handle = uuid.uuid4().hex
+        self.put(handle, value)
+        return handle
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "version": self.version,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+            }
@@ -1,35 +1,43 @@
 # src/utils/geocoding.py
 import logging
-import logging.config
-import yaml
-import os
-import pandas as pd
-from geopy.geocoders import Nominatim
-from geopy.extra.rate_limiter import RateLimiter
 
-# Ensure logs directory exists
-os.makedirs("logs", exist_ok=True)
-
-# Set up logging
-try:
-    with open("config/logging_config.yaml", "r") as f:
-        config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-except (FileNotFoundError, ValueError) as e:
-    logging.basicConfig(level=logging.INFO)
-    logging.warning(f"Failed to load logging config: {e}. Using basic configuration.")
 logger = logging.getLogger("geocoding")
 
 class GeocodingUtils:
+    """
+    Distance and coordinate helpers, plus a rate-limited Nominatim geocoder.
+
+    The geocoder (and the geopy import behind it) is created on first use of
+    ``geolocator`` or ``geocode``; routing only needs the distance helpers.
+    """
+
     def __init__(self):
+        self._geolocator = None
+        self._geocode = None
+        self._geocoder_ready = False
+
+    def _init_geocoder(self):
+        self._geocoder_ready = True
         try:
-            self.geolocator = Nominatim(user_agent="fusionflow_logithon")
-            self.geocode = RateLimiter(self.geolocator.geocode, min_delay_seconds=1)
+            from geopy.geocoders import Nominatim
+            from geopy.extra.rate_limiter import RateLimiter
+            self._geolocator = Nominatim(user_agent="fusionflow_logithon")
+            self._geocode = RateLimiter(self._geolocator.geocode, min_delay_seconds=1)
             logger.info("Nominatim geocoder initialized successfully.")
         except Exception as e:
             logger.error(f"Failed to initialize Nominatim: {e}")
-            self.geolocator = None
-            self.geocode = None
+
+    @property
+    def geolocator(self):
+        if not self._geocoder_ready:
+            self._init_geocoder()
+        return self._geolocator
+
+    @property
+    def geocode(self):
+        if not self._geocoder_ready:
+            self._init_geocoder()
+        return self._geocode
 
     def haversine_distance(self, coords1, coords2):
         import math
@@ -64,6 +72,8 @@ class GeocodingUtils:
             return None
 
 if __name__ == "__main__":
+    from src.utils.helpers import configure_logging
+    configure_logging()
     utils = GeocodingUtils()
     # Example usage
     coords1 = (40.7128, -74.0060)  # New York
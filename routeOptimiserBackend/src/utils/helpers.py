@@ -1,8 +1,17 @@
 # src/utils/helpers.py
+import atexit
+import logging
+import logging.config
+import logging.handlers
+import queue
 import yaml
 import os
 from math import radians, sin, cos, sqrt, atan2
 
+_logging_configured = False
+_queue_listener = None
+_queue_handlers = []
+
 def load_config(config_path: str = None) -> dict:
     """Load configuration from YAML file."""
     if config_path is None:
@@ -18,6 +27,125 @@ def load_config(config_path: str = None) -> dict:
     with open(config_path, "r") as f:
         return yaml.safe_load(f)
 
+def configure_logging(config_path: str = None) -> None:
+    """
+    Configure logging for the process from ``config/logging_config.yaml``.
+
+    The single place logging is set up: entry points (``main.create_app``,
+    module ``__main__`` blocks) call it; library modules only call
+    ``logging.getLogger``. Folders of file handlers are created as needed,
+    and later calls do nothing. With ``queue: true`` in the file, the
+    configured handlers run on a background thread (see ``_start_queue_listener``).
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    _logging_configured = True
+    if config_path is None:
+        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../../config/logging_config.yaml")
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f)
+        use_queue = config.pop("queue", False)
+        for handler in config.get("handlers", {}).values():
+            if "filename" in handler:
+                os.makedirs(os.path.dirname(handler["filename"]) or ".", exist_ok=True)
+        logging.config.dictConfig(config)
+        if use_queue:
+            _start_queue_listener([logging.getLogger()] + [logging.getLogger(name) for name in config.get("loggers", {})])
+    except (FileNotFoundError, ValueError) as e:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S"
+        )
+        logging.getLogger(__name__).warning(f"Failed to load logging config: {e}. Using basic configuration.")
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts ``(targets, record)`` on the shared queue for ``_HandlerQueueListener``.
+
+    The record is enqueued as is, so its message is formatted by the listener
+    thread rather than by the caller.
+    """
+
+    def __init__(self, queue_, targets):
+        super().__init__(queue_)
+        self.targets = targets
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        self.queue.put_nowait((self.targets, record))
+
+class _HandlerQueueListener(logging.handlers.QueueListener):
+    """Hands every dequeued record to the handlers of the logger that produced it."""
+
+    def handle(self, item):
+        handlers, record = item
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+def _start_queue_listener(loggers):
+    """
+    Move the handlers of ``loggers`` behind one queue drained by a listener thread.
+
+    A log call then only builds the record and puts it on the queue; message
+    formatting and the console/file writes happen on the listener thread, in
+    the order the records were logged. Each record carries its logger's
+    original handlers, so it still reaches exactly the handlers configured for
+    it. Records keep their arguments until they are formatted, so hot paths
+    should log ``%``-style arguments that are not mutated afterwards. The
+    listener is stopped (flushing the queue) at exit and restarted in forked
+    children (gunicorn workers), which do not inherit the parent's threads.
+    """
+    global _queue_listener
+    q = queue.SimpleQueue()
+    _queue_listener = _HandlerQueueListener(q)
+    for logger_ in loggers:
+        if logger_.handlers:
+            handler = _DeferredQueueHandler(q, tuple(logger_.handlers))
+            _queue_handlers.append(handler)
+            logger_.handlers = [handler]
+    _queue_listener.start()
+    atexit.register(_stop_queue_listener)
+    os.register_at_fork(after_in_child=_restart_queue_listener)
+
+def _stop_queue_listener():
+    if _queue_listener._thread is not None:
+        _queue_listener.stop()
+
+def _restart_queue_listener():
+    # The parent's listener thread does not exist in a forked child, and the queue
+    # may have been mid-operation at the fork, so start over with a fresh one.
+    q = queue.SimpleQueue()
+    for handler in _queue_handlers:
+        handler.queue = q
+    _queue_listener.queue = q
+    _queue_listener._thread = None
+    _queue_listener.start()
+
+class LogSampler:
+    """
+    Lets through the first ``burst`` occurrences of a repetitive event, then one in ``every``.
+
+    For debug lines in hot loops, guarded as ``if debug and sampler.sample():``
+    with ``debug = logger.isEnabledFor(logging.DEBUG)`` taken once before the
+    loop, so an event that is not logged costs a counter increment. ``seen``
+    counts every event, for a summary line at the end.
+    """
+
+    def __init__(self, every=1000, burst=5):
+        self.every = every
+        self.burst = burst
+        self.seen = 0
+
+    def sample(self):
+        self.seen += 1
+        return self.seen <= self.burst or self.seen % self.every == 0
+
 def haversine_distance(coords1: tuple, coords2: tuple) -> float:
     """Calculate Haversine distance between two (lat, lon) points in kilometers."""
     if not (coords1 and coords2):
@@ -30,6 +158,12 @@ def haversine_distance(coords1: tuple, coords2: tuple) -> float:
     R = 6371  # Earth radius in km
     return R * c
 
+def quantize(value: float, step: float) -> float:
+    """Round ``value`` to the nearest multiple of ``step`` (no rounding when step is falsy)."""
+    if not step:
+        return value
+    return round(round(value / step) * step, 9)
+
 def get_node_coords(node_attrs: dict) -> tuple:
     """Extract coordinates from node attributes."""
     if "latitude" in node_attrs and "longitude" in node_attrs:
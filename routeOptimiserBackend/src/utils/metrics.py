@@ -0,0 +1,296 @@
+# src/utils/metrics.py
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+# Search work counters collected by MOAStar (see MOAStar.stats), observed once per request.
+SEARCH_COUNTERS = {
+    "pairs": "(source, goal) pairs searched per request",
+    "expanded": "Labels expanded (popped and settled) per request",
+    "pushed": "Labels pushed onto the open set per request",
+    "pruned": "Labels discarded by deadline, heuristic or dominance pruning per request",
+    "dominance_checks": "Frontier comparisons made by dominance tests per request",
+    "heap_peak": "Largest open set of any search in the request",
+}
+
+
+def _label_key(labelnames, labels):
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames, key, extra=()):
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, key)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self):
+        return {"values": [[list(k), v] for k, v in self.values.items()]}
+
+    @staticmethod
+    def merge(total, snapshot):
+        for key, value in snapshot["values"]:
+            total[tuple(key)] = total.get(tuple(key), 0) + value
+
+    def render(self, merged):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_format_labels(self.labelnames, key)} {value:g}" for key, value in sorted(merged.items())]
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        self.values[_label_key(self.labelnames, labels)] = value
+
+    @staticmethod
+    def merge(total, snapshot):
+        # Per-process values: keep the largest (e.g. build time of the slowest worker).
+        for key, value in snapshot["values"]:
+            total[tuple(key)] = max(total.get(tuple(key), value), value)
+
+    def render(self, merged):
+        lines = super().render(merged)
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=SECONDS_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self.values = {}  # key -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        row = self.values.get(key)
+        if row is None:
+            row = self.values[key] = [0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                row[i] += 1
+                break
+        else:
+            row[len(self.buckets)] += 1
+        row[-1] += value
+
+    def snapshot(self):
+        return {"values": [[list(k), v] for k, v in self.values.items()]}
+
+    @staticmethod
+    def merge(total, snapshot):
+        for key, row in snapshot["values"]:
+            current = total.get(tuple(key))
+            total[tuple(key)] = list(row) if current is None else [a + b for a, b in zip(current, row)]
+
+    def render(self, merged):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, row):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ['le="%g"' % bound])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            count = cumulative + row[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {row[-1]:g}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus-style registry of counters, gauges and histograms.
+
+    Updates take one lock and a few list operations, so instrumentation can
+    stay on in production. When several worker processes serve the app, give
+    them a shared ``multiprocess_dir``: each worker writes its snapshot there
+    (at most every ``flush_interval`` seconds) and ``render`` sums all of them.
+    """
+
+    def __init__(self, multiprocess_dir=None, flush_interval=1.0):
+        self.metrics = {}
+        self.multiprocess_dir = multiprocess_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+
+    def _register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, buckets=SECONDS_BUCKETS, labelnames=()):
+        return self._register(Histogram(name, help_text, buckets, labelnames))
+
+    @contextmanager
+    def updating(self):
+        """Hold the registry lock for a batch of updates, then flush if one is due."""
+        with self._lock:
+            yield
+        if self.multiprocess_dir and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """Atomically write this process's snapshot to ``multiprocess_dir``."""
+        self._last_flush = time.monotonic()
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=self.multiprocess_dir)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}.json"))
+
+    def render(self):
+        """Prometheus text exposition of this process, plus every worker snapshot in ``multiprocess_dir``."""
+        snapshots = [self.snapshot()]
+        if self.multiprocess_dir:
+            own = os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}.json")
+            for path in glob.glob(os.path.join(self.multiprocess_dir, "metrics-*.json")):
+                if path == own:
+                    continue
+                try:
+                    with open(path, encoding="utf-8") as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        lines = []
+        for name, metric in self.metrics.items():
+            merged = {}
+            for snapshot in snapshots:
+                if name in snapshot:
+                    metric.merge(merged, snapshot[name])
+            lines += metric.render(merged)
+        return "\n".join(lines) + "\n"
+
+
+class RequestTrace:
+    """
+    Per-request stage timings and summed search counters.
+
+    Stages are timed as laps: ``lap(name)`` charges the time since the
+    previous lap (or since the trace was created) to ``name``, so timing a
+    pipeline costs one clock read per stage boundary.
+
+    With ``events=True`` the trace also keeps a structured log of the
+    search (hub selection, goals settled, early stops, ...) recorded through
+    ``event()``; without it ``events`` is None and callers skip building them.
+
+    Args:
+        events (bool): Record structured events for this request.
+        max_events (int): Events kept; later ones are only counted as dropped.
+    """
+
+    def __init__(self, events=False, max_events=1000):
+        self.started = self._last = time.perf_counter()
+        self.stages = {}
+        self.laps = []  # (stage, perf_counter at its end), in order
+        self.search = {}
+        self.searches = 0
+        self.events = [] if events else None
+        self.max_events = max_events
+        self.dropped_events = 0
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.stages[name] = self.stages.get(name, 0.0) + now - self._last
+        self.laps.append((name, now))
+        self._last = now
+
+    def total(self):
+        return self._last - self.started
+
+    def add_search(self, stats):
+        """Fold in one searcher's counters (``MOAStar.stats``); peaks take the maximum."""
+        if not stats.get("searches"):
+            return
+        self.searches += stats["searches"]
+        for name in SEARCH_COUNTERS:
+            if name == "heap_peak":
+                self.search[name] = max(self.search.get(name, 0), stats[name])
+            else:
+                self.search[name] = self.search.get(name, 0) + stats[name]
+
+    def start_events(self):
+        """Turn on event recording for the rest of the request."""
+        if self.events is None:
+            self.events = []
+
+    def event(self, kind, **fields):
+        """Record ``{"event": kind, "at_ms": <ms since the trace started>, **fields}`` if events are on."""
+        if self.events is None:
+            return
+        if len(self.events) >= self.max_events:
+            self.dropped_events += 1
+            return
+        self.events.append({"event": kind, "at_ms": round((time.perf_counter() - self.started) * 1000, 3), **fields})
+
+    def event_log(self):
+        return {"events": self.events or [], "dropped": self.dropped_events}
+
+    def summary(self):
+        return {
+            "total_ms": round(self.total() * 1000, 3),
+            "stages_ms": {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            "searches": self.searches,
+            "search": dict(self.search),
+        }
+
+
+class RoutingMetrics:
+    """The routing pipeline's metric families, recorded once per request from a ``RequestTrace``."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.requests = registry.counter("route_requests_total", "Route requests by outcome and cache status",
+                                         ("endpoint", "status", "cache"))
+        self.stage_seconds = registry.histogram("route_stage_seconds", "Time spent per pipeline stage",
+                                                labelnames=("stage",))
+        self.search_work = {
+            name: registry.histogram(f"route_search_{name}", help_text, COUNT_BUCKETS)
+            for name, help_text in SEARCH_COUNTERS.items()
+        }
+        self.graph_build_seconds = registry.gauge("route_graph_build_seconds", "Base graph and index build time")
+
+    def record(self, trace, endpoint, status, cache=""):
+        with self.registry.updating():
+            self.requests.inc(endpoint=endpoint, status=status, cache=cache)
+            for stage, seconds in trace.stages.items():
+                self.stage_seconds.observe(seconds, stage=stage)
+            self.stage_seconds.observe(trace.total(), stage="total")
+            if trace.searches:
+                for name, value in trace.search.items():
+                    self.search_work[name].observe(value)
@@ -0,0 +1,169 @@
+# src/utils/profiling.py
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import Counter
+
+logger = logging.getLogger("profiling")
+
+# tracemalloc is process-wide; it runs while at least one profiled request is active.
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+
+
+def _tracemalloc_acquire(frames):
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        _tracemalloc_users += 1
+        tracemalloc.reset_peak()
+
+
+def _tracemalloc_release():
+    global _tracemalloc_users
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0:
+            tracemalloc.stop()
+
+
+def _safe_name(request_id):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", str(request_id))[:64] or "request"
+
+
+class RequestProfiler:
+    """
+    Sampling CPU profile and tracemalloc allocation statistics for one request.
+
+    Between ``start()`` and ``stop()`` a background thread samples the stack
+    of the thread that called ``start()`` every ``interval`` seconds. ``stop()``
+    writes the samples in the collapsed-stack format read by flamegraph.pl,
+    speedscope and similar tools (``stage;frame;frame count`` per line), with
+    the pipeline stage from the request's ``RequestTrace`` laps as the root
+    frame, plus a JSON report of the allocations that grew most during the
+    request. tracemalloc is process-wide, so allocations of requests served
+    concurrently are counted as well, and it slows allocation-heavy code
+    (about 10x with one traceback frame), which also inflates that code's
+    share of the CPU samples; ``trace_allocations=False`` profiles CPU only.
+
+    Args:
+        request_id (str): Names the output files.
+        output_dir (str): Folder for ``<request_id>.collapsed`` and ``<request_id>.json``.
+        interval (float): Seconds between stack samples.
+        trace_allocations (bool): Also record tracemalloc statistics.
+        tracemalloc_frames (int): Frames kept per allocation traceback.
+        top_allocations (int): Allocation sites listed in the report.
+    """
+
+    def __init__(self, request_id, output_dir, interval=0.002, trace_allocations=True, tracemalloc_frames=1,
+                 top_allocations=20):
+        self.request_id = request_id
+        self.output_dir = output_dir
+        self.interval = interval
+        self.trace_allocations = trace_allocations
+        self.tracemalloc_frames = tracemalloc_frames
+        self.top_allocations = top_allocations
+        self.samples = []  # (perf_counter, code objects from the profiled frame inwards)
+        self.active = False
+        self._stop = threading.Event()
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._root = sys._getframe(1)
+        if self.trace_allocations:
+            _tracemalloc_acquire(self.tracemalloc_frames)
+            self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._sample, name=f"profiler-{self.request_id}", daemon=True)
+        self._sampler.start()
+        self.active = True
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                if frame is self._root:
+                    break
+                frame = frame.f_back
+            if stack:
+                self.samples.append((time.perf_counter(), tuple(reversed(stack))))
+
+    def collapsed(self, trace=None):
+        """Collapsed stacks with sample counts, rooted at the stage each sample fell in."""
+        laps = trace.laps if trace is not None else []
+        ends = [end for _, end in laps]
+        names = {}
+        counts = Counter()
+        for at, stack in self.samples:
+            i = bisect_left(ends, at)
+            frames = [laps[i][0] if i < len(laps) else "other"]
+            for code in stack:
+                if code not in names:
+                    names[code] = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                frames.append(names[code])
+            counts[";".join(frames)] += 1
+        return counts
+
+    def stop(self, trace=None):
+        """
+        Stop sampling and write the profile files.
+
+        Returns:
+            dict: Paths of the written files, sample count, traced memory peak
+            and the top allocation sites.
+        """
+        self._stop.set()
+        self._sampler.join()
+        self.active = False
+        elapsed = time.perf_counter() - self._started
+        peak, allocations = 0, []
+        if self.trace_allocations:
+            try:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                _tracemalloc_release()
+            own = (tracemalloc.Filter(False, __file__),)
+            growth = snapshot.filter_traces(own).compare_to(self._baseline.filter_traces(own), "lineno")
+            allocations = [{
+                "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                "size_kb": round(stat.size_diff / 1024, 1),
+                "count": stat.count_diff,
+            } for stat in growth if stat.size_diff > 0][:self.top_allocations]
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = _safe_name(self.request_id)
+        collapsed_path = os.path.join(self.output_dir, f"{name}.collapsed")
+        report_path = os.path.join(self.output_dir, f"{name}.json")
+        with open(collapsed_path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.collapsed(trace).items()):
+                f.write(f"{stack} {count}\n")
+        report = {
+            "request_id": self.request_id,
+            "elapsed_ms": round(elapsed * 1000, 3),
+            "sample_interval_ms": self.interval * 1000,
+            "samples": len(self.samples),
+            "stages_ms": {stage: round(seconds * 1000, 3) for stage, seconds in trace.stages.items()} if trace else {},
+            "peak_traced_kb": round(peak / 1024, 1),
+            "allocations": allocations,
+        }
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Profile for request {self.request_id} written to {collapsed_path} ({len(self.samples)} samples).")
+        return {
+            "requestId": self.request_id,
+            "collapsedStacks": collapsed_path,
+            "report": report_path,
+            "samples": len(self.samples),
+            "peakTracedKb": report["peak_traced_kb"],
+            "topAllocations": allocations[:5],
+        }
@@ -0,0 +1,180 @@
+# src/utils/spatial_index.py
+import numpy as np
+
+from src.data_processing.compiled_graph import NODE_TYPES
+
+EARTH_RADIUS_KM = 6371
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2):
+    """
+    Pairwise great-circle distances (km) between two sets of points.
+
+    Uses the same formula as ``GeocodingUtils.haversine_distance`` so batched
+    and scalar distances agree.
+
+    Args:
+        lat1, lon1 (array-like): Coordinates in degrees, shape (n,).
+        lat2, lon2 (array-like): Coordinates in degrees, shape (m,).
+
+    Returns:
+        np.ndarray: Distance matrix of shape (n, m).
+    """
+    lat1 = np.radians(np.asarray(lat1, dtype=float))[:, None]
+    lon1 = np.radians(np.asarray(lon1, dtype=float))[:, None]
+    lat2 = np.radians(np.asarray(lat2, dtype=float))[None, :]
+    lon2 = np.radians(np.asarray(lon2, dtype=float))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+class CountryNodeIndex:
+    """
+    Graph nodes with coordinates, grouped by country.
+
+    Replaces repeated ``startswith`` scans over every graph node: each country
+    maps to its node ids (in graph order) and their coordinate arrays.
+    """
+
+    def __init__(self, G):
+        grouped = {}
+        for node, data in G.nodes(data=True):
+            if "latitude" not in data:
+                continue
+            grouped.setdefault(data["country"], []).append((node, data["latitude"], data["longitude"]))
+        self._countries = {}
+        for country, rows in grouped.items():
+            ids, lats, lons = zip(*rows)
+            self._countries[country] = (list(ids), np.array(lats, dtype=float), np.array(lons, dtype=float))
+
+    def __contains__(self, country):
+        return country in self._countries
+
+    def nodes(self, country):
+        return self._countries.get(country, ([], None, None))[0]
+
+    def pairs_within(self, country_a, country_b, max_distance_km, chunk_size=2048):
+        """
+        All (node_a, node_b, distance_km) pairs between two countries within a radius.
+
+        Pairs are returned in node_a-major order, and a node is never paired
+        with itself.
+
+        Returns:
+            tuple: (from_nodes, to_nodes, distances) as lists/arrays of equal length.
+        """
+        if country_a not in self._countries or country_b not in self._countries:
+            return [], [], np.empty(0)
+        ids_a, lats_a, lons_a = self._countries[country_a]
+        ids_b, lats_b, lons_b = self._countries[country_b]
+        from_idx, to_idx, distances = [], [], []
+        for start in range(0, len(ids_a), chunk_size):
+            block = haversine_matrix(lats_a[start:start + chunk_size], lons_a[start:start + chunk_size], lats_b, lons_b)
+            rows, cols = np.nonzero(block <= max_distance_km)
+            from_idx.append(rows + start)
+            to_idx.append(cols)
+            distances.append(block[rows, cols])
+        from_idx = np.concatenate(from_idx)
+        to_idx = np.concatenate(to_idx)
+        distances = np.concatenate(distances)
+        from_nodes = [ids_a[i] for i in from_idx.tolist()]
+        to_nodes = [ids_b[j] for j in to_idx.tolist()]
+        if country_a == country_b:
+            keep = [a != b for a, b in zip(from_nodes, to_nodes)]
+            from_nodes = [n for n, k in zip(from_nodes, keep) if k]
+            to_nodes = [n for n, k in zip(to_nodes, keep) if k]
+            distances = distances[np.array(keep, dtype=bool)]
+        return from_nodes, to_nodes, distances
+
+
+class HubIndex:
+    """
+    k-nearest lookup of access hubs, partitioned by (country, node type).
+
+    Built once from the compiled base graph so attaching a request's start/end
+    point is a small in-memory distance computation rather than a scan of every node.
+    """
+
+    def __init__(self, graph, hub_types=("seaport", "airport")):
+        """
+        Args:
+            graph (CompiledGraph): Base graph; hubs need coordinates and a country.
+            hub_types (tuple): Node types to index, in the order ``nearest_hubs`` returns them.
+        """
+        grouped = {}
+        rows = zip(graph.node_ids, graph.countries, np.asarray(graph.node_type).tolist(),
+                   np.asarray(graph.lat).tolist(), np.asarray(graph.lon).tolist())
+        for node, country, type_index, lat, lon in rows:
+            node_type = NODE_TYPES[type_index] if type_index >= 0 else None
+            if node_type in hub_types and lat == lat:
+                grouped.setdefault((country, node_type), []).append((node, lat, lon))
+        self.hub_types = tuple(hub_types)
+        self._partitions = {}
+        for key, rows in grouped.items():
+            ids, lats, lons = zip(*rows)
+            lat_rad = np.radians(np.array(lats, dtype=float))
+            self._partitions[key] = (list(ids), lat_rad, np.radians(np.array(lons, dtype=float)), np.cos(lat_rad))
+
+    def nearest(self, location, country, node_type, k=1):
+        """
+        The ``k`` hubs of ``node_type`` in ``country`` closest to ``location``.
+
+        Ties keep graph order, so ``k=1`` returns the same hub as a linear scan.
+
+        Returns:
+            list: ``(node_id, distance_km)`` tuples sorted by distance.
+        """
+        partition = self._partitions.get((country, node_type))
+        if partition is None or k <= 0:
+            return []
+        ids, lat_rad, lon_rad, cos_lat = partition
+        lat0, lon0 = np.radians(location[0]), np.radians(location[1])
+        a = np.sin((lat_rad - lat0) / 2) ** 2 + np.cos(lat0) * cos_lat * np.sin((lon_rad - lon0) / 2) ** 2
+        distances = EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+        order = np.argsort(distances, kind="stable")[:k]
+        return [(ids[i], float(distances[i])) for i in order.tolist()]
+
+    def nearest_hubs(self, location, country, k=1):
+        """``nearest`` for every hub type, in ``hub_types`` order."""
+        return [hub for node_type in self.hub_types for hub in self.nearest(location, country, node_type, k)]
+
+
+class CandidateHubIndex:
+    """
+    Country -> trade neighbours -> hubs, for choosing a request's search sources and goals.
+
+    Built once from the compiled base graph and the trade-neighbour table, so
+    listing the hubs for a shipment endpoint is a dictionary lookup.
+    """
+
+    def __init__(self, graph, trade_neighbours):
+        """
+        Args:
+            graph (CompiledGraph): Base graph; nodes without a country are skipped.
+            trade_neighbours (dict): Country -> list of neighbouring country names.
+        """
+        grouped = {}
+        for position, (node, country) in enumerate(zip(graph.node_ids, graph.countries)):
+            if country is not None:
+                grouped.setdefault(country.lower(), []).append((position, node))
+        self._hubs = {country: tuple(zip(*rows)) for country, rows in grouped.items()}
+        self._neighbours = {country.lower(): list(neighbours) for country, neighbours in trade_neighbours.items()}
+
+    def countries(self, country):
+        """``country`` followed by its trade neighbours."""
+        return [country] + self._neighbours.get(country.lower(), [])
+
+    def hubs(self, country):
+        """
+        Hubs in ``country`` and its trade neighbours, in graph order.
+
+        Returns:
+            list: Node ids.
+        """
+        parts = {}
+        for name in self.countries(country):
+            entry = self._hubs.get(name.strip().lower())
+            if entry is not None:
+                parts[name.strip().lower()] = entry
+        rows = sorted(row for positions, ids in parts.values() for row in zip(positions, ids))
+        return [node for _, node in rows]
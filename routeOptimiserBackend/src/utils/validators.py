@@ -1,22 +1,37 @@
 # src/utils/validators.py
 import logging
-import logging.config
-import yaml
-import os
 
-# Ensure logs directory exists
-os.makedirs("logs", exist_ok=True)
-
-# Set up logging with fallback
-try:
-    with open("config/logging_config.yaml", "r") as f:
-        config = yaml.safe_load(f.read())
-    logging.config.dictConfig(config)
-except (FileNotFoundError, ValueError) as e:
-    logging.basicConfig(level=logging.INFO)
-    logging.warning(f"Failed to load logging config: {e}. Using basic configuration.")
 logger = logging.getLogger("validators")
 
+def validate_weights(weights):
+    """
+    Validate a [time, cost, emissions, customs] weight vector.
+
+    Args:
+        weights (list or dict or None): Four weights, or a dict keyed like the
+            frontend's ``customWeights`` (time, cost, emissions, logisticsScore).
+
+    Returns:
+        list: Validated weights (defaults if None).
+
+    Raises:
+        ValueError: If the weights are invalid.
+    """
+    if weights is None:
+        logger.info("No weights provided; using default [0.25, 0.25, 0.25, 0.25]")
+        return [0.25, 0.25, 0.25, 0.25]
+    if isinstance(weights, dict):
+        weights = [weights.get(key, 0.25) for key in ("time", "cost", "emissions", "logisticsScore")]
+    try:
+        weights = [float(w) for w in weights]
+        if len(weights) != 4 or abs(sum(weights) - 1) > 0.01 or any(w < 0 for w in weights):
+            logger.error(f"Invalid weights: {weights}")
+            raise ValueError("Weights must be a list of 4 non-negative numbers summing to approximately 1")
+    except (TypeError, ValueError):
+        logger.error(f"Weights format error: {weights}")
+        raise ValueError("Weights must be a list of 4 numbers")
+    return weights
+
 def validate_inputs(initial_coords, final_coords, max_days, weights, weight, volume):
     """
     Validate user inputs for the route selector.
@@ -58,18 +73,7 @@ def validate_inputs(initial_coords, final_coords, max_days, weights, weight, vol
             raise ValueError("Max Days must be a positive number")
 
     # Validate weights
-    if weights is None:
-        logger.info("No weights provided; using default [0.25, 0.25, 0.25, 0.25]")
-        weights = [0.25, 0.25, 0.25, 0.25]
-    else:
-        try:
-            weights = [float(w) for w in weights]
-            if len(weights) != 4 or abs(sum(weights) - 1) > 0.01 or any(w < 0 for w in weights):
-                logger.error(f"Invalid weights: {weights}")
-                raise ValueError("Weights must be a list of 4 non-negative numbers summing to approximately 1")
-        except (TypeError, ValueError):
-            logger.error(f"Weights format error: {weights}")
-            raise ValueError("Weights must be a list of 4 numbers")
+    weights = validate_weights(weights)
 
     # Validate weight and volume
     try:
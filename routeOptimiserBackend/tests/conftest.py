@@ -0,0 +1,28 @@
+# tests/conftest.py
+import random
+
+import networkx as nx
+import pytest
+
+from src.data_processing.compiled_graph import CompiledGraph
+
+
+def random_network(num_nodes=40, num_edges=160, seed=0):
+    """Small multimodal network with parallel edges, border costs and varied per-node customs scores."""
+    rng = random.Random(seed)
+    G = nx.MultiDiGraph()
+    for i in range(num_nodes):
+        G.add_node(f"N{i}", type=rng.choice(("seaport", "airport")), country=f"C{i % 5}",
+                   latitude=rng.uniform(-60, 60), longitude=rng.uniform(-180, 180),
+                   customs_score=rng.uniform(1, 5))
+    for _ in range(num_edges):
+        u, v = rng.sample(range(num_nodes), 2)
+        G.add_edge(f"N{u}", f"N{v}", mode=rng.choice(("sea", "air", "road")), time=rng.uniform(1, 200),
+                   transportation_cost_per_kg=rng.uniform(0.1, 5), border_cost=rng.choice((0, 100)),
+                   emissions=rng.uniform(10, 5000), distance=rng.uniform(10, 5000))
+    return CompiledGraph.from_networkx(G, road_cost_per_km=0.39)
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return random_network()
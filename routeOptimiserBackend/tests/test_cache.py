@@ -0,0 +1,62 @@
+# tests/test_cache.py
+import threading
+import time
+
+from src.utils.budget import Budget
+from src.utils.cache import TTLCache
+
+
+def run_concurrently(cache, first, second, **kwargs):
+    """Start ``first`` as the owner, let ``second`` join it, and return both outcomes."""
+    started = threading.Event()
+    results = {}
+
+    def owner():
+        def compute():
+            started.set()
+            return first()
+        results["first"] = cache.get_or_compute("k", compute, **kwargs.pop("owner_kwargs", {}))
+
+    thread = threading.Thread(target=owner)
+    thread.start()
+    started.wait()
+    results["second"] = cache.get_or_compute("k", second, **kwargs)
+    thread.join()
+    return results
+
+
+def slow(value, seconds=0.2):
+    def compute():
+        time.sleep(seconds)
+        return value
+    return compute
+
+
+def test_waiter_shares_complete_result():
+    cache = TTLCache()
+    results = run_concurrently(cache, slow("full"), lambda: "own", cacheable=lambda v: v == "full",
+                               owner_kwargs={"cacheable": lambda v: v == "full"})
+    assert results == {"first": ("full", "miss"), "second": ("full", "coalesced")}
+    assert cache.get("k") == "full"
+
+
+def test_waiter_recomputes_when_shared_result_is_partial():
+    cache = TTLCache()
+    complete = lambda v: v != "partial"
+    results = run_concurrently(cache, slow("partial"), lambda: "own", cacheable=complete,
+                               owner_kwargs={"cacheable": complete})
+    assert results == {"first": ("partial", "miss"), "second": ("own", "miss")}
+    assert cache.get("k") == "own"
+
+
+def test_waiter_stops_waiting_when_its_budget_is_cancelled():
+    cache = TTLCache()
+    budget = Budget()
+    threading.Timer(0.05, budget.cancel).start()
+    started = time.perf_counter()
+    results = run_concurrently(cache, slow("full", seconds=1.0),
+                               lambda: (budget.reason, time.perf_counter() - started), abandon=budget.spent)
+    (reason, waited), status = results["second"]
+    assert (reason, status) == ("cancelled", "miss")
+    assert waited < 0.5
+    assert results["first"] == ("full", "miss")
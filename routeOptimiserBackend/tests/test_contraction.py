@@ -0,0 +1,33 @@
+# tests/test_contraction.py
+import pytest
+
+from src.optimization.contraction import INF, PRESET_WEIGHTS, ContractionHierarchy, PresetRouter
+from src.optimization.moa_star import MOAStar
+
+OBJECTIVES = ("time", "cost", "emissions", "customs")
+
+
+@pytest.mark.parametrize("preset", PRESET_WEIGHTS)
+def test_hierarchy_matches_plain_search(graph, preset):
+    """Deadline-free hierarchy distances equal the scalarized MOA* optimum for every pair."""
+    weights = PRESET_WEIGHTS[preset]
+    hierarchy = ContractionHierarchy.build(graph, weights)
+    searcher = MOAStar(graph)
+    for s in range(graph.num_base_nodes):
+        for t in range(graph.num_base_nodes):
+            if s == t:
+                continue
+            distance, _ = hierarchy.query(s, t)
+            _, metrics = searcher.moa_star(graph.node_ids[s], graph.node_ids[t], weights, 1, 1e9)
+            expected = INF if metrics is None else sum(w * metrics[k] for w, k in zip(weights, OBJECTIVES))
+            assert distance == pytest.approx(expected, rel=1e-6), (preset, s, t)
+
+
+def test_router_loads_only_complete_saved_sets(graph, tmp_path):
+    assert PresetRouter.load(graph, str(tmp_path)) is None
+    built = PresetRouter.load_or_build(graph, str(tmp_path))
+    loaded = PresetRouter.load(graph, str(tmp_path))
+    assert loaded is not None and set(loaded.hierarchies) == set(built.hierarchies) == set(PRESET_WEIGHTS)
+
+    (tmp_path / "ch-emissions.npz").unlink()
+    assert PresetRouter.load(graph, str(tmp_path)) is None
@@ -0,0 +1,57 @@
+# tests/test_corridor.py
+import random
+
+import networkx as nx
+import pytest
+
+from src.data_processing.compiled_graph import CompiledGraph
+from src.optimization.corridor import Corridor
+from src.optimization.moa_star import MOAStar
+from src.utils.geocoding import GeocodingUtils
+
+haversine = GeocodingUtils().haversine_distance
+
+
+@pytest.fixture(scope="module")
+def geometric_graph():
+    """Random network whose edge times are proportional to the great-circle distance they cover."""
+    rng = random.Random(5)
+    G = nx.MultiDiGraph()
+    coords = [(rng.uniform(-40, 40), rng.uniform(-60, 60)) for _ in range(60)]
+    for i, (lat, lon) in enumerate(coords):
+        G.add_node(f"N{i}", type="seaport", country="C", latitude=lat, longitude=lon, customs_score=1)
+    for i, a in enumerate(coords):
+        nearest = sorted(range(len(coords)), key=lambda j: haversine(a, coords[j]))[1:5]
+        for j in nearest:
+            for u, v in ((i, j), (j, i)):
+                distance = haversine(coords[u], coords[v])
+                G.add_edge(f"N{u}", f"N{v}", mode="sea", distance=distance, time=distance / 30,
+                           transportation_cost_per_kg=1, border_cost=0, emissions=distance)
+    return CompiledGraph.from_networkx(G)
+
+
+def route_km(graph, path):
+    return sum(haversine(graph.coords(a), graph.coords(b)) for a, b in zip(path, path[1:]))
+
+
+@pytest.mark.parametrize("pair", [(3, 41), (12, 55), (5, 33), (8, 44)])
+def test_mask_keeps_the_optimal_route_within_its_detour(geometric_graph, pair):
+    """
+    ``d(o, v) + d(v, t)`` never exceeds the length of a route from o to t
+    through v, so a corridor whose factor covers the optimal route's detour
+    keeps the whole route and the search finds it again.
+    """
+    graph = geometric_graph
+    source, goal = (graph.node_ids[i] for i in pair)
+    origin, destination = graph.coords(source), graph.coords(goal)
+    path, metrics = MOAStar(graph).moa_star(source, goal, (1, 0, 0, 0), 1, 1000)
+    factor = max(1.0, route_km(graph, path) / haversine(origin, destination)) * (1 + 1e-9)
+
+    corridor = Corridor(graph, origin, destination, detour_factor=factor, min_slack_km=0)
+    assert all(corridor.mask[graph.index[n]] for n in path)
+    assert sum(corridor.mask) < len(graph)  # the corridor does prune
+    inside_path, inside_metrics = MOAStar(graph, corridor=corridor.mask).moa_star(source, goal, (1, 0, 0, 0), 1, 1000)
+    assert inside_metrics["time"] == pytest.approx(metrics["time"])
+
+    wider = corridor.widen()
+    assert all(w or not m for w, m in zip(wider.mask, corridor.mask))
@@ -0,0 +1,40 @@
+# tests/test_find_routes.py
+import json
+import os
+
+import pytest
+
+import main
+
+CITIES = {
+    "India": (19.076, 72.8777), "United Kingdom": (51.5074, -0.1278), "Germany": (52.52, 13.405),
+    "China": (30.5728, 104.0668), "United States": (40.7128, -74.006), "France": (48.8566, 2.3522),
+    "Brazil": (-23.5505, -46.6333), "Japan": (35.6762, 139.6503), "Australia": (-33.8688, 151.2093),
+}
+
+# Top-10 scores of the original row-wise implementation on the bundled data
+# (500 kg, 1 m3), keyed by "origin|destination|optimizationType|maxDays".
+with open(os.path.join(os.path.dirname(__file__), "data", "baseline_top10.json")) as f:
+    BASELINE = json.load(f)
+
+
+@pytest.fixture(scope="module")
+def client():
+    return main.create_app().test_client()
+
+
+@pytest.mark.parametrize("query", BASELINE)
+def test_top10_no_worse_than_baseline(client, query):
+    origin, destination, optimization_type, max_days = query.split("|")
+    (start_lat, start_lon), (end_lat, end_lon) = CITIES[origin], CITIES[destination]
+    response = client.post("/api/find-routes", json={
+        "startLat": start_lat, "startLon": start_lon, "initialCountry": origin,
+        "endLat": end_lat, "endLon": end_lon, "finalCountry": destination,
+        "maxDays": int(max_days), "weight": 500, "volume": 1, "optimizationType": optimization_type,
+    }).get_json()
+    assert response["status"] == "success"
+    scores = [route["score"] for route in response["routes"]]
+    expected = BASELINE[query]
+    assert len(scores) >= len(expected)
+    for rank, (score, baseline) in enumerate(zip(scores, expected)):
+        assert score <= baseline + 0.01, (query, rank, score, baseline)
@@ -0,0 +1,70 @@
+# tests/test_graph_builder.py
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.data_processing.graph_builder import GraphBuilder
+
+CONFIG = {
+    "data": {"raw_nodes_dir": "", "raw_edges_dir": "", "processed_dir": "", "cache_dir": ""},
+    "defaults": {"fallback_time_hours": 24, "fallback_distance_km": 100},
+}
+NODES = [f"N{i}" for i in range(8)]
+
+
+@pytest.fixture
+def builder():
+    builder = GraphBuilder(CONFIG)
+    builder.G.add_nodes_from(NODES)
+    return builder
+
+
+@pytest.mark.parametrize("values", [
+    ["2 days 3 hours", "45 minutes", 5, 2.5, None, np.nan, "1 day", "3 Hours 30 Minutes", "1.5 days", "abc"],
+    [1.0, np.nan, 36.5, 0],
+])
+def test_parse_time_column_matches_row_parser(builder, values):
+    series = pd.Series(values, name="time")
+    expected = [builder.parse_time_to_hours(v) for v in values]
+    assert builder.parse_time_column(series).tolist() == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("values", [
+    ["12 km", " 7.5 KM ", 3, 4.25, None, "bad", "100"],
+    [10.0, np.nan, 0.5],
+])
+def test_parse_distance_column_matches_row_parser(builder, values):
+    series = pd.Series(values, name="distance")
+    expected = [builder.parse_distance_to_km(v) for v in values]
+    assert builder.parse_distance_column(series).tolist() == pytest.approx(expected)
+
+
+def edge_frame(rng, rows):
+    """Edge rows over a few lanes with repeated (tied) scores and some unknown nodes."""
+    records = []
+    for _ in range(rows):
+        mode = rng.choice(("sea", "air", "road"))
+        records.append({
+            "from_node": rng.choice(NODES + ["Missing"]), "to_node": rng.choice(NODES),
+            "mode": mode, "distance": float(rng.randint(1, 9)), "time": float(rng.randint(1, 3)),
+            "transportation_cost_per_kg": float(rng.randint(0, 2)), "border_cost": float(rng.choice((0, 1))),
+            "emissions": float(rng.randint(1, 9)), "route": f"R{rng.randint(0, 3)}" if mode == "sea" else None,
+        })
+    return pd.DataFrame(records)
+
+
+def test_add_edges_bulk_matches_row_by_row_insert(builder):
+    rng = random.Random(3)
+    frames = [edge_frame(rng, 150), edge_frame(rng, 0), edge_frame(rng, 150)]
+    builder.add_edges_bulk(frames)
+
+    row_wise = GraphBuilder(CONFIG)
+    row_wise.G.add_nodes_from(NODES)
+    for row in pd.concat(frames, ignore_index=True).to_dict(orient="records"):
+        extra = {"route": row["route"]} if row["mode"] == "sea" else {}
+        row_wise.add_edge_if_unique(row["from_node"], row["to_node"], row["mode"], row["distance"], row["time"],
+                                    row["transportation_cost_per_kg"], row["border_cost"], row["emissions"], **extra)
+
+    assert list(builder.G.edges(keys=True, data=True)) == list(row_wise.G.edges(keys=True, data=True))
@@ -0,0 +1,58 @@
+# tests/test_graph_snapshot.py
+import math
+
+import networkx as nx
+import numpy as np
+
+from src.data_processing.compiled_graph import CompiledGraph
+from src.data_processing.graph_snapshot import load_snapshot, write_snapshot
+
+
+def mixed_graph():
+    """Nodes and edges with NaN cells, string columns, sparse attributes and parallel edges."""
+    G = nx.MultiDiGraph()
+    G.add_node("A", type="seaport", country="India", latitude=19.0, longitude=72.8, customs_score=2.5, city="Mumbai")
+    G.add_node("B", type="airport", country="Germany", latitude=52.5, longitude=13.4, customs_score=float("nan"))
+    G.add_node("C", type="seaport", country="Brazil", latitude=float("nan"), longitude=float("nan"), city=float("nan"))
+    G.add_edge("A", "B", mode="air", time=9.5, transportation_cost_per_kg=3.1, border_cost=100, emissions=800.0,
+               distance=6300.0)
+    G.add_edge("A", "B", mode="sea", time=400.0, transportation_cost_per_kg=0.2, border_cost=100, emissions=90.0,
+               distance=11000.0, route="Suez")
+    G.add_edge("B", "C", mode="road", time=float("nan"), transportation_cost_per_kg=0.39, border_cost=0,
+               emissions=12.0, distance=30.0)
+    return G
+
+
+def same_value(a, b):
+    return (isinstance(a, float) and isinstance(b, float) and math.isnan(a) and math.isnan(b)) or a == b
+
+
+def same_attrs(a, b):
+    return a.keys() == b.keys() and all(same_value(a[k], b[k]) for k in a)
+
+
+def test_round_trip_keeps_nan_and_string_columns(tmp_path):
+    G = mixed_graph()
+    compiled = CompiledGraph.from_networkx(G, road_cost_per_km=0.39)
+    write_snapshot(G, str(tmp_path), "h", extra_meta={"carbon_factors": {"Road Freight": 0.1}}, compiled=compiled)
+    snapshot = load_snapshot(str(tmp_path), "h")
+
+    loaded = snapshot.to_networkx()
+    assert list(loaded.nodes) == list(G.nodes)
+    for node in ("A", "B"):
+        assert same_attrs(loaded.nodes[node], G.nodes[node])
+    # A blank cell in a string column is stored as missing; NaN stays NaN in numeric columns.
+    assert "city" not in loaded.nodes["C"] and math.isnan(loaded.nodes["C"]["latitude"])
+    assert loaded.nodes["A"]["city"] == "Mumbai" and "city" not in loaded.nodes["B"]
+    assert list(loaded.edges(keys=True)) == list(G.edges(keys=True))
+    for (_, _, a), (_, _, b) in zip(loaded.edges(data=True), G.edges(data=True)):
+        assert same_attrs(a, b)
+    assert snapshot.meta["carbon_factors"] == {"Road Freight": 0.1}
+
+    restored = snapshot.compiled(road_cost_per_km=0.39)
+    assert isinstance(restored.time, np.memmap) and not restored.time.flags.writeable
+    assert restored.node_ids == compiled.node_ids and restored.countries == compiled.countries
+    for name, array in compiled.arrays().items():
+        np.testing.assert_array_equal(getattr(restored, name), array)
+    assert restored.coords("C") is None
+    assert repr(restored.adjacency) == repr(compiled.adjacency)  # NaN-safe comparison
@@ -0,0 +1,54 @@
+# tests/test_landmarks.py
+import random
+
+import networkx as nx
+import pytest
+
+from src.data_processing.graph_overlay import GraphOverlay
+from src.optimization.landmarks import LandmarkTables
+
+
+@pytest.fixture(scope="module")
+def tables(graph):
+    return LandmarkTables.build(graph, 8)
+
+
+def request_graph(graph):
+    """``graph`` plus a custom start and end node, each joined by road to a few hubs."""
+    rng = random.Random(2)
+    overlay = GraphOverlay(graph)
+    for name in ("Custom_Start", "Custom_End"):
+        overlay.add_node(name, type=name[7:].lower(), latitude=0.0, longitude=0.0)
+        for hub in rng.sample(graph.node_ids, 4):
+            for u, v in ((name, hub), (hub, name)):
+                overlay.add_edge(u, v, mode="road", distance=100.0, time=rng.uniform(1, 30),
+                                 transportation_cost_per_kg=0.39, border_cost=0, emissions=rng.uniform(10, 500))
+    return graph.with_overlay(overlay)
+
+
+def exact_distances(graph, goals, weights, weight_kg):
+    """Shortest weighted-objective distance from every node to the nearest goal, by Dijkstra on the reversed graph."""
+    w_time, w_cost, w_emissions, w_customs = weights
+    reverse = nx.DiGraph()
+    reverse.add_nodes_from(range(len(graph)))
+    for u, row in enumerate(graph.adjacency):
+        for head, _, time, cost_per_kg, cost_fixed, emissions, customs in row:
+            w = (w_time * time + w_cost * (cost_per_kg * weight_kg + cost_fixed)
+                 + w_emissions * emissions * weight_kg / 1000 + w_customs * customs)
+            if not reverse.has_edge(head, u) or w < reverse[head][u]["weight"]:
+                reverse.add_edge(head, u, weight=w)
+    distances = nx.multi_source_dijkstra_path_length(reverse, set(goals))
+    return [distances.get(v, float("inf")) for v in range(len(graph))]
+
+
+@pytest.mark.parametrize("weights", [(1, 0, 0, 0), (0, 1, 0, 0), (0, 0, 1, 0), (0, 0, 0, 1), (0.25, 0.25, 0.25, 0.25)])
+@pytest.mark.parametrize("with_overlay", [False, True])
+def test_heuristic_never_exceeds_exact_distance(graph, tables, weights, with_overlay):
+    search_graph = request_graph(graph) if with_overlay else graph
+    goals = [graph.index[n] for n in graph.node_ids[20:24]]
+    estimate = tables.heuristic(search_graph, goals, weights, 500)
+    exact = exact_distances(search_graph, goals, weights, 500)
+    for v, (h, d) in enumerate(zip(estimate, exact)):
+        assert h <= d + 1e-6 * max(1.0, d), (v, h, d)
+    # The bound is informative, not trivially zero.
+    assert sum(h for h, d in zip(estimate, exact) if d < float("inf")) > 0
@@ -0,0 +1,85 @@
+# tests/test_moa_star.py
+import random
+
+import networkx as nx
+import pytest
+
+from src.data_processing.compiled_graph import CompiledGraph
+from src.optimization.moa_star import MOAStar
+
+OBJECTIVES = ("time", "cost", "emissions", "customs")
+
+
+def line_network(edges):
+    """Compiled graph of ``(u, v, time, cost_per_kg)`` edges; other attributes are zero."""
+    G = nx.MultiDiGraph()
+    for u, v, time, cost in edges:
+        G.add_edge(u, v, mode="air", time=time, transportation_cost_per_kg=cost, border_cost=0,
+                   emissions=0, distance=0)
+    return CompiledGraph.from_networkx(G)
+
+
+def score(weights, metrics):
+    return sum(w * metrics[k] for w, k in zip(weights, OBJECTIVES))
+
+
+@pytest.mark.parametrize("weights", [(1, 0, 0, 0), (0, 1, 0, 0), (0.25, 0.25, 0.25, 0.25)])
+def test_multi_matches_per_pair_search(graph, weights):
+    """One multi-target pass finds the per-pair optimum, first/last-mile hours included."""
+    rng = random.Random(1)
+    names = graph.node_ids
+    sources, goals = names[:6], names[20:26]
+    first_mile = {s: rng.uniform(0, 48) for s in sources}
+    last_mile = {g: rng.uniform(0, 48) for g in goals}
+    max_days = 20
+    searcher = MOAStar(graph)
+    multi = searcher.moa_star_multi(sources, goals, weights, 10, max_days, first_mile=first_mile, last_mile=last_mile)
+    for s in sources:
+        for g in goals:
+            path, metrics = searcher.moa_star(s, g, weights, 10, max_days, first_mile[s], last_mile[g])
+            if path is None:
+                assert (s, g) not in multi
+                continue
+            multi_path, multi_metrics = multi[(s, g)]
+            assert multi_path[0] == s and multi_path[-1] == g
+            assert score(weights, multi_metrics) == pytest.approx(score(weights, metrics))
+            assert multi_metrics["time"] + first_mile[s] + last_mile[g] <= max_days * 24
+
+
+def test_deadline_includes_road_legs():
+    graph = line_network([("S", "A", 100, 1), ("A", "G", 10, 1), ("S", "B", 10, 5), ("B", "G", 10, 5)])
+    searcher = MOAStar(graph)
+    assert searcher.moa_star("S", "G", (0, 1, 0, 0), 1, 5)[0] == ["S", "A", "G"]
+    # 20 hours of road before S leave no room for the 110-hour core route.
+    assert searcher.moa_star("S", "G", (0, 1, 0, 0), 1, 5, first_mile=20)[0] == ["S", "B", "G"]
+    routes = searcher.moa_star_multi(["S"], ["G"], (0, 1, 0, 0), 1, 5, last_mile={"G": 20})
+    assert routes[("S", "G")][0] == ["S", "B", "G"]
+
+
+def test_slower_cheaper_label_does_not_close_a_node():
+    """A node settled by a cheap but slow label is expanded again by a faster one."""
+    graph = line_network([("S", "X", 60, 1), ("S", "X", 20, 10), ("X", "G1", 10, 1), ("X", "G2", 50, 1)])
+    routes = MOAStar(graph).moa_star_multi(["S"], ["G1", "G2"], (0, 1, 0, 0), 1, 100 / 24)
+    assert routes[("S", "G1")][1]["time"] == 70
+    assert routes[("S", "G2")][1]["time"] == 70
+    assert routes[("S", "G2")][1]["cost"] == 11
+
+
+def dominates(a, b):
+    return all(a[k] <= b[k] for k in OBJECTIVES) and any(a[k] < b[k] for k in OBJECTIVES)
+
+
+def test_pareto_routes_are_mutually_non_dominated(graph):
+    names = graph.node_ids
+    sources, goals = names[:4], names[20:24]
+    searcher = MOAStar(graph)
+    frontier = searcher.pareto_search(sources, goals, 10, 20)
+    assert frontier
+    for (s, g), routes in frontier.items():
+        assert all(path[0] == s and path[-1] == g for path, _ in routes)
+        for i, (_, a) in enumerate(routes):
+            assert not any(dominates(b, a) for j, (_, b) in enumerate(routes) if j != i), (s, g, a)
+        # Every scalarized optimum is matched by some frontier route.
+        for weights in ((1, 0, 0, 0), (0, 1, 0, 0), (0.25, 0.25, 0.25, 0.25)):
+            _, best = searcher.moa_star(s, g, weights, 10, 20)
+            assert min(score(weights, m) for _, m in routes) == pytest.approx(score(weights, best))
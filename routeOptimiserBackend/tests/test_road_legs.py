@@ -0,0 +1,95 @@
+# tests/test_road_legs.py
+import pytest
+
+from src.data_processing import road_legs
+from src.data_processing.road_legs import OfflineRoadLegs, RoadLegCache, RoadLegService
+
+POINT = (48.8566, 2.3522)
+HUBS = [("FRLEH", (49.49, 0.107)), ("FRMRS", (43.296, 5.37)), ("CDG", (49.0097, 2.5479))]
+
+
+class FakeProvider:
+    """Cacheable provider returning fixed legs; ``fail`` makes every request raise, ``no_route`` hubs get None."""
+
+    name = "fake"
+    cacheable = True
+
+    def __init__(self, fail=False, no_route=()):
+        self.fail = fail
+        self.no_route = set(no_route)
+        self.requests = 0
+        self.asked = []
+
+    def matrix(self, origins, destinations):
+        self.requests += 1
+        if self.fail:
+            raise RuntimeError("quota exceeded")
+        self.asked.append((list(origins), list(destinations)))
+        return [[None if d in self.no_route else (100.0 + i, 2.0 + j) for j, d in enumerate(destinations)]
+                for i, _ in enumerate(origins)]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RoadLegCache(str(tmp_path / "legs.sqlite"), coord_precision_deg=0.01, max_age_days=30)
+
+
+def test_cache_hits_after_first_fetch(cache):
+    provider = FakeProvider()
+    service = RoadLegService(provider, cache)
+    first = service.legs(POINT, HUBS)
+    assert provider.requests == 1 and len(cache) == len(HUBS)
+    # A point within the rounding precision reuses the stored legs.
+    second = service.legs((POINT[0] + 0.001, POINT[1] - 0.001), HUBS)
+    assert second == first and provider.requests == 1
+    stats = service.stats()
+    assert (stats["hits"], stats["misses"], stats["fetched"], stats["hit_rate"]) == (3, 3, 3, 0.5)
+    # The other direction is a separate entry.
+    service.legs(POINT, HUBS, "from_hub")
+    assert provider.requests == 2 and len(cache) == 2 * len(HUBS)
+
+
+def test_only_missing_hubs_are_fetched(cache):
+    provider = FakeProvider()
+    service = RoadLegService(provider, cache)
+    service.legs(POINT, HUBS[:1])
+    service.legs(POINT, HUBS)
+    assert [len(destinations) for _, destinations in provider.asked] == [1, 2]
+
+
+def test_no_route_is_cached_and_filled_by_fallback(cache):
+    provider = FakeProvider(no_route=[HUBS[2][1]])
+    service = RoadLegService(provider, cache)
+    offline = OfflineRoadLegs().matrix([POINT], [HUBS[2][1]])[0][0]
+    for _ in range(2):
+        legs = service.legs(POINT, HUBS)
+        assert legs["CDG"] == pytest.approx(offline)
+    assert provider.requests == 1
+    assert service.stats()["fallbacks"] == 2
+
+
+def test_expired_legs_are_fetched_again(cache, monkeypatch):
+    provider = FakeProvider()
+    service = RoadLegService(provider, cache)
+    service.legs(POINT, HUBS)
+    now = road_legs.time.time()
+    monkeypatch.setattr(road_legs.time, "time", lambda: now + 31 * 86400)
+    assert cache.get_many("fake", "to_hub", cache.round_point(POINT), [hub for hub, _ in HUBS]) == {}
+    service.legs(POINT, HUBS)
+    assert provider.requests == 2
+
+
+def test_provider_failure_falls_back_without_caching(cache):
+    provider = FakeProvider(fail=True)
+    fallback = OfflineRoadLegs(speed_km_h=50)
+    service = RoadLegService(provider, cache, fallback)
+    legs = service.legs(POINT, HUBS, "from_hub")
+    expected = {hub: (km, hours) for (hub, _), (km, hours)
+                in zip(HUBS, (row[0] for row in fallback.matrix([c for _, c in HUBS], [POINT])))}
+    assert legs == pytest.approx(expected)
+    assert len(cache) == 0
+    stats = service.stats()
+    assert (stats["provider_errors"], stats["fallbacks"]) == (1, 3)
+    # Nothing was cached, so the next call asks the provider again.
+    service.legs(POINT, HUBS, "from_hub")
+    assert provider.requests == 2
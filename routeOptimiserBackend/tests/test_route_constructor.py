@@ -0,0 +1,47 @@
+# tests/test_route_constructor.py
+import pytest
+
+from src.data_processing.graph_overlay import GraphOverlay
+from src.optimization.landmarks import LandmarkTables
+from src.optimization.moa_star import MOAStar
+from src.optimization.route_constructor import RouteConstructor
+
+CONFIG = {"defaults": {"road_cost_per_km": 0.39, "fallback_speed_km_h": 60, "road_emission_factor": 169}}
+START, END = (10.0, 20.0), (-5.0, 100.0)
+
+
+@pytest.fixture(scope="module")
+def core_routes(graph):
+    names = graph.node_ids
+    routes = MOAStar(graph).moa_star_multi(names[:12], names[20:32], (0.25, 0.25, 0.25, 0.25), 500, 60)
+    return list(routes.values())
+
+
+@pytest.fixture(scope="module")
+def constructor(graph):
+    overlay = GraphOverlay(graph)
+    for (lat, lon), kind in ((START, "start"), (END, "end")):
+        overlay.add_node(f"Custom_{lat}_{lon}_{kind.title()}", type=kind, latitude=lat, longitude=lon)
+    return RouteConstructor(graph.with_overlay(overlay), CONFIG, landmarks=LandmarkTables.build(graph, 8))
+
+
+@pytest.mark.parametrize("weights", [(1, 0, 0, 0), (0, 1, 0, 0), (0.25, 0.25, 0.25, 0.25)])
+def test_top_k_matches_full_ranking(constructor, core_routes, weights):
+    expected = constructor.rank_routes(constructor.construct_full_routes(core_routes, START, END, 500, 60), weights)
+    candidates = constructor.candidates(core_routes, START, END, 500, 60)
+    top = candidates.top_k(weights, 10)
+    assert [route[1] for route in top] == [route[1] for route in expected]
+    assert [route[0] for route in top] == pytest.approx([route[0] for route in expected])
+    # The graph-free table kept for re-weighting rebuilds the same output.
+    assert candidates.table().rank(weights) == expected
+
+
+def test_cost_bound_prunes_candidates(constructor, core_routes):
+    """The landmark bound on core cost lets top_k score fewer candidates than the access legs alone."""
+    scored = []
+    for landmarks in (None, constructor.landmarks):
+        candidates = RouteConstructor(constructor.graph, CONFIG, landmarks=landmarks).candidates(
+            core_routes, START, END, 500, 60)
+        candidates.top_k((0, 1, 0, 0), 10)
+        scored.append(len(candidates._totals))  # totals() caches every candidate it scores
+    assert scored[1] < scored[0] < len(core_routes)
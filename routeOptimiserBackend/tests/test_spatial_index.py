@@ -0,0 +1,27 @@
+# tests/test_spatial_index.py
+import random
+
+import networkx as nx
+import pytest
+
+from src.utils.geocoding import GeocodingUtils
+from src.utils.spatial_index import CountryNodeIndex
+
+
+@pytest.mark.parametrize("country_a, country_b", [("A", "B"), ("A", "A")])
+def test_pairs_within_matches_pairwise_haversine(country_a, country_b):
+    rng = random.Random(4)
+    G = nx.MultiDiGraph()
+    for i in range(60):
+        G.add_node(f"N{i}", country=rng.choice(("A", "B")), latitude=rng.uniform(40, 50), longitude=rng.uniform(0, 10))
+    G.add_node("NoCoords", country="A")
+    geo = GeocodingUtils()
+    expected = [(u, v, geo.haversine_distance((du["latitude"], du["longitude"]), (dv["latitude"], dv["longitude"])))
+                for u, du in G.nodes(data=True) if du["country"] == country_a and "latitude" in du
+                for v, dv in G.nodes(data=True) if dv["country"] == country_b and "latitude" in dv and u != v]
+    expected = [row for row in expected if row[2] <= 300]
+
+    # A small chunk size runs the blocked distance computation over several chunks.
+    from_nodes, to_nodes, distances = CountryNodeIndex(G).pairs_within(country_a, country_b, 300, chunk_size=7)
+    assert list(zip(from_nodes, to_nodes)) == [(u, v) for u, v, _ in expected]
+    assert distances.tolist() == pytest.approx([d for _, _, d in expected])
@@ -3,6 +3,9 @@ export const config = {
   corsOrigin: process.env.CORS_ORIGIN || 'http://localhost:5173',
   pythonBaseUrl: process.env.PYTHON_BASE_URL || 'http://localhost:5001',
   pythonTimeoutMs: Number(process.env.PYTHON_TIMEOUT_MS || 120000),
+  // Headroom between the backend's compute budget and our own timeout, so a slow
+  // search answers with partial routes instead of being abandoned and retried.
+  computeBudgetMarginMs: Number(process.env.COMPUTE_BUDGET_MARGIN_MS || 5000),
 };
 
 
@@ -1,3 +1,4 @@
+import { randomUUID } from 'node:crypto';
 import { makeHttpClient } from '../utils/httpClient.js';
 import { config } from '../config/index.js';
 
@@ -23,16 +24,53 @@ function validatePayload(body) {
 }
 
 export async function findRoutes(req, res, next) {
+  // The backend keys budgets and cancellation on this id, so it is always ours: a client-chosen
+  // X-Request-Id could collide with (and cancel) another caller's search. The client's id is only logged.
+  const requestId = randomUUID();
+  const clientRequestId = req.get('X-Request-Id');
+  if (clientRequestId) {
+    console.log(`[gateway] find-routes ${requestId} for client request ${clientRequestId}`);
+  }
+  const abort = new AbortController();
+  // If the caller disconnects before we answer, stop waiting and tell the backend to stop searching.
+  const onClose = () => {
+    if (res.writableEnded) return;
+    abort.abort();
+    http.post('/api/cancel-request', { requestId }).catch(() => {});
+  };
+  res.on('close', onClose);
   try {
     validatePayload(req.body);
-    const response = await http.post('/api/find-routes', req.body);
+    const response = await http.post('/api/find-routes', req.body, {
+      signal: abort.signal,
+      headers: {
+        'X-Request-Id': requestId,
+        'X-Compute-Budget-Ms': Math.max(config.pythonTimeoutMs - config.computeBudgetMarginMs, 1000),
+      },
+    });
     res.status(response.status).json(response.data);
   } catch (err) {
+    if (abort.signal.aborted) return;
     if (err.response) {
       return res.status(err.response.status).json(err.response.data);
     }
     next(err);
+  } finally {
+    res.off('close', onClose);
   }
 }
 
-
+export async function reweightRoutes(req, res, next) {
+  try {
+    if (!req.body || !req.body.resultId) {
+      throw Object.assign(new Error('Missing or invalid field: resultId'), { status: 400 });
+    }
+    const response = await http.post('/api/reweight-routes', req.body);
+    res.status(response.status).json(response.data);
+  } catch (err) {
+    if (err.response) {
+      return res.status(err.response.status).json(err.response.data);
+    }
+    next(err);
+  }
+}
@@ -1,9 +1,10 @@
 import { Router } from 'express';
-import { findRoutes } from '../controllers/routesController.js';
+import { findRoutes, reweightRoutes } from '../controllers/routesController.js';
 
 const router = Router();
 
 router.post('/find-routes', findRoutes);
+router.post('/reweight-routes', reweightRoutes);
 
 export default router;
 
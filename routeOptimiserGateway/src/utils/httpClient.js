@@ -10,7 +10,8 @@ export function makeHttpClient(baseURL, timeoutMs = 120000) {
       if (!config) throw error;
       const maxRetries = Number(process.env.HTTP_MAX_RETRIES || 1);
       const status = error.response && error.response.status;
-      const shouldRetry = (!status || (status >= 500 && status < 600));
+      // An aborted request (the client went away) must not be replayed.
+      const shouldRetry = !axios.isCancel(error) && (!status || (status >= 500 && status < 600));
       config.__retryCount = config.__retryCount || 0;
       if (shouldRetry && config.__retryCount < maxRetries) {
         config.__retryCount += 1;